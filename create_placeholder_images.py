@@ -3,35 +3,13 @@
 Script to create placeholder images for the portfolio website
 """
 import os
-from PIL import Image, ImageDraw, ImageFont
+
+from main.placeholders import draw_placeholder
 
 def create_placeholder_image(width, height, text, filename, bg_color='lightblue', text_color='darkblue'):
     """Create a placeholder image with text"""
-    # Create image
-    img = Image.new('RGB', (width, height), bg_color)
-    draw = ImageDraw.Draw(img)
-    
-    # Try to use a default font, fallback to basic if not available
-    try:
-        font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 24)
-    except:
-        try:
-            font = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 24)
-        except:
-            font = ImageFont.load_default()
-    
-    # Get text size and position
-    bbox = draw.textbbox((0, 0), text, font=font)
-    text_width = bbox[2] - bbox[0]
-    text_height = bbox[3] - bbox[1]
-    
-    x = (width - text_width) // 2
-    y = (height - text_height) // 2
-    
-    # Draw text
-    draw.text((x, y), text, fill=text_color, font=font)
-    
-    # Save image
+    # Same drawing code as the /placeholder/ view
+    img = draw_placeholder(width, height, text, bg_color=bg_color, text_color=text_color)
     img.save(filename, 'JPEG', quality=85)
     print(f"Created: {filename}")
 
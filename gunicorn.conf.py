@@ -1,6 +1,8 @@
 # /home/ubuntu/Python-Static-website/gunicorn.conf.py
 
 import multiprocessing
+import os
+import shutil
 
 # Bind to a Unix socket for Nginx <-> Gunicorn communication
 bind = "unix:/home/ubuntu/Python_Static_website/gunicorn.sock"
@@ -25,3 +27,22 @@ daemon = False
 # Security limits
 limit_request_line = 4094
 limit_request_fields = 100
+
+# Request metrics: every worker writes its histograms here and /metrics sums
+# them (see main/metrics.py). Start each master with an empty directory.
+metrics_dir = os.environ.setdefault("METRICS_DIR", "/home/ubuntu/Python_Static_website/metrics")
+
+
+def on_starting(server):
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+# Import Django once in the master and warm it up before forking, so the
+# workers start warm and share its memory copy-on-write (main/warmup.py).
+# With a preloaded app, code changes need a restart rather than a HUP.
+preload_app = True
+
+
+def when_ready(server):
+    from main.warmup import prepare_for_fork
+    server.log.info("Warm-up before fork: %s", prepare_for_fork())
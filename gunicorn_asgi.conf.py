@@ -0,0 +1,56 @@
+# /home/ubuntu/Python-Static-website/gunicorn_asgi.conf.py
+#
+# ASGI deployment: uvicorn workers running the async views in
+# main/async_views.py. Each worker multiplexes many keep-alive connections
+# on one event loop, so far fewer processes are needed than with the sync
+# workers in gunicorn.conf.py. Start with:
+#
+#   gunicorn --config gunicorn_asgi.conf.py
+
+import multiprocessing
+import os
+import shutil
+
+# Bind to a Unix socket for Nginx <-> Gunicorn communication
+bind = "unix:/home/ubuntu/Python_Static_website/gunicorn.sock"
+
+# Worker processes: one event loop per core is enough
+workers = multiprocessing.cpu_count()
+worker_class = "uvicorn.workers.UvicornWorker"
+keepalive = 5
+
+# App settings
+chdir = "/home/ubuntu/Python_Static_website"
+wsgi_app = "portfolio.asgi:application"  # Django ASGI entry point
+raw_env = ["ASYNC_VIEWS=true"]
+
+# Logging
+accesslog = "/home/ubuntu/Python_Static_website/logs/gunicorn-access.log"
+errorlog = "/home/ubuntu/Python_Static_website/logs/gunicorn-error.log"
+loglevel = "info"
+
+# Daemonization (let systemd handle this, so keep False)
+daemon = False
+
+# Security limits
+limit_request_line = 4094
+limit_request_fields = 100
+
+# Request metrics: every worker writes its histograms here and /metrics sums
+# them (see main/metrics.py). Start each master with an empty directory.
+metrics_dir = os.environ.setdefault("METRICS_DIR", "/home/ubuntu/Python_Static_website/metrics")
+
+
+def on_starting(server):
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+# Import Django once in the master and warm it up before forking, so the
+# workers start warm and share its memory copy-on-write (main/warmup.py).
+# With a preloaded app, code changes need a restart rather than a HUP.
+preload_app = True
+
+
+def when_ready(server):
+    from main.warmup import prepare_for_fork
+    server.log.info("Warm-up before fork: %s", prepare_for_fork())
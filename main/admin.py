@@ -1,13 +1,65 @@
 from django.contrib import admin
-from .models import Project, Skill, Experience, Education, Contact
+from django.db import connections, transaction
+from .models import Project, Skill, Experience, Education, Contact, Technology, OutboxMessage
+from .changelist import DateBucketFilter, HighVolumeAdminMixin
+from .images import schedule_derivatives
+from .search import matching_ids
+from .signals import invalidate_project_pages
+from .versioning import bump_content_version
+
+class FullTextSearchMixin:
+    """Answer changelist searches from the FTS5 index instead of LIKE scans"""
+    search_kind = None
+
+    def get_search_results(self, request, queryset, search_term):
+        matches = matching_ids(search_term, self.search_kind)
+        if matches is None:
+            return queryset, False
+        # Filtered inside SQLite rather than passing every matching id back in
+        return queryset.filter(pk__in=matches), False
+
+@admin.register(Technology)
+class TechnologyAdmin(admin.ModelAdmin):
+    """Read-only: the rows are derived from each project's technologies field"""
+    list_display = ['name', 'slug']
+    search_fields = ['name']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
 
 @admin.register(Project)
-class ProjectAdmin(admin.ModelAdmin):
+class ProjectAdmin(FullTextSearchMixin, admin.ModelAdmin):
+    search_kind = 'project'
     list_display = ['title', 'featured', 'created_date']
     list_filter = ['featured', 'created_date']
     search_fields = ['title', 'description', 'technologies']
     list_editable = ['featured']
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if 'image' in form.changed_data and obj.image:
+            # Resize in the background once the new file is committed, then
+            # drop cached pages that were rendered without the srcset
+            transaction.on_commit(lambda: schedule_derivatives(obj.image).add_done_callback(
+                lambda future: derivatives_built(obj, future)
+            ))
+
+def derivatives_built(project, future):
+    """Runs on the process pool's result thread, which has its own connections"""
+    try:
+        if future.exception() is None:
+            invalidate_project_pages(Project, project)
+            # New ETags too, or browsers revalidating get a 304 for the old page
+            bump_content_version()
+    finally:
+        connections.close_all()
+
 @admin.register(Skill)
 class SkillAdmin(admin.ModelAdmin):
     list_display = ['name', 'category', 'proficiency']
@@ -15,20 +67,31 @@ class SkillAdmin(admin.ModelAdmin):
     search_fields = ['name', 'category']
 
 @admin.register(Experience)
-class ExperienceAdmin(admin.ModelAdmin):
+class ExperienceAdmin(FullTextSearchMixin, admin.ModelAdmin):
+    search_kind = 'experience'
     list_display = ['position', 'company', 'start_date', 'end_date']
     list_filter = ['start_date', 'company']
     search_fields = ['position', 'company', 'description']
 
 @admin.register(Education)
-class EducationAdmin(admin.ModelAdmin):
+class EducationAdmin(FullTextSearchMixin, admin.ModelAdmin):
+    search_kind = 'education'
     list_display = ['degree', 'institution', 'start_date', 'end_date']
     list_filter = ['start_date', 'institution']
     search_fields = ['degree', 'institution', 'field_of_study']
 
 @admin.register(Contact)
-class ContactAdmin(admin.ModelAdmin):
+class ContactAdmin(HighVolumeAdminMixin, admin.ModelAdmin):
+    search_table = 'main_contactsearch'
+    bucket_table = 'main_contactbucket'
     list_display = ['name', 'email', 'subject', 'created_date']
-    list_filter = ['created_date']
+    list_filter = [DateBucketFilter]
     search_fields = ['name', 'email', 'subject']
+    search_help_text = 'Matches whole words or word prefixes in name, email and subject'
     readonly_fields = ['created_date']
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'created_date', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['sent_at']
+    readonly_fields = ['created_date', 'sent_at', 'last_error']
@@ -0,0 +1,182 @@
+"""
+Build step for the first-party CSS and JS, run by collectstatic through
+PortfolioStaticFilesStorage (main/storage.py).
+
+The sources listed in STATIC_BUNDLES are minified and concatenated into
+one file per bundle, which the manifest storage then content-hashes and
+compresses like any other static file. For every page template, the CSS
+rules that apply to the markup above the fold (the base template's
+navigation and the page's first sections) are also saved separately.
+The {% css_bundle %} tag inlines them, so the page can paint before the
+full stylesheet has loaded.
+"""
+import re
+from pathlib import Path
+
+from django.conf import settings
+
+STATIC_BUNDLES = getattr(settings, 'STATIC_BUNDLES', {})
+CRITICAL_CSS_DIR = 'css/critical'
+
+# How many leading <section>s of a page count as above the fold on a phone
+CRITICAL_SECTIONS = 2
+
+_STRING_OR_COMMENT = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|/\*.*?\*/''', re.S)
+_TEMPLATE_TAG = re.compile(r'{[{%#].*?[}%#]}', re.S)
+_INCLUDE = re.compile(r'''{%\s*include\s+['"](.+?)['"].*?%}''')
+_EXTENDS = re.compile(r'''{%\s*extends\s+['"](.+?)['"]\s*%}''')
+_CONTENT_BLOCK = re.compile(r'{%\s*block\s+content\s*%}')
+_INTERACTIVE = re.compile(r':(?:hover|focus|focus-within|focus-visible|active|visited)\b')
+
+
+def minify_css(source):
+    """Drop comments and redundant whitespace, leaving strings untouched"""
+    out = []
+    pending = ''
+    position = 0
+    for match in _STRING_OR_COMMENT.finditer(source):
+        pending += source[position:match.start()]
+        position = match.end()
+        if match.group(1) is None:
+            # A comment separates like whitespace, and is squeezed with it
+            pending += ' '
+            continue
+        out += [_squeeze_css(pending), match.group(1)]
+        pending = ''
+    out.append(_squeeze_css(pending + source[position:]))
+    return ''.join(out).strip()
+
+
+def _squeeze_css(text):
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r' ?([{};,>]) ?', r'\1', text)
+    text = re.sub(r': ', ':', text)
+    return text.replace(';}', '}')
+
+
+def minify_js(source):
+    """
+    Conservative minification: strip indentation, blank lines, whole-line
+    comments and block comments that open a line. Everything after them is
+    left alone, so strings, regex literals and ASI behave exactly as
+    authored.
+    """
+    lines = []
+    in_comment = False
+    for line in source.splitlines():
+        line = line.strip()
+        if in_comment:
+            end = line.find('*/')
+            if end < 0:
+                continue
+            line, in_comment = line[end + 2:].lstrip(), False
+        while line.startswith('/*'):
+            # Only the comment goes: `/* note */ run();` keeps `run();`
+            end = line.find('*/', 2)
+            if end < 0:
+                line, in_comment = '', True
+            else:
+                line = line[end + 2:].lstrip()
+        if not line or line.startswith('//'):
+            continue
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def build_bundle(name, sources):
+    """Minify and concatenate the source texts of one bundle"""
+    if name.endswith('.css'):
+        return '\n'.join(minify_css(source) for source in sources)
+    # Guard against a source without a trailing semicolon
+    return '\n;'.join(minify_js(source) for source in sources)
+
+
+def _rules(css):
+    """Yield (prelude, body) for each top-level rule of minified CSS"""
+    depth = start = body_start = 0
+    prelude = ''
+    for index, char in enumerate(css):
+        if char == '{':
+            if depth == 0:
+                prelude, body_start = css[start:index].strip(), index + 1
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                yield prelude, css[body_start:index]
+                start = index + 1
+
+
+def _selector_applies(selector, tokens):
+    if _INTERACTIVE.search(selector):
+        return False
+    names = re.findall(r'([.#]-?[_a-zA-Z][\w-]*)', selector)
+    names += re.findall(r'(?:^|[\s>+~(])([a-zA-Z][\w-]*)', selector)
+    return all(name in tokens for name in names)
+
+
+def critical_css(css, tokens):
+    """The rules of `css` that can apply to markup using `tokens`"""
+    kept = []
+    keyframes = {}
+    for prelude, body in _rules(css):
+        if prelude.startswith('@keyframes'):
+            keyframes[prelude.split()[-1]] = f'{prelude}{{{body}}}'
+        elif prelude.startswith(('@media', '@supports')):
+            inner = critical_css(body, tokens)
+            if inner:
+                kept.append(f'{prelude}{{{inner}}}')
+        elif not prelude.startswith('@'):
+            selectors = [s for s in prelude.split(',') if _selector_applies(s, tokens)]
+            if selectors:
+                kept.append(f'{",".join(selectors)}{{{body}}}')
+    result = ''.join(kept)
+    # Animations used above the fold need their keyframes too
+    result += ''.join(rule for name, rule in keyframes.items() if re.search(rf'\b{re.escape(name)}\b', result))
+    return result
+
+
+def _template_dir():
+    return Path(settings.TEMPLATES[0]['DIRS'][0])
+
+
+def _source(template_name):
+    return (_template_dir() / template_name).read_text()
+
+
+def _inline_includes(source):
+    return _INCLUDE.sub(lambda match: _inline_includes(_source(match.group(1))), source)
+
+
+def above_the_fold(template_name):
+    """Markup of the page shell plus the first sections of the page"""
+    source = _source(template_name)
+    parent = _EXTENDS.search(source)
+    if parent is None:
+        return _inline_includes(source)
+    shell = _CONTENT_BLOCK.split(_source(parent.group(1)), 1)[0]
+    content = _inline_includes(_CONTENT_BLOCK.split(source, 1)[-1])
+    content = '</section>'.join(content.split('</section>')[:CRITICAL_SECTIONS])
+    return shell + content
+
+
+def markup_tokens(markup):
+    """Class names (.x), ids (#x) and element names used in a template"""
+    tokens = set(re.findall(r'<([a-zA-Z][\w-]*)', markup))
+    for attribute, prefix in (('class', '.'), ('id', '#')):
+        # Also picks up css_class="..." arguments of the image template tags
+        for value in re.findall(rf'(?:\b|_){attribute}="([^"]*)"', markup):
+            tokens.update(prefix + name for name in _TEMPLATE_TAG.sub(' ', value).split())
+    return tokens
+
+
+def page_templates():
+    """Names of the templates that extend another, i.e. full pages"""
+    root = _template_dir()
+    for path in sorted(root.rglob('*.html')):
+        if not path.name.startswith('_') and _EXTENDS.search(path.read_text()):
+            yield path.relative_to(root).as_posix()
+
+
+def critical_css_name(template_name):
+    return f"{CRITICAL_CSS_DIR}/{template_name.removesuffix('.html').replace('/', '-')}.css"
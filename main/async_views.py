@@ -0,0 +1,150 @@
+"""
+Async versions of the views in main/views.py, served when ASYNC_VIEWS is
+enabled and the app runs under ASGI (see gunicorn_asgi.conf.py).
+
+Lookups that decide the status are awaited with the async ORM. Pages
+then stream through astream_render() (main/streaming.py): their deferred
+queries and the templates run on the request's sync thread once the head
+has gone out. Other work that is inherently sync (keyset pages for
+fragments, saving the contact form in a transaction) runs through
+sync_to_async. The contact email is queued in the outbox, so the POST
+never waits on SMTP.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.http import Http404, JsonResponse
+from django.shortcuts import render, redirect
+from django.template.loader import render_to_string
+from django.utils.cache import add_never_cache_headers
+
+from .cache import cache_public_page
+from .forms import ContactForm
+from .local_cache import project_cache
+from .models import Project, Technology
+from .pagination import keyset_page
+from .ratelimit import rate_limit_posts
+from .search import search as search_index
+from .snapshots import page_context
+from .streaming import astream_render
+from .versioning import conditional_page
+from .views import project_listing_json, save_contact_message
+
+
+async def aget_object_or_404(queryset, **kwargs):
+    try:
+        return await queryset.aget(**kwargs)
+    except queryset.model.DoesNotExist:
+        raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+
+
+@conditional_page
+@cache_public_page
+async def home(request):
+    """Home page view with featured projects and skills"""
+    return await astream_render(request, 'main/home.html', deferred=lambda: page_context('home'))
+
+
+@conditional_page
+@cache_public_page
+async def about(request):
+    """About page with experience and education"""
+    return await astream_render(request, 'main/about.html', deferred=lambda: page_context('about'))
+
+
+async def render_project_list(request, queryset, extra_context=None):
+    """Render one keyset page of projects, as a full page or a grid fragment"""
+    def project_page():
+        page, next_cursor = keyset_page(queryset.prefetch_related('tech_stack'), request.GET.get('after'))
+        return {
+            'projects': page,
+            'next_page_url': f'?after={next_cursor}' if next_cursor else None,
+        }
+
+    if request.GET.get('fragment'):
+        context = await sync_to_async(project_page)()
+        return render(request, 'main/_project_cards.html', {**context, **(extra_context or {})})
+    return await astream_render(request, 'main/projects.html', extra_context, deferred=project_page)
+
+
+@conditional_page
+@cache_public_page
+async def projects(request):
+    """Projects page showing all projects, one keyset page at a time"""
+    return await render_project_list(request, Project.objects.all())
+
+
+@conditional_page
+@cache_public_page
+async def projects_json(request):
+    """JSON listing of projects with a cursor for the next page"""
+    page, next_cursor = await sync_to_async(keyset_page)(
+        Project.objects.prefetch_related('tech_stack'), request.GET.get('after')
+    )
+    return JsonResponse(project_listing_json(page, next_cursor))
+
+
+@conditional_page
+@cache_public_page
+async def technology_projects(request, slug):
+    """Projects built with a single technology"""
+    technology = await aget_object_or_404(Technology.objects.all(), slug=slug)
+    return await render_project_list(request, technology.projects.all(), {'technology': technology})
+
+
+@conditional_page
+@cache_public_page
+async def project_detail(request, pk):
+    """Individual project detail page"""
+    entry = project_cache.get(pk)
+    if entry is None:
+        generation = project_cache.generation(pk)
+        project = await aget_object_or_404(Project.objects.prefetch_related('tech_stack'), pk=pk)
+        entry = project, render_to_string('main/_project_detail.html', {'project': project})
+        project_cache.set(pk, generation, entry)
+    project, body = entry
+
+    context = {
+        'project': project,
+        'project_body': body,
+    }
+    return await astream_render(request, 'main/project_detail.html', context)
+
+
+@conditional_page
+async def search(request):
+    """Full-text search across projects, experience and education"""
+    query = request.GET.get('q', '').strip()
+
+    context = {
+        'query': query,
+    }
+    return await astream_render(request, 'main/search.html', context,
+                                deferred=lambda: {'results': search_index(query) if query else []})
+
+
+@rate_limit_posts('contact', per_ip=settings.CONTACT_RATE_LIMIT_PER_IP,
+                  global_=settings.CONTACT_RATE_LIMIT_GLOBAL)
+@conditional_page
+@cache_public_page
+async def contact(request):
+    """Contact page; the form is loaded from contact_form unless it has errors to show"""
+    if request.method == 'POST':
+        form = ContactForm(request.POST)
+        if await sync_to_async(form.is_valid)():
+            await sync_to_async(save_contact_message)(form)
+            messages.success(request, 'Thank you for your message! I will get back to you soon.')
+            return redirect('contact')
+        # Rendered here, so its CSRF token and messages are settled before
+        # the streamed page's headers go out
+        contact_form = await sync_to_async(render_to_string)('main/_contact_form.html', {'form': form}, request)
+        return await astream_render(request, 'main/contact.html', {'contact_form': contact_form})
+    return await astream_render(request, 'main/contact.html')
+
+
+async def contact_form(request):
+    """The contact form with its CSRF token and any flash messages"""
+    # Messages may fall back to the session, which is sync-only
+    response = await sync_to_async(render)(request, 'main/_contact_form.html', {'form': ContactForm()})
+    add_never_cache_headers(response)
+    return response
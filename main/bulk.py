@@ -0,0 +1,52 @@
+"""
+Helpers for loading rows with bulk_create, which skips save() and the
+signal handlers in main/signals.py. Used by the generate_dataset and
+import_content commands.
+"""
+from contextlib import contextmanager
+
+from django.db import connection, models
+
+from .models import Project, Technology, technology_slug
+
+
+@contextmanager
+def explicit_dates(model):
+    """Let bulk_create keep the given values of auto_now(_add) fields"""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if isinstance(field, models.DateField) and (field.auto_now or field.auto_now_add)
+    ]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def technology_ids(names):
+    """Technology pk for each name, creating the rows that are missing"""
+    slugs = {technology_slug(name): name for name in names}
+    Technology.objects.bulk_create(
+        [Technology(name=name, slug=slug) for slug, name in slugs.items()],
+        ignore_conflicts=True,
+    )
+    by_slug = dict(Technology.objects.filter(slug__in=slugs).values_list('slug', 'pk'))
+    return {name: by_slug[technology_slug(name)] for name in names}
+
+
+def link_technologies(projects, replace=False):
+    """Project.sync_technologies() for many saved projects at once"""
+    stacks = [(project.pk, project.get_technologies_list()) for project in projects]
+    ids = technology_ids({name for _, names in stacks for name in names})
+    # "Go, go" names one technology twice; the link table allows it once
+    links = dict.fromkeys((pk, ids[name]) for pk, names in stacks for name in names)
+    table = Project.tech_stack.through._meta.db_table
+    with connection.cursor() as cursor:
+        if replace:
+            cursor.executemany(f'DELETE FROM {table} WHERE project_id = %s', [(pk,) for pk, _ in stacks])
+        # Plain rows: through-model instances would cost more than the insert
+        cursor.executemany(f'INSERT INTO {table} (project_id, technology_id) VALUES (%s, %s)', list(links))
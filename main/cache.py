@@ -0,0 +1,223 @@
+"""
+Full-page cache for the public pages.
+
+Rendered responses are stored in the default cache per path and per value
+of the query parameters the views read, together with the page's version
+number. Versions live in their own cache that is never culled. Saving
+content bumps the version of the affected paths (see main/signals.py),
+which marks every cached variant of that path stale without losing it: one
+request re-renders the page while concurrent requests keep getting the
+stale copy. On a cold miss there is no copy to hand out, so every request
+renders the page itself rather than tie up a worker waiting for another.
+
+Public pages read no session, cookie or CSRF state (the contact form and
+flash messages come from the contact_form fragment), so every visitor
+shares the same copy. Responses are marked Cache-Control: public with an
+s-maxage, letting nginx and other shared caches keep them briefly too.
+
+The same invalidations delete the affected pages' pre-rendered copies
+from `manage.py build_static`, so nginx hands those paths back to Django
+until the next build renders them again.
+"""
+import asyncio
+import hashlib
+import time
+from functools import wraps
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import add_never_cache_headers, patch_cache_control
+from django.utils.connection import ConnectionProxy
+
+from .preload import recorded_links, replay_links
+from .streaming import observe_stream
+
+PAGE_CACHE_TIMEOUT = getattr(settings, 'PAGE_CACHE_TIMEOUT', 600)
+PAGE_CACHE_STALE = getattr(settings, 'PAGE_CACHE_STALE_WHILE_REVALIDATE', 60)
+PAGE_CACHE_SHARED_MAX_AGE = getattr(settings, 'PAGE_CACHE_SHARED_MAX_AGE', 60)
+
+# The only query parameters any public view reads; others can't change
+# the page, so they mustn't multiply its cache entries
+CACHE_KEY_PARAMS = ('after', 'fragment', 'q')
+
+# Looked up on use, like django.core.cache.cache
+versions = ConnectionProxy(caches, 'page_versions')
+
+
+def _version_key(path):
+    return 'page-version:' + path
+
+
+def _entry_key(request):
+    params = [(name, request.GET[name]) for name in CACHE_KEY_PARAMS if name in request.GET]
+    variant = hashlib.md5(repr(params).encode()).hexdigest()
+    return f'page:{request.path}:{variant}'
+
+
+def page_version(path):
+    return versions.get(_version_key(path), 0)
+
+
+def _bump_versions(paths):
+    for path in paths:
+        try:
+            versions.incr(_version_key(path))
+        except ValueError:
+            versions.set(_version_key(path), 1, None)
+
+
+def _site_root():
+    return Path(getattr(settings, 'STATIC_SITE_ROOT', settings.BASE_DIR / 'site'))
+
+
+def prerendered_path(root, path):
+    """Where build_static writes the page for a URL path"""
+    return Path(root, path.strip('/'), 'index.html')
+
+
+def _drop_prerendered(paths):
+    root = _site_root()
+    for path in paths:
+        prerendered_path(root, path).unlink(missing_ok=True)
+
+
+def invalidate_pages(*paths):
+    """Mark every cached variant of the given paths as stale once the change commits"""
+    # Bumping earlier would let a request re-cache the old content at the new version
+    transaction.on_commit(lambda: (_bump_versions(paths), _drop_prerendered(paths)))
+
+
+def clear_pages():
+    """Drop every cached page, for bulk loads that touch too many paths to bump"""
+    cache.clear()
+    for page in _site_root().rglob('index.html'):
+        page.unlink(missing_ok=True)
+
+
+def is_cacheable_request(request):
+    """Public pages are the same for every visitor, so any GET shares one"""
+    return request.method in ('GET', 'HEAD')
+
+
+def patch_public_cache_headers(response):
+    # Browsers revalidate every time (a cheap 304, see main/versioning.py);
+    # shared caches may serve the page for s-maxage first
+    patch_cache_control(
+        response, public=True, max_age=0, s_maxage=PAGE_CACHE_SHARED_MAX_AGE,
+        stale_while_revalidate=PAGE_CACHE_STALE,
+    )
+
+
+def _build_response(entry, state):
+    response = HttpResponse(entry['content'], content_type=entry['content_type'])
+    replay_links(entry.get('preload', []))
+    response['X-Page-Cache'] = state
+    if state == 'STALE':
+        # Don't let clients keep outdated content under the current validators
+        add_never_cache_headers(response)
+    else:
+        patch_public_cache_headers(response)
+    return response
+
+
+class _PageLookup:
+    """State carried from the cache lookup to storing the rendered page"""
+
+    def __init__(self, request):
+        self.key = _entry_key(request)
+        self.lock_key = self.key + ':lock'
+        self.version = page_version(request.path)
+        self.now = time.time()
+        self.locked = False
+        self.pending = False
+
+    def cached_response(self):
+        """A response from the cache, or None if this request must render"""
+        entry = cache.get(self.key)
+        if entry is not None and entry['version'] == self.version and self.now < entry['expires']:
+            return _build_response(entry, 'HIT')
+
+        # Only one request re-renders a stale page; the rest get the old copy
+        self.locked = cache.add(self.lock_key, 1, PAGE_CACHE_STALE)
+        if entry is not None and not self.locked:
+            return _build_response(entry, 'STALE')
+        return None
+
+    def store(self, response):
+        if response.status_code != 200 or response.cookies:
+            return
+        if response.streaming:
+            # Saved once the last chunk has been rendered and sent; the lock
+            # is held until then so no other request renders it meanwhile
+            links = recorded_links()
+            self.pending = True
+            observe_stream(
+                response, lambda body: self._save(body, response['Content-Type'], links),
+                self._release_streamed, keep_body=True,
+            )
+        else:
+            self._save(response.content, response['Content-Type'], recorded_links())
+        response['X-Page-Cache'] = 'MISS'
+        patch_public_cache_headers(response)
+
+    def _save(self, content, content_type, links):
+        cache.set(self.key, {
+            'content': content,
+            'content_type': content_type,
+            'preload': list(links),
+            'version': self.version,
+            'expires': self.now + PAGE_CACHE_TIMEOUT,
+        }, PAGE_CACHE_TIMEOUT + PAGE_CACHE_STALE)
+
+    def release(self):
+        if self.locked and not self.pending:
+            cache.delete(self.lock_key)
+
+    def _release_streamed(self):
+        self.pending = False
+        self.release()
+
+
+def _begin_lookup(request):
+    lookup = _PageLookup(request)
+    return lookup, lookup.cached_response()
+
+
+def cache_public_page(view_func):
+    """Serve a view (sync or async) from the page cache for anonymous visitors"""
+    if asyncio.iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            if not is_cacheable_request(request):
+                return await view_func(request, *args, **kwargs)
+
+            lookup, cached = await sync_to_async(_begin_lookup)(request)
+            if cached is not None:
+                return cached
+            try:
+                response = await view_func(request, *args, **kwargs)
+                await sync_to_async(lookup.store)(response)
+            finally:
+                await sync_to_async(lookup.release)()
+            return response
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not is_cacheable_request(request):
+            return view_func(request, *args, **kwargs)
+
+        lookup, cached = _begin_lookup(request)
+        if cached is not None:
+            return cached
+        try:
+            response = view_func(request, *args, **kwargs)
+            lookup.store(response)
+        finally:
+            lookup.release()
+        return response
+    return wrapper
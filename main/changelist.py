@@ -0,0 +1,182 @@
+"""
+Admin changelists that stay fast on tables with millions of rows.
+
+The stock changelist runs COUNT(*) twice per page, pages with OFFSET,
+searches with LIKE '%term%' and builds date_hierarchy links with SELECT
+DISTINCT over the whole table. HighVolumeAdminMixin swaps each of those
+for something that reads only a small part of the table:
+- pages are keyset pages on (-created_date, id), linked newer/older
+- counts come from a per-day summary table kept up to date by triggers,
+  or are capped at `count_limit` when a search or another filter applies
+- searches match an FTS5 table, with prefix indexes, as a subquery
+- DateBucketFilter drills down years -> months -> days using the same
+  summary table, and filters on an indexed created_date range
+
+The summary and search tables are created by the model's migration
+(see main/migrations/0008_contact_admin_indexes.py for Contact).
+"""
+import re
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .pagination import encode_cursor, keyset_page, keyset_page_before
+from .search import build_match_query
+
+AFTER_VAR = 'after'
+BEFORE_VAR = 'before'
+
+_BUCKET = re.compile(r'^\d{4}(-\d{2}(-\d{2})?)?$')
+
+
+def bucket_totals(table, length, start=None, end=None):
+    """[(bucket, rows)] newest first, where a bucket is the first `length`
+    characters of a YYYY-MM-DD day, within [start, end)"""
+    sql = f'SELECT substr(day, 1, %s), SUM(total) FROM {table} WHERE total > 0'
+    params = [length]
+    if start is not None:
+        sql += ' AND day >= %s AND day < %s'
+        params += [start.isoformat(), end.isoformat()]
+    with connection.cursor() as cursor:
+        cursor.execute(sql + ' GROUP BY 1 ORDER BY 1 DESC', params)
+        return cursor.fetchall()
+
+
+def bucket_range(bucket):
+    """[start, end) dates covered by a YYYY, YYYY-MM or YYYY-MM-DD bucket"""
+    parts = [int(part) for part in bucket.split('-')]
+    if len(parts) == 1:
+        return date(parts[0], 1, 1), date(parts[0] + 1, 1, 1)
+    if len(parts) == 2:
+        year, month = parts
+        start = date(year, month, 1)
+        return start, date(year + month // 12, month % 12 + 1, 1)
+    start = date(*parts)
+    return start, start + timedelta(days=1)
+
+
+def _midnight(day):
+    # Buckets are UTC days, as date() computes them in the triggers
+    return datetime(day.year, day.month, day.day, tzinfo=dt_timezone.utc)
+
+
+def _bucket_label(bucket, rows):
+    start, _ = bucket_range(bucket)
+    label = {4: '%Y', 7: '%B %Y', 10: '%d %b %Y'}[len(bucket)]
+    return f'{start.strftime(label)} ({rows:,})'
+
+
+class DateBucketFilter(admin.SimpleListFilter):
+    """Year/month/day navigation read from the model admin's bucket table"""
+    title = 'date'
+    parameter_name = 'bucket'
+
+    def value(self):
+        value = super().value()
+        try:
+            if value and _BUCKET.match(value) and bucket_range(value):
+                return value
+        except ValueError:
+            pass
+        return None
+
+    def lookups(self, request, model_admin):
+        value = self.value()
+        table = model_admin.bucket_table
+        if value is None:
+            return [(year, _bucket_label(year, rows)) for year, rows in bucket_totals(table, 4)]
+        # Months of the selected year, or days of the selected month, with
+        # a way back up to the enclosing period
+        parent = value[:4] if len(value) == 4 else value[:7]
+        child_length = 7 if len(value) == 4 else 10
+        up = [(value[:4], f'All of {value[:4]}')] if len(value) > 4 else []
+        return up + [
+            (bucket, _bucket_label(bucket, rows))
+            for bucket, rows in bucket_totals(table, child_length, *bucket_range(parent))
+        ]
+
+    def date_range(self):
+        value = self.value()
+        return bucket_range(value) if value else (None, None)
+
+    def queryset(self, request, queryset):
+        start, end = self.date_range()
+        if start is None:
+            return queryset
+        return queryset.filter(created_date__gte=_midnight(start), created_date__lt=_midnight(end))
+
+
+class KeysetChangeList(ChangeList):
+    """A changelist paged by created_date cursors instead of page numbers"""
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(AFTER_VAR, None)
+        lookup_params.pop(BEFORE_VAR, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # Changing a filter or the search starts again from the newest row
+        return super().get_query_string(new_params, [AFTER_VAR, BEFORE_VAR, *(remove or [])])
+
+    def get_results(self, request):
+        before = request.GET.get(BEFORE_VAR)
+        if before:
+            items, has_newer = keyset_page_before(self.queryset, before, self.list_per_page)
+            has_older = True
+        else:
+            after = request.GET.get(AFTER_VAR)
+            items, next_cursor = keyset_page(self.queryset, after, self.list_per_page)
+            has_newer, has_older = bool(after), next_cursor is not None
+
+        self.result_count, self.count_is_capped = self.model_admin.changelist_count(self)
+        self.show_full_result_count = self.model_admin.show_full_result_count
+        self.full_result_count = self.model_admin.total_count() if self.show_full_result_count else None
+        self.show_admin_actions = True
+        self.result_list = items
+        self.can_show_all = False
+        self.multi_page = has_newer or has_older
+        self.paginator = None
+        self.newer_url = self.get_query_string({BEFORE_VAR: encode_cursor(items[0])}) if has_newer and items else None
+        self.older_url = self.get_query_string({AFTER_VAR: encode_cursor(items[-1])}) if has_older and items else None
+
+
+class HighVolumeAdminMixin:
+    """
+    ModelAdmin mode for large, append-mostly tables ordered by created_date.
+    Put DateBucketFilter in list_filter; list_editable is not supported.
+    """
+    search_table = None
+    bucket_table = None
+    count_limit = 1000
+    sortable_by = ()
+    change_list_template = 'admin/keyset_change_list.html'
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        match = build_match_query(search_term)
+        if not match:
+            return queryset, False
+        matches = RawSQL(f'SELECT rowid FROM {self.search_table} WHERE {self.search_table} MATCH %s', [match])
+        return queryset.filter(pk__in=matches), False
+
+    def total_count(self):
+        return sum(rows for _, rows in bucket_totals(self.bucket_table, 4))
+
+    def changelist_count(self, changelist):
+        """(count, capped) for the rows the changelist is showing"""
+        buckets = [spec for spec in changelist.filter_specs if isinstance(spec, DateBucketFilter)]
+        other_filters = set(changelist.get_filters_params()) - {spec.parameter_name for spec in buckets}
+        if not changelist.query and not other_filters:
+            start, end = buckets[0].date_range() if buckets else (None, None)
+            if start is None:
+                return self.total_count(), False
+            return sum(rows for _, rows in bucket_totals(self.bucket_table, 10, start, end)), False
+        # Stop counting once past what anyone would page through
+        count = changelist.queryset.order_by()[:self.count_limit + 1].count()
+        return min(count, self.count_limit), count > self.count_limit
@@ -0,0 +1,197 @@
+"""
+Portable bundles of portfolio content for the export_content and
+import_content commands.
+
+A bundle is a tar stream holding content.ndjson, one serialized row per
+line in Django's jsonl format, followed by the uploaded project images
+those rows reference under media/. Both directions stream: rows are read
+with .iterator() and written through a temporary file, and on import
+every line is deserialized, batched and upserted on its own. Memory use
+therefore stays flat however large the tables are.
+
+With `since`, only rows changed at or after that time are exported or
+imported, which makes a bundle an incremental sync. Deletions are not
+carried over.
+"""
+import io
+import shutil
+import tarfile
+import tempfile
+from pathlib import Path, PurePosixPath
+
+from django.conf import settings
+from django.core import serializers
+from django.db import reset_queries, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .bulk import explicit_dates, link_technologies
+from .cache import clear_pages
+from .images import build_derivatives, derivative_dir
+from .local_cache import invalidate_projects
+from .models import Contact, Education, Experience, Project, Skill
+from .search import reindex_objects
+from .snapshots import rebuild_snapshots
+from .versioning import bump_content_version
+
+BUNDLE_MODELS = [Project, Skill, Experience, Education, Contact]
+
+CONTENT_MEMBER = 'content.ndjson'
+MEDIA_PREFIX = 'media/'
+# Only uploads (Project.image's upload_to) travel with a bundle
+MEDIA_DIRECTORY = 'projects/'
+
+SEARCHABLE_MODELS = (Project, Experience, Education)
+
+
+def changed_field(model):
+    """The field an incremental export or import compares with `since`"""
+    return 'created_date' if model is Contact else 'updated_at'
+
+
+def parse_since(value):
+    """ISO timestamp from --since; naive values are in the site's time zone"""
+    if value is None:
+        return None
+    since = parse_datetime(value) or parse_datetime(f'{value}T00:00')
+    if since is None:
+        raise ValueError(f'Expected an ISO date or datetime, got {value!r}')
+    return since if timezone.is_aware(since) else timezone.make_aware(since)
+
+
+def _serialized_fields(model):
+    # tech_stack pks differ between databases; it is rebuilt from `technologies`
+    return [field.name for field in model._meta.concrete_fields if not field.primary_key]
+
+
+def export_content(fileobj, models=BUNDLE_MODELS, since=None, chunk_size=2000, media=True):
+    """Write a bundle to a binary file object; return row counts by model label"""
+    counts = {}
+    images = set()
+    with tempfile.TemporaryFile() as rows:
+        text = io.TextIOWrapper(rows, encoding='utf-8', newline='\n')
+        for model in models:
+            queryset = model.objects.order_by('pk')
+            if since is not None:
+                queryset = queryset.filter(**{f'{changed_field(model)}__gte': since})
+            counts[model._meta.label] = 0
+
+            def tracked(objects, label=model._meta.label):
+                for obj in objects:
+                    counts[label] += 1
+                    image = getattr(obj, 'image', None)
+                    if media and image and image.name.startswith(MEDIA_DIRECTORY):
+                        images.add(image.name)
+                    yield obj
+
+            serializers.serialize(
+                'jsonl', tracked(queryset.iterator(chunk_size=chunk_size)),
+                fields=_serialized_fields(model), stream=text,
+            )
+        text.flush()
+        size = rows.tell()
+        rows.seek(0)
+
+        with tarfile.open(fileobj=fileobj, mode='w|gz') as bundle:
+            member = tarfile.TarInfo(CONTENT_MEMBER)
+            member.size = size
+            bundle.addfile(member, rows)
+            counts['media'] = 0
+            for name in sorted(images):
+                path = Path(settings.MEDIA_ROOT, name)
+                if path.is_file():
+                    bundle.add(path, arcname=MEDIA_PREFIX + name, recursive=False)
+                    counts['media'] += 1
+        text.detach()
+    return counts
+
+
+class _Loader:
+    """Upsert deserialized rows in batches of one model at a time"""
+
+    def __init__(self, since, batch_size):
+        self.since = since
+        self.batch_size = batch_size
+        self.batch = []
+        self.counts = {}
+        self.skipped = 0
+
+    def add(self, obj):
+        model = type(obj)
+        if model not in BUNDLE_MODELS:
+            raise ValueError(f'{model._meta.label} rows cannot be imported')
+        if self.since is not None and getattr(obj, changed_field(model)) < self.since:
+            self.skipped += 1
+            return
+        if self.batch and type(self.batch[0]) is not model:
+            self.flush()
+        self.batch.append(obj)
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.batch:
+            return
+        model = type(self.batch[0])
+        with explicit_dates(model), transaction.atomic():
+            model.objects.bulk_create(
+                self.batch,
+                update_conflicts=True,
+                unique_fields=['id'],
+                update_fields=_serialized_fields(model),
+            )
+            if model is Project:
+                link_technologies(self.batch, replace=True)
+                invalidate_projects(*[obj.pk for obj in self.batch])
+            if model in SEARCHABLE_MODELS:
+                reindex_objects(self.batch)
+        label = model._meta.label
+        self.counts[label] = self.counts.get(label, 0) + len(self.batch)
+        self.batch = []
+        # With DEBUG on, the query log would keep every batch's parameters
+        reset_queries()
+
+
+def _media_path(member_name):
+    """MEDIA_ROOT-relative name for a bundled file, or None if it is unsafe"""
+    name = PurePosixPath(member_name.removeprefix(MEDIA_PREFIX))
+    if name.is_absolute() or '..' in name.parts or not str(name).startswith(MEDIA_DIRECTORY):
+        return None
+    return str(name)
+
+
+def import_content(fileobj, since=None, batch_size=2000):
+    """Load a bundle from a binary file object; return counts by model label"""
+    loader = _Loader(since, batch_size)
+    images = 0
+    with tarfile.open(fileobj=fileobj, mode='r|*') as bundle:
+        for member in bundle:
+            if member.name == CONTENT_MEMBER:
+                # A stream-mode member isn't seekable, so no TextIOWrapper
+                lines = (line.decode('utf-8') for line in bundle.extractfile(member))
+                for deserialized in serializers.deserialize('jsonl', lines, ignorenonexistent=True):
+                    loader.add(deserialized.object)
+                loader.flush()
+            elif member.isfile() and member.name.startswith(MEDIA_PREFIX):
+                name = _media_path(member.name)
+                if name is None:
+                    continue
+                _extract_image(bundle.extractfile(member), name)
+                images += 1
+
+    bump_content_version()
+    rebuild_snapshots()
+    # Bumping the version of every imported project's page would cost far more
+    clear_pages()
+    return {**loader.counts, 'skipped': loader.skipped, 'media': images}
+
+
+def _extract_image(source, name):
+    path = Path(settings.MEDIA_ROOT, name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(path.name + '.part')
+    with open(partial, 'wb') as target:
+        shutil.copyfileobj(source, target)
+    partial.replace(path)
+    relative_dir = derivative_dir(name)
+    build_derivatives(path, Path(settings.MEDIA_ROOT, relative_dir), relative_dir)
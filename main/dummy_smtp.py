@@ -0,0 +1,76 @@
+"""
+Minimal in-process SMTP server that accepts and records every message.
+
+Stands in for a real mail server when exercising the outbox locally or in
+tests; nothing is relayed anywhere. Run it with `manage.py dummy_smtp`, or
+start one in a test:
+
+    server = DummySMTPServer(('127.0.0.1', 0))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    ...
+    server.messages  # [(mail_from, [rcpt_to, ...], raw_bytes), ...]
+"""
+import socketserver
+import threading
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        self.reply('220 dummy-smtp ready')
+        mail_from, rcpt_to = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors='replace').strip()
+            verb = command[:4].upper()
+
+            if verb in ('HELO', 'EHLO'):
+                self.reply('250 dummy-smtp')
+            elif verb == 'MAIL':
+                mail_from, rcpt_to = command.partition(':')[2].strip(' <>'), []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                rcpt_to.append(command.partition(':')[2].strip(' <>'))
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                for data_line in self.rfile:
+                    if data_line in (b'.\r\n', b'.\n'):
+                        break
+                    data.append(data_line[1:] if data_line.startswith(b'..') else data_line)
+                self.server.record(mail_from, rcpt_to, b''.join(data))
+                mail_from, rcpt_to = None, []
+                self.reply('250 OK: queued')
+            elif verb == 'RSET':
+                mail_from, rcpt_to = None, []
+                self.reply('250 OK')
+            elif verb == 'NOOP':
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class DummySMTPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address, on_message=None):
+        super().__init__(address, SMTPHandler)
+        self.messages = []
+        self.on_message = on_message
+        self._lock = threading.Lock()
+
+    def record(self, mail_from, rcpt_to, data):
+        with self._lock:
+            self.messages.append((mail_from, rcpt_to, data))
+        if self.on_message:
+            self.on_message(mail_from, rcpt_to, data)
@@ -0,0 +1,192 @@
+"""
+Resized derivatives of uploaded project images, and optimized copies of
+the images in static/.
+
+Each upload is re-encoded at a few fixed widths in every format this Pillow
+build can write, in a background process pool so the admin request is not
+held up. A small JSON manifest next to the derivatives lists what was
+produced; the `responsive_image` template tag reads it to build srcsets.
+
+Static JPEG/PNG files are recompressed during collectstatic (see
+main/storage.py) and get WebP/AVIF siblings, cached by content hash so an
+unchanged image is only ever encoded once.
+"""
+import hashlib
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+import PIL
+from PIL import Image, ImageOps
+
+DERIVATIVE_WIDTHS = getattr(settings, 'IMAGE_DERIVATIVE_WIDTHS', [320, 640, 960, 1280])
+
+# Format name -> (extension, mime type, save options), best compression first
+DERIVATIVE_FORMATS = {
+    'AVIF': ('avif', 'image/avif', {'quality': 55}),
+    'WEBP': ('webp', 'image/webp', {'quality': 75, 'method': 6}),
+    'JPEG': ('jpg', 'image/jpeg', {'quality': 80, 'optimize': True, 'progressive': True}),
+}
+
+_pool = None
+
+
+def available_formats():
+    """Derivative formats this Pillow build is able to encode"""
+    Image.init()
+    return [fmt for fmt in DERIVATIVE_FORMATS if fmt in Image.SAVE]
+
+
+def derivative_dir(name):
+    """Storage-relative directory holding the derivatives of an image"""
+    stem = Path(name)
+    return str(stem.parent / 'derived' / stem.stem)
+
+
+def manifest_name(name):
+    return derivative_dir(name) + '/manifest.json'
+
+
+def build_derivatives(source_path, output_dir, relative_dir):
+    """Write every derivative of one image and its manifest; runs in a worker"""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    with Image.open(source_path) as original:
+        original = ImageOps.exif_transpose(original)
+        widths = [width for width in DERIVATIVE_WIDTHS if width < original.width]
+        if original.width <= max(DERIVATIVE_WIDTHS):
+            widths.append(original.width)
+
+        manifest = {}
+        for fmt in available_formats():
+            extension, mime_type, options = DERIVATIVE_FORMATS[fmt]
+            variants = []
+            for width in widths:
+                height = round(original.height * width / original.width)
+                resized = original.resize((width, height), Image.LANCZOS)
+                if fmt == 'JPEG' and resized.mode != 'RGB':
+                    resized = resized.convert('RGB')
+                filename = f'{width}w.{extension}'
+                tmp = output_dir / (filename + '.tmp')
+                resized.save(tmp, fmt, **options)
+                os.replace(tmp, output_dir / filename)
+                variants.append([width, f'{relative_dir}/{filename}'])
+            manifest[mime_type] = variants
+
+    tmp = output_dir / 'manifest.json.tmp'
+    tmp.write_text(json.dumps(manifest))
+    os.replace(tmp, output_dir / 'manifest.json')
+    return str(output_dir)
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=getattr(settings, 'IMAGE_DERIVATIVE_WORKERS', 2))
+    return _pool
+
+
+def schedule_derivatives(image_field):
+    """Queue derivative generation for a saved ImageField file"""
+    relative_dir = derivative_dir(image_field.name)
+    return _get_pool().submit(
+        build_derivatives,
+        image_field.path,
+        os.path.join(settings.MEDIA_ROOT, relative_dir),
+        relative_dir,
+    )
+
+
+def load_manifest(name):
+    """Derivatives available for an uploaded image's file name, or None if not built yet"""
+    path = os.path.join(settings.MEDIA_ROOT, manifest_name(name))
+    try:
+        with open(path) as manifest:
+            return json.load(manifest)
+    except (OSError, ValueError):
+        return None
+
+
+STATIC_IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+STATIC_IMAGE_CACHE = getattr(settings, 'STATIC_IMAGE_CACHE', settings.BASE_DIR / '.image-cache')
+
+# Recompression of the original format: keep the JPEG quantisation tables
+# (no further quality loss), only optimise the entropy coding and drop metadata
+RECOMPRESS_OPTIONS = {
+    'JPEG': {'quality': 'keep', 'optimize': True, 'progressive': True},
+    'PNG': {'optimize': True},
+}
+
+ORIENTATION_TAG = 0x0112
+
+
+def _encoder_fingerprint():
+    # Part of the cache key, so new encoder settings re-encode everything
+    return json.dumps([PIL.__version__, DERIVATIVE_FORMATS, RECOMPRESS_OPTIONS, available_formats()]).encode()
+
+
+def _encode(image, fmt, options):
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+
+def optimize_static_image(source_path, cache_dir=STATIC_IMAGE_CACHE):
+    """
+    Smaller encodings of one static image, as {suffix: cached file path}.
+
+    The '' suffix is the recompressed original; 'webp' and 'avif' are
+    siblings. Only encodings smaller than the original are kept.
+    Runs in a worker process.
+    """
+    data = Path(source_path).read_bytes()
+    key = hashlib.sha256(_encoder_fingerprint() + data).hexdigest()
+    cache_dir = Path(cache_dir)
+    index = cache_dir / f'{key}.json'
+    try:
+        return json.loads(index.read_text())
+    except (OSError, ValueError):
+        pass
+
+    encoded = {}
+    with Image.open(io.BytesIO(data)) as original:
+        fmt = original.format
+        smallest = len(data)
+        if fmt in RECOMPRESS_OPTIONS:
+            options = dict(RECOMPRESS_OPTIONS[fmt])
+            exif = original.getexif()
+            if exif.get(ORIENTATION_TAG, 1) != 1:
+                # Metadata is dropped, except the orientation browsers rely on
+                options['exif'] = exif
+            recompressed = _encode(original, fmt, options)
+            if len(recompressed) < smallest:
+                encoded[''] = recompressed
+                smallest = len(recompressed)
+
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or 'A' in image.mode else 'RGB')
+        for sibling_fmt in available_formats():
+            extension, _, options = DERIVATIVE_FORMATS[sibling_fmt]
+            if sibling_fmt == fmt or sibling_fmt in RECOMPRESS_OPTIONS:
+                continue
+            sibling = _encode(image, sibling_fmt, options)
+            if len(sibling) < smallest:
+                encoded[extension] = sibling
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    outputs = {}
+    for suffix, content in encoded.items():
+        path = cache_dir / f'{key}.{suffix or fmt.lower()}'
+        tmp = path.with_suffix('.tmp')
+        tmp.write_bytes(content)
+        os.replace(tmp, path)
+        outputs[suffix] = str(path)
+    tmp = index.with_suffix('.tmp')
+    tmp.write_text(json.dumps(outputs))
+    os.replace(tmp, index)
+    return outputs
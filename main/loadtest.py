@@ -0,0 +1,281 @@
+"""
+Small asyncio HTTP/1.1 load generator (stdlib only).
+
+Opens `concurrency` keep-alive connections and has each one issue requests
+back to back for a fixed duration, recording per-request latency. Used by
+the `compare_servers` and `benchmark` management commands.
+"""
+import asyncio
+import os
+import re
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from urllib.parse import urlencode
+
+
+@dataclass
+class Target:
+    name: str
+    path: str
+    method: str = 'GET'
+    form: dict = None
+    headers: dict = field(default_factory=dict)
+
+    def raw_request(self, host):
+        body = urlencode(self.form).encode() if self.form is not None else b''
+        headers = {'Host': host, 'Connection': 'keep-alive', **self.headers}
+        if self.form is not None:
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            headers['Content-Length'] = len(body)
+        lines = [f'{self.method} {self.path} HTTP/1.1'] + [f'{name}: {value}' for name, value in headers.items()]
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode() + body
+
+
+@dataclass
+class LoadResult:
+    latencies: list = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    errors: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def server_errors(self):
+        """Responses with a 5xx status, which `errors` (transport failures) leaves out"""
+        return sum(count for status, count in self.statuses.items() if status >= 500)
+
+    def summary(self):
+        """RPS and latency percentiles in milliseconds"""
+        ordered = sorted(self.latencies)
+
+        def percentile(p):
+            if not ordered:
+                return None
+            return round(ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] * 1000, 2)
+
+        return {
+            'requests': len(ordered),
+            'errors': self.errors,
+            'server_errors': self.server_errors,
+            'statuses': {str(status): count for status, count in sorted(self.statuses.items())},
+            'rps': round(len(ordered) / self.elapsed, 1) if self.elapsed else 0.0,
+            'mean_ms': round(statistics.fmean(ordered) * 1000, 2) if ordered else None,
+            'p50_ms': percentile(50),
+            'p95_ms': percentile(95),
+            'p99_ms': percentile(99),
+        }
+
+
+async def open_connection(host, port=None, unix_socket=None):
+    if unix_socket:
+        return await asyncio.open_unix_connection(unix_socket)
+    return await asyncio.open_connection(host, port)
+
+
+async def read_response(reader):
+    """Read one response; return (status, headers, body, keep_alive)"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('Connection closed by server')
+    status = int(status_line.split()[1])
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers.setdefault(name.strip().lower(), []).append(value.strip())
+
+    if 'content-length' in headers:
+        body = await reader.readexactly(int(headers['content-length'][0]))
+    elif 'chunked' in headers.get('transfer-encoding', [''])[0].lower():
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            if size == 0:
+                await reader.readline()
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+        body = b''.join(chunks)
+    elif status in (204, 304):
+        body = b''
+    else:
+        body = await reader.read()
+        return status, headers, body, False
+
+    keep_alive = headers.get('connection', [''])[0].lower() != 'close'
+    return status, headers, body, keep_alive
+
+
+async def fetch(host, port, path, unix_socket=None, headers=None):
+    """Single GET, used to prime CSRF tokens and wait for servers to boot"""
+    reader, writer = await open_connection(host, port, unix_socket)
+    try:
+        target = Target(name=path, path=path, headers={**(headers or {}), 'Connection': 'close'})
+        writer.write(target.raw_request(host))
+        await writer.drain()
+        return await read_response(reader)
+    finally:
+        writer.close()
+
+
+async def csrf_credentials(host, port, path, unix_socket=None):
+    """Fetch a form and return (csrf cookie header, form token)"""
+    status, headers, body, _ = await fetch(host, port, path, unix_socket)
+    cookie = next((value.split(';')[0] for value in headers.get('set-cookie', [])
+                   if value.startswith('csrftoken=')), '')
+    match = re.search(rb'name="csrfmiddlewaretoken" value="([^"]+)"', body)
+    if not cookie or not match:
+        # Every POST would then be a 403
+        raise RuntimeError(f'No CSRF cookie and token in {path} (status {status})')
+    return cookie, match.group(1).decode()
+
+
+async def _connection_loop(host, port, unix_socket, request, deadline, result):
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await open_connection(host, port, unix_socket)
+            started = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status, _, _, keep_alive = await read_response(reader)
+            result.latencies.append(time.perf_counter() - started)
+            result.statuses[status] += 1
+            if not keep_alive:
+                writer.close()
+                writer = None
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError):
+            result.errors += 1
+            if writer is not None:
+                writer.close()
+            writer = None
+            await asyncio.sleep(0.01)
+    if writer is not None:
+        writer.close()
+
+
+async def run_load(host, port, target, concurrency, duration, unix_socket=None):
+    """Drive `target` from `concurrency` connections for `duration` seconds"""
+    result = LoadResult()
+    request = target.raw_request(host)
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(
+        _connection_loop(host, port, unix_socket, request, deadline, result)
+        for _ in range(concurrency)
+    ))
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+class ServerProcess:
+    """Run gunicorn on a local port for the duration of a `with` block"""
+
+    def __init__(self, app, port, worker_class='sync', workers=1, threads=1, env=None, host='127.0.0.1',
+                 chdir=None, config=None):
+        self.app = app
+        self.config = config
+        self.chdir = chdir or os.getcwd()
+        self.host = host
+        self.port = port
+        self.worker_class = worker_class
+        self.workers = workers
+        self.threads = threads
+        self.env = env or {}
+        self.process = None
+
+    def __enter__(self):
+        command = [
+            sys.executable, '-m', 'gunicorn', self.app,
+            '--chdir', str(self.chdir),
+            '--bind', f'{self.host}:{self.port}',
+            '--workers', str(self.workers),
+            '--worker-class', self.worker_class,
+            '--threads', str(self.threads),
+            '--log-level', 'warning',
+        ]
+        if self.config:
+            command += ['--config', str(self.config)]
+        # Start outside the project root so gunicorn doesn't load the
+        # production gunicorn.conf.py from there unless asked to
+        self.process = subprocess.Popen(command, cwd=tempfile.gettempdir(), env={**os.environ, **self.env})
+        self._wait_until_ready()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.process.send_signal(signal.SIGTERM)
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+    def _wait_until_ready(self, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f'gunicorn exited with code {self.process.returncode}')
+            try:
+                asyncio.run(fetch(self.host, self.port, '/'))
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise RuntimeError('gunicorn did not start in time')
+
+    def memory_rss_kb(self):
+        """Total resident memory of the master and its workers (Linux only)"""
+        total = 0
+        for pid in [self.process.pid, *_child_pids(self.process.pid)]:
+            try:
+                with open(f'/proc/{pid}/status') as status:
+                    for line in status:
+                        if line.startswith('VmRSS:'):
+                            total += int(line.split()[1])
+            except OSError:
+                pass
+        return total or None
+
+    def memory_breakdown(self):
+        """RSS, PSS and USS in kB of the master and each worker (Linux only)"""
+        processes = [('master', self.process.pid)]
+        processes += [('worker', pid) for pid in _child_pids(self.process.pid)]
+        breakdown = []
+        for role, pid in processes:
+            usage = _smaps_rollup(pid)
+            if usage:
+                breakdown.append({'role': role, 'pid': pid, **usage})
+        return breakdown
+
+
+def _smaps_rollup(pid):
+    fields = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as rollup:
+            for line in rollup:
+                name, _, value = line.partition(':')
+                if value.strip().endswith('kB'):
+                    fields[name] = int(value.split()[0])
+    except OSError:
+        return None
+    # USS: pages private to this process, i.e. freed if it exits
+    return {
+        'rss_kb': fields.get('Rss', 0),
+        'pss_kb': fields.get('Pss', 0),
+        'uss_kb': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+    }
+
+
+def _child_pids(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as children:
+            return [int(child) for child in children.read().split()]
+    except OSError:
+        return []
@@ -0,0 +1,115 @@
+"""
+Per-worker LRU of project detail data, invalidated across processes
+through a shared memory-mapped file of generation counters.
+
+The file holds GENERATION_SLOTS 64-bit counters and a project maps to
+slot pk % GENERATION_SLOTS. Saving a project bumps its slot once the
+transaction commits. Each cached entry remembers the slot value read
+before the database was queried, so a hit costs one dict lookup plus one
+integer read from the mapping. An entry whose slot has moved on since
+then is dropped and fetched again. Nothing goes over the network, and
+every process that maps the file sees a bump as soon as it is written:
+gunicorn workers, the admin and management commands alike.
+"""
+import fcntl
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+
+GENERATION_SLOTS = 4096
+_COUNTER = struct.Struct('<Q')
+
+
+class GenerationFile:
+    def __init__(self, path, slots=GENERATION_SLOTS):
+        self.path = path
+        self.slots = slots
+        self._mapping = None
+        self._fd = None
+
+    def _map(self):
+        if self._mapping is None:
+            size = self.slots * _COUNTER.size
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self._fd, self._mapping = fd, mmap.mmap(fd, size)
+        return self._mapping
+
+    def _offset(self, key):
+        return (key % self.slots) * _COUNTER.size
+
+    def read(self, key):
+        return _COUNTER.unpack_from(self._map(), self._offset(key))[0]
+
+    def bump(self, *keys):
+        mapping = self._map()
+        # Serialise writers, so two processes can't both write n + 1
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            for offset in {self._offset(key) for key in keys}:
+                _COUNTER.pack_into(mapping, offset, _COUNTER.unpack_from(mapping, offset)[0] + 1)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def bump_all(self):
+        self.bump(*range(self.slots))
+
+
+class LocalLRU:
+    """Bounded LRU whose entries expire when their generation slot moves"""
+
+    def __init__(self, generations, max_entries):
+        self.generations = generations
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def generation(self, key):
+        """Read before loading a value, and pass to set() with it"""
+        return self.generations.read(key)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        generation, value = entry
+        if generation != self.generations.read(key):
+            self._entries.pop(key, None)
+            return None
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, generation, value):
+        with self._lock:
+            self._entries[key] = (generation, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+project_cache = LocalLRU(
+    GenerationFile(str(getattr(settings, 'PROJECT_CACHE_GENERATIONS', settings.BASE_DIR / 'project-generations.bin'))),
+    getattr(settings, 'PROJECT_CACHE_SIZE', 512),
+)
+
+
+def invalidate_projects(*pks):
+    """Expire the cached projects in every worker once the change commits"""
+    # Bumping earlier would let a worker re-cache the old row at the new generation
+    transaction.on_commit(lambda: project_cache.generations.bump(*pks))
+
+
+def invalidate_all_projects():
+    transaction.on_commit(project_cache.generations.bump_all)
@@ -0,0 +1,159 @@
+"""
+Throughput and latency benchmark for every public route.
+
+Boots gunicorn with production settings (DEBUG off, freshly collected
+static files) against a migrated and seeded SQLite database, so the
+numbers don't depend on whatever is in db.sqlite3. It then drives each route
+with the stdlib load generator in main/loadtest.py at one or more
+concurrency levels, and saves RPS and p50/p95/p99 latency per route as
+JSON for comparing builds and worker classes.
+"""
+import asyncio
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from main.loadtest import ServerProcess, Target, csrf_credentials, run_load
+
+WORKER_CLASSES = {
+    'sync': ('portfolio.wsgi:application', 'sync', {'ASYNC_VIEWS': 'false'}),
+    'gthread': ('portfolio.wsgi:application', 'gthread', {'ASYNC_VIEWS': 'false'}),
+    'uvicorn': ('portfolio.asgi:application', 'uvicorn.workers.UvicornWorker', {'ASYNC_VIEWS': 'true'}),
+}
+
+ROUTES = ['home', 'about', 'projects', 'project_detail', 'contact']
+
+
+class Command(BaseCommand):
+    help = 'Load-test every route against a seeded database and save per-route RPS and latency percentiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--routes', nargs='+', choices=ROUTES, default=ROUTES)
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 10, 50],
+                            help='Concurrent keep-alive connections to test at')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per measurement')
+        parser.add_argument('--warmup', type=float, default=1.0, help='Unmeasured seconds before each run')
+        parser.add_argument('--worker-class', choices=sorted(WORKER_CLASSES), default='sync')
+        parser.add_argument('--workers', type=int, default=(os.cpu_count() or 1) * 2 + 1)
+        parser.add_argument('--threads', type=int, default=2)
+        parser.add_argument('--port', type=int, default=8766)
+        parser.add_argument('--database', help='Benchmark against this SQLite file instead of a seeded copy')
+        parser.add_argument('--with-rate-limit', action='store_true',
+                            help='Keep contact form throttling on (most POSTs will then get 429)')
+        parser.add_argument('--output', help='JSON results file (default: benchmark-<timestamp>.json)')
+
+    def handle(self, *args, **options):
+        started_at = datetime.now(timezone.utc)
+        with tempfile.TemporaryDirectory(prefix='portfolio-bench-') as workdir:
+            env = {
+                'DATABASE_PATH': options['database'] or os.path.join(workdir, 'bench.sqlite3'),
+                'CACHE_LOCATION': os.path.join(workdir, 'cache'),
+                'RATE_LIMIT_DB': os.path.join(workdir, 'ratelimit.sqlite3'),
+                'RATE_LIMIT_ENABLED': 'true' if options['with_rate_limit'] else 'false',
+                'STATIC_ROOT': os.path.join(workdir, 'staticfiles'),
+                'DEBUG': 'False',
+            }
+            self.stdout.write('Collecting static files...')
+            self._manage(env, 'collectstatic', '--noinput', '-v0')
+            if not options['database']:
+                self.stdout.write('Seeding benchmark database...')
+                self._manage(env, 'migrate', '--noinput', '-v0')
+                self._run(env, [sys.executable, os.path.join(settings.BASE_DIR, 'populate_sample_data.py')])
+
+            app, worker_class, app_env = WORKER_CLASSES[options['worker_class']]
+            env.update(app_env)
+            self.stdout.write(f"Starting gunicorn ({options['worker_class']}, {options['workers']} workers)...")
+            with ServerProcess(app, options['port'], worker_class, options['workers'], options['threads'],
+                               env, chdir=settings.BASE_DIR) as server:
+                targets = self._targets(server, env['DATABASE_PATH'], options['routes'])
+                results = []
+                for target in targets:
+                    for concurrency in options['concurrency']:
+                        if options['warmup']:
+                            asyncio.run(run_load(server.host, server.port, target, concurrency, options['warmup']))
+                        outcome = asyncio.run(run_load(
+                            server.host, server.port, target, concurrency, options['duration']
+                        ))
+                        row = {'route': target.name, 'path': target.path, 'method': target.method,
+                               'concurrency': concurrency, **outcome.summary()}
+                        results.append(row)
+                        self.stdout.write(self._format(row))
+                rss_kb = server.memory_rss_kb()
+
+        report = {
+            'started_at': started_at.isoformat(),
+            'git_revision': self._git_revision(),
+            'python': platform.python_version(),
+            'cpu_count': os.cpu_count(),
+            'worker_class': options['worker_class'],
+            'workers': options['workers'],
+            'threads': options['threads'],
+            'duration': options['duration'],
+            'rate_limit': options['with_rate_limit'],
+            'server_rss_kb': rss_kb,
+            'results': results,
+        }
+        output = options['output'] or f"benchmark-{started_at.strftime('%Y%m%d-%H%M%S')}.json"
+        Path(output).write_text(json.dumps(report, indent=2))
+        self.stdout.write(self.style.SUCCESS(f'Results written to {output}'))
+
+    def _manage(self, env, *args):
+        self._run(env, [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), *args])
+
+    def _run(self, env, command):
+        # Run in a child process so the overridden settings take effect
+        completed = subprocess.run(command, env={**os.environ, **env}, cwd=settings.BASE_DIR, capture_output=True)
+        if completed.returncode:
+            raise CommandError(f'{" ".join(command)} failed:\n{completed.stderr.decode()}')
+
+    def _targets(self, server, database_path, routes):
+        with sqlite3.connect(database_path) as db:
+            row = db.execute('SELECT id FROM main_project ORDER BY id LIMIT 1').fetchone()
+
+        targets = []
+        for route in routes:
+            if route == 'project_detail':
+                if row is None:
+                    self.stderr.write('No projects in the database; skipping project_detail')
+                    continue
+                targets.append(Target('project_detail', f'/projects/{row[0]}/'))
+            elif route == 'contact':
+                # Public pages are cookie-free; the form fragment carries the token
+                try:
+                    cookie, token = asyncio.run(csrf_credentials(server.host, server.port, reverse('contact_form')))
+                except RuntimeError as exc:
+                    raise CommandError(str(exc))
+                targets.append(Target('contact', '/contact/', method='POST', headers={'Cookie': cookie}, form={
+                    'csrfmiddlewaretoken': token,
+                    'name': 'Load Test',
+                    'email': 'loadtest@example.com',
+                    'subject': 'Benchmark',
+                    'message': 'Benchmark message body.',
+                }))
+            else:
+                targets.append(Target(route, {'home': '/', 'about': '/about/', 'projects': '/projects/'}[route]))
+        return targets
+
+    def _git_revision(self):
+        try:
+            return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True,
+                                  text=True).stdout.strip() or None
+        except OSError:
+            return None
+
+    def _format(self, row):
+        return (
+            f"  {row['route']:<15} c={row['concurrency']:<4} {row['rps']:>8} req/s  "
+            f"p50 {row['p50_ms']} ms  p95 {row['p95_ms']} ms  p99 {row['p99_ms']} ms  "
+            f"errors {row['errors']}  5xx {row['server_errors']}  statuses {row['statuses']}"
+        )
@@ -0,0 +1,27 @@
+"""
+Generate resized derivatives for every existing Project.image upload.
+"""
+from concurrent.futures import as_completed
+
+from django.core.management.base import BaseCommand
+
+from main.images import schedule_derivatives
+from main.models import Project
+
+
+class Command(BaseCommand):
+    help = 'Build responsive WebP/AVIF/JPEG derivatives for all project images'
+
+    def handle(self, *args, **options):
+        futures = {}
+        for project in Project.objects.exclude(image='').exclude(image__isnull=True):
+            futures[schedule_derivatives(project.image)] = project
+
+        for future in as_completed(futures):
+            project = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                self.stderr.write(f'{project.image.name}: {e}')
+            else:
+                self.stdout.write(f'Built derivatives for {project.image.name}')
@@ -0,0 +1,186 @@
+"""
+Export the public site to pre-rendered HTML so nginx can serve it directly.
+
+Every route in main/urls.py is rendered into STATIC_SITE_ROOT as
+<path>/index.html. A manifest of content fingerprints is kept next to the
+output so repeat builds only re-render pages whose rows changed, or whose
+file was deleted when an edit invalidated the page (main/cache.py).
+
+Each page's Link: rel=preload header (main/preload.py) is written to an
+nginx map, so pages served from disk carry the same hints as Django's.
+"""
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+
+from main import urls as main_urls
+from main.cache import prerendered_path
+from main.models import Project, Skill, Experience, Education, Technology
+from main.preload import view_links
+from main.versioning import templates_digest
+
+MANIFEST_NAME = '.build-manifest.json'
+PRELOAD_NAME = '.preload-links.json'
+# Included by nginx.conf into `map $request_uri $preload_links`
+PRELOAD_MAP_NAME = '.preload-links.map'
+
+# Routes that handle POSTs or aren't HTML pages, and must stay dynamic
+EXCLUDED_ROUTES = {'contact', 'contact_form', 'metrics', 'projects_json', 'search'}
+
+# Parameterised routes, mapped to the model and field whose rows they enumerate
+DETAIL_ROUTES = {
+    'project_detail': (Project, 'pk'),
+    'technology_projects': (Technology, 'slug'),
+}
+
+
+def rows_digest(queryset):
+    """Stable fingerprint of every row in a queryset"""
+    digest = hashlib.sha1()
+    for row in queryset.order_by('pk').values_list():
+        digest.update(repr(row).encode())
+    return digest.hexdigest()
+
+
+def page_dependencies(name, key=None):
+    """Querysets whose rows a page's output depends on"""
+    if name == 'home':
+        return [Project.objects.filter(featured=True), Technology.objects.all(), Skill.objects.all(),
+                Experience.objects.all()]
+    if name == 'about':
+        return [Experience.objects.all(), Education.objects.all(), Skill.objects.all()]
+    if name == 'projects':
+        return [Project.objects.all(), Technology.objects.all()]
+    if name == 'project_detail':
+        return [Project.objects.filter(pk=key), Technology.objects.filter(projects=key)]
+    if name == 'technology_projects':
+        return [Technology.objects.filter(slug=key), Project.objects.filter(tech_stack__slug=key)]
+    # Unknown pages depend on everything
+    return [Project.objects.all(), Technology.objects.all(), Skill.objects.all(), Experience.objects.all(),
+            Education.objects.all()]
+
+
+def discover_pages():
+    """Yield (name, key, url) for every exportable route in main/urls.py"""
+    for pattern in main_urls.urlpatterns:
+        name = pattern.name
+        if not name or name in EXCLUDED_ROUTES:
+            continue
+        if name in DETAIL_ROUTES:
+            model, field = DETAIL_ROUTES[name]
+            for key in model.objects.values_list(field, flat=True):
+                yield name, key, reverse(name, kwargs={field: key})
+        elif not pattern.pattern.converters:
+            yield name, None, reverse(name)
+
+
+def _init_worker():
+    # Connections inherited from the parent must not be shared across forks
+    connections.close_all()
+
+
+def render_page(url, root):
+    """Render a single URL to disk; runs inside a worker process"""
+    response = Client().get(url)
+    if response.status_code != 200:
+        return url, response.status_code, None
+    target = prerendered_path(root, url)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_suffix('.tmp')
+    if response.streaming:
+        tmp.write_bytes(b''.join(response.streaming_content))
+    else:
+        tmp.write_bytes(response.content)
+    os.replace(tmp, target)
+    # A streamed page's headers went out before its first render recorded
+    # any links, which are only remembered once the body has been read
+    links = response.get('Link') or ', '.join(view_links(response.resolver_match.view_name)) or None
+    return url, response.status_code, links
+
+
+def write_preload_map(path, links):
+    lines = [f"'{url}' '{link}';\n" for url, link in sorted(links.items())]
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text(''.join(lines))
+    os.replace(tmp, path)
+
+
+class Command(BaseCommand):
+    help = 'Pre-render every public page to static HTML for nginx to serve directly'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=str(settings.STATIC_SITE_ROOT),
+                            help='Directory to write the rendered site to')
+        parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                            help='Number of rendering processes')
+        parser.add_argument('--force', action='store_true',
+                            help='Re-render every page, ignoring the build manifest')
+
+    def handle(self, *args, **options):
+        root = Path(options['output'])
+        root.mkdir(parents=True, exist_ok=True)
+        manifest_path = root / MANIFEST_NAME
+
+        preload_path = root / PRELOAD_NAME
+        previous = {}
+        preloads = {}
+        if manifest_path.exists() and not options['force']:
+            previous = json.loads(manifest_path.read_text())
+            if preload_path.exists():
+                preloads = json.loads(preload_path.read_text())
+
+        shared = templates_digest()
+        current = {}
+        stale = []
+        for name, key, url in discover_pages():
+            digest = hashlib.sha1(shared.encode())
+            for queryset in page_dependencies(name, key):
+                digest.update(rows_digest(queryset).encode())
+            current[url] = digest.hexdigest()
+            if previous.get(url) != current[url] or not prerendered_path(root, url).exists():
+                stale.append(url)
+
+        # Drop pages whose rows were deleted since the last build
+        for url in set(previous) - set(current):
+            target = prerendered_path(root, url)
+            target.unlink(missing_ok=True)
+            if target.parent != root and not any(target.parent.iterdir()):
+                target.parent.rmdir()
+
+        total = len(current)
+        failed = set()
+        if stale:
+            connections.close_all()
+            if options['jobs'] > 1 and len(stale) > 1:
+                with ProcessPoolExecutor(max_workers=options['jobs'], initializer=_init_worker) as pool:
+                    results = list(pool.map(render_page, stale, [root] * len(stale)))
+            else:
+                results = [render_page(url, root) for url in stale]
+            for url, status, links in results:
+                if status != 200:
+                    failed.add(url)
+                    self.stderr.write(f'{url}: HTTP {status}')
+                elif links:
+                    preloads[url] = links
+                else:
+                    preloads.pop(url, None)
+
+        for url in failed:
+            current.pop(url, None)
+        preloads = {url: links for url, links in preloads.items() if url in current}
+        manifest_path.write_text(json.dumps(current, indent=2, sort_keys=True))
+        preload_path.write_text(json.dumps(preloads, indent=2, sort_keys=True))
+        write_preload_map(root / PRELOAD_MAP_NAME, preloads)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {len(stale) - len(failed)} of {total} pages into {root} '
+            f'({total - len(stale)} unchanged)'
+        ))
@@ -0,0 +1,76 @@
+"""
+Side-by-side load benchmark of the WSGI (sync workers) and ASGI (uvicorn
+workers, async views) deployments against the current database.
+"""
+import asyncio
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from main.loadtest import ServerProcess, Target, run_load
+
+# (label, app, worker class, extra environment)
+MODES = [
+    ('wsgi-sync', 'portfolio.wsgi:application', 'sync', {'ASYNC_VIEWS': 'false'}),
+    ('asgi-uvicorn', 'portfolio.asgi:application', 'uvicorn.workers.UvicornWorker', {'ASYNC_VIEWS': 'true'}),
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark sync WSGI workers against uvicorn ASGI workers on the same routes'
+
+    def add_arguments(self, parser):
+        cpus = os.cpu_count() or 1
+        parser.add_argument('--paths', nargs='+', default=['/', '/projects/', '/about/'])
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[10, 100],
+                            help='Concurrent keep-alive connections to test at')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per measurement')
+        parser.add_argument('--wsgi-workers', type=int, default=cpus * 2 + 1,
+                            help='Sync workers, as in gunicorn.conf.py')
+        parser.add_argument('--asgi-workers', type=int, default=cpus,
+                            help='Uvicorn workers, as in gunicorn_asgi.conf.py')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--output', help='Write the results to this JSON file')
+
+    def handle(self, *args, **options):
+        results = []
+        for label, app, worker_class, env in MODES:
+            workers = options['wsgi_workers'] if worker_class == 'sync' else options['asgi_workers']
+            threads = 2 if worker_class == 'sync' else 1
+            self.stdout.write(f'Starting {label} ({workers} workers)...')
+            with ServerProcess(app, options['port'], worker_class, workers, threads, env,
+                               chdir=settings.BASE_DIR) as server:
+                for path in options['paths']:
+                    for concurrency in options['concurrency']:
+                        target = Target(name=path, path=path)
+                        outcome = asyncio.run(run_load(
+                            server.host, server.port, target, concurrency, options['duration']
+                        ))
+                        row = {
+                            'mode': label,
+                            'workers': workers,
+                            'path': path,
+                            'concurrency': concurrency,
+                            **outcome.summary(),
+                        }
+                        results.append(row)
+                        self.stdout.write(self._format(row))
+                rss = server.memory_rss_kb()
+                for row in results:
+                    if row['mode'] == label:
+                        row['rss_kb'] = rss
+                self.stdout.write(f'{label}: total RSS {rss} kB')
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Results written to {options["output"]}'))
+
+    def _format(self, row):
+        return (
+            f"  {row['path']:<20} c={row['concurrency']:<4} {row['rps']:>8} req/s  "
+            f"p50 {row['p50_ms']} ms  p95 {row['p95_ms']} ms  p99 {row['p99_ms']} ms  "
+            f"errors {row['errors']}  5xx {row['server_errors']}  statuses {row['statuses']}"
+        )
@@ -0,0 +1,28 @@
+"""
+Run a local SMTP sink that prints every message it receives.
+"""
+from django.core.management.base import BaseCommand
+
+from main.dummy_smtp import DummySMTPServer
+
+
+class Command(BaseCommand):
+    help = 'Accept SMTP on a local port and print messages instead of delivering them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=1025)
+
+    def handle(self, *args, **options):
+        def show(mail_from, rcpt_to, data):
+            self.stdout.write(f'--- From {mail_from} to {", ".join(rcpt_to)}')
+            self.stdout.write(data.decode(errors='replace'))
+
+        server = DummySMTPServer((options['host'], options['port']), on_message=show)
+        self.stdout.write(f'Dummy SMTP server listening on {options["host"]}:{options["port"]}')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,42 @@
+"""
+Stream portfolio content and its project images into a bundle that
+import_content can load elsewhere (see main/content_bundle.py).
+"""
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main.content_bundle import BUNDLE_MODELS, export_content, parse_since
+
+
+class Command(BaseCommand):
+    help = 'Export projects, skills, experience, education and contacts as an NDJSON bundle (.tar.gz)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="Bundle file to write, or '-' for stdout")
+        parser.add_argument('--since', help='Only rows changed at or after this ISO date/time')
+        parser.add_argument('--models', nargs='+', choices=[model._meta.model_name for model in BUNDLE_MODELS],
+                            help='Limit the export to these models')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows fetched per query')
+        parser.add_argument('--no-media', action='store_false', dest='media', help="Don't bundle project images")
+
+    def handle(self, *args, **options):
+        try:
+            since = parse_since(options['since'])
+        except ValueError as e:
+            raise CommandError(f'--since: {e}')
+        models = [model for model in BUNDLE_MODELS
+                  if not options['models'] or model._meta.model_name in options['models']]
+        kwargs = {
+            'models': models,
+            'since': since,
+            'chunk_size': options['chunk_size'],
+            'media': options['media'],
+        }
+        if options['output'] == '-':
+            counts = export_content(sys.stdout.buffer, **kwargs)
+        else:
+            with open(options['output'], 'wb') as output:
+                counts = export_content(output, **kwargs)
+        # stdout may be the bundle itself
+        self.stderr.write(', '.join(f'{label}: {count}' for label, count in counts.items()))
@@ -0,0 +1,219 @@
+"""
+Load a large, realistic and reproducible dataset for scale testing.
+
+Rows are generated from a seeded RNG and inserted with bulk_create, one
+transaction per batch. bulk_create sends no signals, so the work
+main/signals.py would do per row is done here in bulk instead:
+- technologies and project links inserted directly (main/bulk.py)
+- new rows added to the search index with one statement per batch
+- pages, page snapshots and the content version refreshed once at the end
+
+Run it against a throwaway database, e.g.
+DATABASE_PATH=/tmp/scale.sqlite3 python manage.py generate_dataset --projects 200000
+"""
+import random
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.urls import reverse
+
+from main.bulk import explicit_dates, link_technologies
+from main.cache import invalidate_pages
+from main.images import build_derivatives, derivative_dir
+from main.models import Contact, Project, Skill, Technology
+from main.placeholders import PALETTE, draw_placeholder
+from main.search import index_new_objects
+from main.signals import technology_paths
+from main.snapshots import rebuild_snapshots
+from main.versioning import bump_content_version
+
+# Roughly by popularity; earlier entries are picked far more often
+TECHNOLOGIES = [
+    'Python', 'JavaScript', 'Django', 'React', 'PostgreSQL', 'TypeScript', 'Docker', 'Redis', 'HTML5', 'CSS3',
+    'Node.js', 'AWS', 'Bootstrap', 'Flask', 'Vue.js', 'SQLite', 'Celery', 'GraphQL', 'Tailwind CSS', 'MongoDB',
+    'Kubernetes', 'Go', 'Rust', 'FastAPI', 'Next.js', 'C++', 'C#', '.NET', 'Java', 'Spring Boot', 'Kotlin',
+    'Swift', 'Elasticsearch', 'RabbitMQ', 'Terraform', 'Nginx', 'Pandas', 'TensorFlow', 'Stripe API', 'WebSockets',
+]
+ADJECTIVES = [
+    'Realtime', 'Distributed', 'Minimal', 'Scalable', 'Offline-first', 'Serverless', 'Collaborative', 'Secure',
+    'Lightweight', 'Open-source', 'Automated', 'Mobile', 'Interactive', 'Headless', 'Multi-tenant',
+]
+DOMAINS = [
+    'Inventory', 'Weather', 'Recipe', 'Fitness', 'Budget', 'Chat', 'Event', 'Library', 'Travel', 'Music',
+    'Invoice', 'Learning', 'Booking', 'Analytics', 'Health', 'Property', 'Job Board', 'News', 'Photo', 'Task',
+]
+NOUNS = ['Platform', 'Dashboard', 'API', 'App', 'Tracker', 'Service', 'Toolkit', 'Portal', 'Engine', 'Bot']
+FEATURES = [
+    'user authentication and role-based permissions', 'full-text search with filters', 'a REST API with token auth',
+    'background jobs for slow work', 'real-time notifications over WebSockets', 'an admin dashboard',
+    'payment processing', 'CSV and PDF exports', 'responsive layouts for mobile and desktop', 'caching of hot pages',
+    'automated tests and CI', 'containerised deployment', 'rate limiting', 'image uploads with thumbnails',
+    'internationalisation', 'audit logging', 'offline support', 'charts and reports',
+]
+SKILL_CATEGORIES = ['Programming', 'Framework', 'Database', 'Tool', 'Cloud', 'Frontend']
+FIRST_NAMES = [
+    'Ada', 'Chidi', 'Emeka', 'Fatima', 'Grace', 'Hiro', 'Ines', 'Jonas', 'Kemi', 'Lena', 'Mateo', 'Ngozi',
+    'Omar', 'Priya', 'Quinn', 'Rosa', 'Sade', 'Tunde', 'Uma', 'Victor', 'Wen', 'Yusuf', 'Zara',
+]
+LAST_NAMES = [
+    'Adeyemi', 'Bauer', 'Chen', 'Diaz', 'Eze', 'Fischer', 'Garcia', 'Haddad', 'Ibrahim', 'Jensen', 'Kim',
+    'Lopez', 'Mensah', 'Nakamura', 'Okafor', 'Petrov', 'Rossi', 'Singh', 'Tanaka', 'Usman', 'Wright',
+]
+SUBJECTS = [
+    'Project inquiry', 'Job opportunity', 'Collaboration', 'Question about your API', 'Freelance work',
+    'Speaking invitation', 'Feedback on your portfolio', 'Bug report', 'Consulting request', 'Hello',
+]
+EMAIL_DOMAINS = ['example.com', 'example.org', 'example.net', 'mail.example.com']
+
+# All generated dates fall in this window, independent of when it runs
+EPOCH = datetime(2021, 1, 1, tzinfo=dt_timezone.utc)
+SPAN = timedelta(days=3 * 365)
+
+IMAGE_POOL_SIZE = 24
+
+
+class Command(BaseCommand):
+    help = 'Bulk-load seeded synthetic projects, skills and contact messages for scale testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=0)
+        parser.add_argument('--skills', type=int, default=0)
+        parser.add_argument('--contacts', type=int, default=0)
+        parser.add_argument('--seed', type=int, default=1, help='Same seed, same data')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per transaction')
+        parser.add_argument('--image-ratio', type=float, default=0.3,
+                            help='Share of projects given an uploaded image (from a small generated pool)')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.tech_weights = [1 / rank for rank in range(1, len(TECHNOLOGIES) + 1)]
+
+        if options['projects']:
+            self._timed('projects', options['projects'], self.load_projects,
+                        options['projects'], options['image_ratio'])
+        if options['skills']:
+            self._timed('skills', options['skills'], self.load_skills, options['skills'])
+        if options['contacts']:
+            self._timed('contacts', options['contacts'], self.load_contacts, options['contacts'])
+
+        if options['projects'] or options['skills']:
+            # Once, instead of the per-row signal handlers
+            bump_content_version()
+            rebuild_snapshots()
+            invalidate_pages(
+                reverse('home'), reverse('about'), reverse('projects'), reverse('projects_json'),
+                *technology_paths(Technology.objects.values_list('slug', flat=True)),
+            )
+
+    def _timed(self, label, count, loader, *args):
+        started = time.perf_counter()
+        loader(*args)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{count} {label} in {elapsed:.1f}s ({count / elapsed:,.0f} rows/s)'
+        ))
+
+    def _batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield start, min(self.batch_size, total - start)
+
+    def _date(self):
+        return EPOCH + timedelta(seconds=self.rng.randrange(int(SPAN.total_seconds())))
+
+    def load_projects(self, total, image_ratio):
+        images = self._image_pool() if image_ratio > 0 else []
+        with explicit_dates(Project):
+            for start, size in self._batches(total):
+                projects = [self._project(index, images, image_ratio) for index in range(start, start + size)]
+                with transaction.atomic():
+                    Project.objects.bulk_create(projects)
+                    link_technologies(projects)
+                    index_new_objects(projects)
+
+    def _project(self, index, images, image_ratio):
+        rng = self.rng
+        technologies = self._pick_technologies()
+        title = f'{rng.choice(ADJECTIVES)} {rng.choice(DOMAINS)} {rng.choice(NOUNS)}'
+        features = rng.sample(FEATURES, rng.randint(3, 6))
+        description = (
+            f'{title} built with {", ".join(technologies[:-1]) or technologies[0]}'
+            f'{" and " + technologies[-1] if len(technologies) > 1 else ""}.\n\n'
+            'Key Features:\n' + '\n'.join(f'• {feature[0].upper()}{feature[1:]}' for feature in features)
+        )
+        slug = title.lower().replace(' ', '-')
+        created = self._date()
+        return Project(
+            title=title,
+            description=description,
+            technologies=', '.join(technologies),
+            github_url=f'https://github.com/example/{slug}-{index}',
+            live_url=f'https://{slug}-{index}.example.com' if rng.random() < 0.6 else None,
+            featured=rng.random() < 0.02,
+            image=rng.choice(images) if images and rng.random() < image_ratio else None,
+            created_date=created,
+            updated_at=created,
+        )
+
+    def _pick_technologies(self):
+        count = self.rng.randint(2, 7)
+        names = []
+        while len(names) < count:
+            name = self.rng.choices(TECHNOLOGIES, self.tech_weights)[0]
+            if name not in names:
+                names.append(name)
+        return names
+
+    def _image_pool(self):
+        """A few generated project images with derivatives, shared by many rows"""
+        names = []
+        for number in range(IMAGE_POOL_SIZE):
+            name = f'projects/dataset/project-{number}.jpg'
+            path = Path(settings.MEDIA_ROOT, name)
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                image = draw_placeholder(1280, 853, f'Project {number}', bg_color=PALETTE[number % len(PALETTE)],
+                                         text_color='white', font_size=96)
+                image.save(path, 'JPEG', quality=85)
+                relative_dir = derivative_dir(name)
+                build_derivatives(path, Path(settings.MEDIA_ROOT, relative_dir), relative_dir)
+            names.append(name)
+        return names
+
+    def load_skills(self, total):
+        with explicit_dates(Skill):
+            for start, size in self._batches(total):
+                skills = [
+                    Skill(
+                        name=self.rng.choices(TECHNOLOGIES, self.tech_weights)[0],
+                        proficiency=self.rng.randint(40, 100),
+                        category=self.rng.choice(SKILL_CATEGORIES),
+                        updated_at=self._date(),
+                    )
+                    for _ in range(size)
+                ]
+                with transaction.atomic():
+                    Skill.objects.bulk_create(skills)
+
+    def load_contacts(self, total):
+        with explicit_dates(Contact):
+            for start, size in self._batches(total):
+                contacts = []
+                for index in range(start, start + size):
+                    first, last = self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+                    subject = self.rng.choice(SUBJECTS)
+                    contacts.append(Contact(
+                        name=f'{first} {last}',
+                        email=f'{first}.{last}{index}@{self.rng.choice(EMAIL_DOMAINS)}'.lower(),
+                        subject=subject,
+                        message=f'Hi, I came across your portfolio. {subject}: '
+                                f'{self.rng.choice(FEATURES)} in {self.rng.choice(TECHNOLOGIES)}. '
+                                'Could we set up a call next week?',
+                        created_date=self._date(),
+                    ))
+                with transaction.atomic():
+                    Contact.objects.bulk_create(contacts)
@@ -0,0 +1,32 @@
+"""
+Load a bundle written by export_content, upserting rows by primary key.
+"""
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main.content_bundle import import_content, parse_since
+
+
+class Command(BaseCommand):
+    help = 'Import an NDJSON content bundle from export_content, updating rows that already exist'
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help="Bundle file to read, or '-' for stdin")
+        parser.add_argument('--since', help='Skip rows last changed before this ISO date/time')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows upserted per transaction')
+
+    def handle(self, *args, **options):
+        try:
+            since = parse_since(options['since'])
+        except ValueError as e:
+            raise CommandError(f'--since: {e}')
+        kwargs = {'since': since, 'batch_size': options['batch_size']}
+        if options['input'] == '-':
+            counts = import_content(sys.stdin.buffer, **kwargs)
+        else:
+            with open(options['input'], 'rb') as bundle:
+                counts = import_content(bundle, **kwargs)
+        self.stdout.write(self.style.SUCCESS(
+            ', '.join(f'{label}: {count}' for label, count in counts.items())
+        ))
@@ -0,0 +1,105 @@
+"""
+Per-worker memory of gunicorn with and without the pre-fork warm-up.
+
+Boots the sync workers twice against the current database: once the old
+way (each worker imports Django and compiles templates by itself) and
+once with preload_app and main/warmup.py. Each time it measures RSS, PSS
+and USS per process after boot and again after every worker has served
+the main pages. USS is what each extra worker really costs. PSS splits
+shared pages fairly between processes, so its total is the real memory
+footprint.
+"""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from main.loadtest import ServerProcess, Target, fetch, run_load
+
+# Same preload settings as gunicorn.conf.py, without its paths and sockets
+PRELOAD_CONFIG = '''
+preload_app = True
+
+
+def when_ready(server):
+    from main.warmup import prepare_for_fork
+    server.log.info("Warm-up before fork: %s", prepare_for_fork())
+'''
+
+
+class Command(BaseCommand):
+    help = 'Compare per-worker USS/PSS of gunicorn with and without preload and warm-up'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=(os.cpu_count() or 1) * 2 + 1)
+        parser.add_argument('--paths', nargs='+', default=['/', '/about/', '/projects/', '/contact/', '/search/?q=a'])
+        parser.add_argument('--port', type=int, default=8767)
+        parser.add_argument('--output', help='Write the results to this JSON file')
+
+    def handle(self, *args, **options):
+        report = {}
+        with tempfile.TemporaryDirectory(prefix='portfolio-memory-') as workdir:
+            config_path = os.path.join(workdir, 'preload.conf.py')
+            with open(config_path, 'w') as config:
+                config.write(PRELOAD_CONFIG)
+            static_root = os.path.join(workdir, 'staticfiles')
+            self.stdout.write('Collecting static files...')
+            self._collectstatic(static_root)
+
+            for label, config in (('lazy', None), ('preloaded', config_path)):
+                # A private page cache, so every worker really renders
+                env = {
+                    'CACHE_LOCATION': os.path.join(workdir, f'cache-{label}'),
+                    'STATIC_ROOT': static_root,
+                    'DEBUG': 'False',
+                }
+                with ServerProcess('portfolio.wsgi:application', options['port'], 'sync', options['workers'],
+                                   1, env, chdir=settings.BASE_DIR, config=config) as server:
+                    booted = server.memory_breakdown()
+                    first_hits = [self._timed_fetch(server, path) for path in options['paths']]
+                    for path in options['paths']:
+                        asyncio.run(run_load(server.host, server.port, Target(path, path), options['workers'], 0.5))
+                    served = server.memory_breakdown()
+                report[label] = {'after_boot': booted, 'after_requests': served, 'first_hit_ms': first_hits}
+                self._print(label, booted, served, first_hits)
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Results written to {options["output"]}'))
+
+    def _collectstatic(self, static_root):
+        completed = subprocess.run(
+            [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'collectstatic', '--noinput', '-v0'],
+            env={**os.environ, 'STATIC_ROOT': static_root}, cwd=settings.BASE_DIR, capture_output=True,
+        )
+        if completed.returncode:
+            raise CommandError(f'collectstatic failed:\n{completed.stderr.decode()}')
+
+    def _timed_fetch(self, server, path):
+        started = time.perf_counter()
+        asyncio.run(fetch(server.host, server.port, path))
+        return {'path': path, 'ms': round((time.perf_counter() - started) * 1000, 1)}
+
+    def _print(self, label, booted, served, first_hits):
+        self.stdout.write(self.style.MIGRATE_HEADING(label))
+        for stage, rows in (('after boot', booted), ('after requests', served)):
+            workers = [row for row in rows if row['role'] == 'worker']
+            self.stdout.write(f'  {stage}:')
+            for row in rows:
+                self.stdout.write(
+                    f"    {row['role']:<7} {row['pid']:>7}  RSS {row['rss_kb']:>7} kB  "
+                    f"PSS {row['pss_kb']:>7} kB  USS {row['uss_kb']:>7} kB"
+                )
+            if workers:
+                self.stdout.write(
+                    f"    mean worker USS {sum(r['uss_kb'] for r in workers) // len(workers)} kB, "
+                    f"total PSS {sum(r['pss_kb'] for r in rows)} kB"
+                )
+        self.stdout.write('  first hits: ' + ', '.join(f"{hit['path']} {hit['ms']} ms" for hit in first_hits))
@@ -0,0 +1,17 @@
+"""
+Show how much traffic the admission control has accepted and shed.
+"""
+from django.core.management.base import BaseCommand
+
+from main.ratelimit import counters
+
+
+class Command(BaseCommand):
+    help = 'Print token-bucket admission counters shared by all workers'
+
+    def handle(self, *args, **options):
+        stats = counters()
+        if not stats:
+            self.stdout.write('No rate-limited requests recorded yet')
+        for name, value in stats.items():
+            self.stdout.write(f'{name}: {value}')
@@ -0,0 +1,14 @@
+"""
+Rebuild the full-text search index from the content tables.
+"""
+from django.core.management.base import BaseCommand
+
+from main.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Re-index all projects, experience and education for /search/'
+
+    def handle(self, *args, **options):
+        rebuild_index()
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt'))
@@ -0,0 +1,33 @@
+"""
+Deliver queued email from the outbox table.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from main.outbox import OUTBOX_MAX_ATTEMPTS, deliver_due
+
+
+class Command(BaseCommand):
+    help = 'Send queued outbox email in batches over one SMTP connection, retrying with backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Deliver whatever is due and exit instead of polling')
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Maximum messages sent per SMTP connection')
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='Seconds to wait between polls when the outbox is empty')
+        parser.add_argument('--max-attempts', type=int, default=OUTBOX_MAX_ATTEMPTS,
+                            help='Give up on a message after this many failed tries')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = deliver_due(options['batch_size'], options['max_attempts'])
+            if sent or failed:
+                self.stdout.write(f'Sent {sent}, failed {failed}')
+            # Keep draining while full batches are coming back
+            if sent + failed < options['batch_size']:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
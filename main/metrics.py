@@ -0,0 +1,315 @@
+"""
+Per-request performance instrumentation.
+
+MetricsMiddleware sits outermost in MIDDLEWARE and records, for every
+request, the number of SQL queries, the time spent in the database, the
+time spent rendering templates and the total time. The numbers go back to
+the client in a Server-Timing header and are folded into histograms.
+Streamed pages are observed once their body has been sent, and render
+their body after the headers are gone, so they get no Server-Timing.
+
+Each worker process keeps its histograms in memory and writes a snapshot
+to METRICS_DIR/<pid>.json at most once per METRICS_FLUSH_INTERVAL. The
+/metrics view sums the snapshots of every worker, so Prometheus sees one
+set of series whichever worker answers the scrape. Snapshots of exited
+workers are kept so counters never go backwards; the gunicorn configs
+empty the directory when the master starts.
+"""
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+from django.utils.decorators import sync_and_async_middleware
+
+from .ratelimit import client_ip
+from .streaming import observe_stream
+
+METRICS_DIR = Path(getattr(settings, 'METRICS_DIR', settings.BASE_DIR / 'metrics'))
+METRICS_FLUSH_INTERVAL = getattr(settings, 'METRICS_FLUSH_INTERVAL', 1.0)
+METRICS_ALLOWED_IPS = getattr(settings, 'METRICS_ALLOWED_IPS', ['127.0.0.1', '::1'])
+SERVER_TIMING = getattr(settings, 'SERVER_TIMING', True)
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# name: (help, buckets)
+HISTOGRAMS = {
+    'portfolio_request_duration_seconds': ('Total time spent handling the request', SECONDS_BUCKETS),
+    'portfolio_request_db_seconds': ('Time spent executing SQL', SECONDS_BUCKETS),
+    'portfolio_request_template_seconds': ('Time spent rendering templates', SECONDS_BUCKETS),
+    'portfolio_request_queries': ('SQL queries executed', QUERY_BUCKETS),
+}
+REQUESTS_TOTAL = 'portfolio_requests_total'
+
+_timing = ContextVar('request_timing', default=None)
+
+
+class RequestTiming:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+
+    def server_timing(self, total):
+        return (
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries", '
+            f'tpl;dur={self.template_time * 1000:.2f}, '
+            f'total;dur={total * 1000:.2f}'
+        )
+
+
+def record_query(execute, sql, params, many, context):
+    timing = _timing.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.db_time += time.perf_counter() - started
+        timing.queries += 1
+
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    """Time every query on every connection; a no-op outside a request"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timing = _timing.get()
+        if timing is None:
+            return super().render(context, request)
+        # Queries run lazily from the template are counted here as well as in db
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timing.template_time += time.perf_counter() - started
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """The standard Django template backend, with render time recorded"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+class _Registry:
+    """Histograms and counters of this worker process"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.histograms = {}
+        self.counters = {}
+        self.flushed_at = 0.0
+
+    def observe(self, view, method, status, timing, total):
+        observations = {
+            'portfolio_request_duration_seconds': total,
+            'portfolio_request_db_seconds': timing.db_time,
+            'portfolio_request_template_seconds': timing.template_time,
+            'portfolio_request_queries': timing.queries,
+        }
+        labels = (('view', view), ('method', method))
+        with self.lock:
+            if self.pid != os.getpid():
+                # Forked from a process that had already recorded requests
+                self._reset()
+            for name, value in observations.items():
+                buckets = HISTOGRAMS[name][1]
+                histogram = self.histograms.setdefault((name, labels), {
+                    'buckets': [0] * len(buckets), 'sum': 0.0, 'count': 0,
+                })
+                for index, bound in enumerate(buckets):
+                    if value <= bound:
+                        histogram['buckets'][index] += 1
+                histogram['sum'] += value
+                histogram['count'] += 1
+            key = (REQUESTS_TOTAL, labels + (('status', str(status)),))
+            self.counters[key] = self.counters.get(key, 0) + 1
+
+            if time.monotonic() - self.flushed_at >= METRICS_FLUSH_INTERVAL:
+                self._flush()
+
+    def flush(self):
+        with self.lock:
+            if self.pid == os.getpid():
+                self._flush()
+
+    def _flush(self):
+        self.flushed_at = time.monotonic()
+        snapshot = {
+            'histograms': [[name, labels, data] for (name, labels), data in self.histograms.items()],
+            'counters': [[name, labels, value] for (name, labels), value in self.counters.items()],
+        }
+        try:
+            METRICS_DIR.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=METRICS_DIR, suffix='.tmp')
+            with os.fdopen(fd, 'w') as tmp:
+                json.dump(snapshot, tmp)
+            os.replace(tmp_path, METRICS_DIR / f'{self.pid}.json')
+        except OSError:
+            # Instrumentation must never fail a request
+            pass
+
+
+registry = _Registry()
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unresolved'
+
+
+def _timed_chunks(response, timing):
+    # Streamed chunks are rendered as they are pulled, bypassing TimedTemplate
+    content = response.streaming_content
+    if response.is_async:
+        async def timed():
+            chunks = aiter(content)
+            while True:
+                started = time.perf_counter()
+                try:
+                    chunk = await anext(chunks)
+                except StopAsyncIteration:
+                    return
+                timing.template_time += time.perf_counter() - started
+                yield chunk
+    else:
+        def timed():
+            chunks = iter(content)
+            while True:
+                started = time.perf_counter()
+                try:
+                    chunk = next(chunks)
+                except StopIteration:
+                    return
+                timing.template_time += time.perf_counter() - started
+                yield chunk
+    response.streaming_content = timed()
+
+
+def _finish(request, response, timing):
+    view, method, status = _view_name(request), request.method, response.status_code
+    if response.streaming:
+        _timed_chunks(response, timing)
+        observe_stream(response, lambda body: registry.observe(
+            view, method, status, timing, time.perf_counter() - timing.started,
+        ))
+        return
+    total = time.perf_counter() - timing.started
+    if SERVER_TIMING:
+        response['Server-Timing'] = timing.server_timing(total)
+    registry.observe(view, method, status, timing, total)
+
+
+@sync_and_async_middleware
+def MetricsMiddleware(get_response):
+    """Time the whole request; keep it first in MIDDLEWARE"""
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            timing = RequestTiming()
+            token = _timing.set(timing)
+            try:
+                response = await get_response(request)
+            finally:
+                _timing.reset(token)
+            _finish(request, response, timing)
+            return response
+    else:
+        def middleware(request):
+            timing = RequestTiming()
+            token = _timing.set(timing)
+            try:
+                response = get_response(request)
+            finally:
+                _timing.reset(token)
+            _finish(request, response, timing)
+            return response
+    return middleware
+
+
+def collect():
+    """Sum the snapshots of every worker into (histograms, counters)"""
+    histograms, counters = {}, {}
+    for path in sorted(METRICS_DIR.glob('*.json')):
+        try:
+            snapshot = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        for name, labels, data in snapshot['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            total = histograms.setdefault(key, {'buckets': [0] * len(data['buckets']), 'sum': 0.0, 'count': 0})
+            total['buckets'] = [a + b for a, b in zip(total['buckets'], data['buckets'])]
+            total['sum'] += data['sum']
+            total['count'] += data['count']
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+    return histograms, counters
+
+
+def _format_labels(labels):
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def render_metrics():
+    """Prometheus text exposition format (version 0.0.4)"""
+    histograms, counters = collect()
+    lines = []
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+        for (series, labels), data in sorted(histograms.items()):
+            if series != name:
+                continue
+            for bound, count in zip(buckets, data['buckets']):
+                lines.append(f'{name}_bucket{_format_labels(labels + (("le", repr(float(bound))),))} {count}')
+            lines.append(f'{name}_bucket{_format_labels(labels + (("le", "+Inf"),))} {data["count"]}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {data["sum"]!r}')
+            lines.append(f'{name}_count{_format_labels(labels)} {data["count"]}')
+
+    lines += [f'# HELP {REQUESTS_TOTAL} Requests handled, by view and status',
+              f'# TYPE {REQUESTS_TOTAL} counter']
+    for (_, labels), value in sorted(counters.items()):
+        lines.append(f'{REQUESTS_TOTAL}{_format_labels(labels)} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint, restricted to METRICS_ALLOWED_IPS"""
+    if client_ip(request) not in METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+    # Include this worker's latest requests even if not flushed yet
+    registry.flush()
+    response = HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+    response['Cache-Control'] = 'no-store'
+    return response
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.5 on 2026-10-18 14:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Technology',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('slug', models.SlugField(max_length=100, unique=True)),
+            ],
+            options={
+                'verbose_name_plural': 'technologies',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='tech_stack',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='projects', to='main.technology'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations
+from django.utils.text import slugify
+
+
+def populate_technologies(apps, schema_editor):
+    Project = apps.get_model('main', 'Project')
+    Technology = apps.get_model('main', 'Technology')
+
+    technologies = {}
+    for project in Project.objects.all():
+        stack = []
+        for name in project.technologies.split(','):
+            name = name.strip()
+            if not name:
+                continue
+            slug = slugify(name.replace('+', ' plus').replace('#', ' sharp'))
+            if slug not in technologies:
+                technologies[slug], _ = Technology.objects.get_or_create(slug=slug, defaults={'name': name})
+            stack.append(technologies[slug])
+        project.tech_stack.set(stack)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0002_technology'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_technologies, migrations.RunPython.noop),
+    ]
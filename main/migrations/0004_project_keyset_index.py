@@ -0,0 +1,21 @@
+# Generated by Django 4.2.5 on 2026-10-18 14:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0003_populate_technologies'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='project',
+            options={'ordering': ['-created_date', 'id']},
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['-created_date', 'id'], name='project_created_id_idx'),
+        ),
+    ]
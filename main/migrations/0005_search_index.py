@@ -0,0 +1,32 @@
+from django.db import migrations
+
+# rowid = pk * 3 + kind code, matching main.search.KIND_CODES
+CREATE_INDEX = """
+CREATE VIRTUAL TABLE main_searchindex USING fts5(
+    kind UNINDEXED,
+    object_id UNINDEXED,
+    title,
+    body,
+    tokenize = 'porter unicode61'
+);
+INSERT INTO main_searchindex (rowid, kind, object_id, title, body)
+    SELECT id * 3 + 1, 'project', id, title, description || char(10) || technologies
+    FROM main_project;
+INSERT INTO main_searchindex (rowid, kind, object_id, title, body)
+    SELECT id * 3 + 2, 'experience', id, position || ' at ' || company, description || char(10) || location
+    FROM main_experience;
+INSERT INTO main_searchindex (rowid, kind, object_id, title, body)
+    SELECT id * 3 + 3, 'education', id, degree || ' from ' || institution, field_of_study
+    FROM main_education;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0004_project_keyset_index'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_INDEX, 'DROP TABLE main_searchindex;'),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 4.2.5 on 2026-10-18 14:39
+
+from django.db import migrations, models
+
+# Both tables are kept in step by triggers rather than signals, so rows
+# written by bulk_create (generate_dataset, import_content) are covered too.
+# See main/changelist.py for how the Contact admin reads them.
+CREATE_SEARCH = [
+    """
+    CREATE VIRTUAL TABLE main_contactsearch USING fts5(
+        name,
+        email,
+        subject,
+        content = 'main_contact',
+        content_rowid = 'id',
+        prefix = '2 3',
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER main_contactsearch_insert AFTER INSERT ON main_contact BEGIN
+        INSERT INTO main_contactsearch (rowid, name, email, subject)
+            VALUES (new.id, new.name, new.email, new.subject);
+    END
+    """,
+    """
+    CREATE TRIGGER main_contactsearch_delete AFTER DELETE ON main_contact BEGIN
+        INSERT INTO main_contactsearch (main_contactsearch, rowid, name, email, subject)
+            VALUES ('delete', old.id, old.name, old.email, old.subject);
+    END
+    """,
+    """
+    CREATE TRIGGER main_contactsearch_update AFTER UPDATE OF name, email, subject ON main_contact BEGIN
+        INSERT INTO main_contactsearch (main_contactsearch, rowid, name, email, subject)
+            VALUES ('delete', old.id, old.name, old.email, old.subject);
+        INSERT INTO main_contactsearch (rowid, name, email, subject)
+            VALUES (new.id, new.name, new.email, new.subject);
+    END
+    """,
+    "INSERT INTO main_contactsearch (main_contactsearch) VALUES ('rebuild')",
+]
+
+DROP_SEARCH = [
+    'DROP TRIGGER main_contactsearch_insert',
+    'DROP TRIGGER main_contactsearch_delete',
+    'DROP TRIGGER main_contactsearch_update',
+    'DROP TABLE main_contactsearch',
+]
+
+# Messages per UTC day: the date navigation and the changelist counts
+# read a few hundred rows from here instead of scanning main_contact
+CREATE_BUCKETS = [
+    """
+    CREATE TABLE main_contactbucket (
+        day TEXT NOT NULL PRIMARY KEY,
+        total INTEGER NOT NULL
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TRIGGER main_contactbucket_insert AFTER INSERT ON main_contact BEGIN
+        INSERT INTO main_contactbucket (day, total) VALUES (date(new.created_date), 1)
+            ON CONFLICT (day) DO UPDATE SET total = total + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER main_contactbucket_delete AFTER DELETE ON main_contact BEGIN
+        UPDATE main_contactbucket SET total = total - 1 WHERE day = date(old.created_date);
+    END
+    """,
+    """
+    CREATE TRIGGER main_contactbucket_update AFTER UPDATE OF created_date ON main_contact
+    WHEN date(old.created_date) IS NOT date(new.created_date) BEGIN
+        UPDATE main_contactbucket SET total = total - 1 WHERE day = date(old.created_date);
+        INSERT INTO main_contactbucket (day, total) VALUES (date(new.created_date), 1)
+            ON CONFLICT (day) DO UPDATE SET total = total + 1;
+    END
+    """,
+    """
+    INSERT INTO main_contactbucket (day, total)
+        SELECT date(created_date), COUNT(*) FROM main_contact GROUP BY 1
+    """,
+]
+
+DROP_BUCKETS = [
+    'DROP TRIGGER main_contactbucket_insert',
+    'DROP TRIGGER main_contactbucket_delete',
+    'DROP TRIGGER main_contactbucket_update',
+    'DROP TABLE main_contactbucket',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0007_content_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['-created_date', 'id'], name='contact_created_id_idx'),
+        ),
+        migrations.RunSQL(CREATE_SEARCH, DROP_SEARCH),
+        migrations.RunSQL(CREATE_BUCKETS, DROP_BUCKETS),
+    ]
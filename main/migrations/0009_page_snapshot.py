@@ -0,0 +1,22 @@
+# Generated by Django 4.2.5 on 2026-10-18 14:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_contact_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PageSnapshot',
+            fields=[
+                ('page', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('schema', models.CharField(max_length=40)),
+                ('data', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
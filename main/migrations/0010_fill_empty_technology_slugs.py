@@ -0,0 +1,21 @@
+import hashlib
+
+from django.db import migrations
+
+
+def fill_empty_slugs(apps, schema_editor):
+    Technology = apps.get_model('main', 'Technology')
+    for technology in Technology.objects.filter(slug=''):
+        technology.slug = 'tech-' + hashlib.sha1(technology.name.encode()).hexdigest()[:8]
+        technology.save(update_fields=['slug'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0009_page_snapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_empty_slugs, migrations.RunPython.noop),
+    ]
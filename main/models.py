@@ -1,28 +1,79 @@
+import hashlib
+
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
+from django.utils.text import slugify
+
+
+def technology_slug(name):
+    """URL slug for a technology name, keeping C++ and C# distinct from C"""
+    # Names with nothing ASCII to slugify ("🐍") get a stable stand-in
+    return (slugify(name.replace('+', ' plus').replace('#', ' sharp'))
+            or 'tech-' + hashlib.sha1(name.encode()).hexdigest()[:8])
+
+
+class Technology(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+    slug = models.SlugField(max_length=100, unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['name']
+        verbose_name_plural = 'technologies'
+
+    def __str__(self):
+        return self.name
 
 class Project(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField()
     image = models.ImageField(upload_to='projects/', blank=True, null=True)
     technologies = models.CharField(max_length=300, help_text="Comma-separated list of technologies")
+    tech_stack = models.ManyToManyField(Technology, related_name='projects', blank=True, editable=False)
     github_url = models.URLField(blank=True, null=True)
     live_url = models.URLField(blank=True, null=True)
     created_date = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     featured = models.BooleanField(default=False)
 
     class Meta:
-        ordering = ['-created_date']
+        ordering = ['-created_date', 'id']
+        indexes = [
+            # Backs keyset pagination in main/pagination.py
+            models.Index(fields=['-created_date', 'id'], name='project_created_id_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def clean(self):
+        super().clean()
+        max_length = Technology._meta.get_field('name').max_length
+        for name in self.get_technologies_list():
+            if len(name) > max_length:
+                raise ValidationError({'technologies': f'"{name[:20]}…" is longer than {max_length} characters.'})
+            if not any(char.isalnum() for char in name):
+                raise ValidationError({'technologies': f'"{name}" has no letters or digits.'})
+
     def get_technologies_list(self):
         return [tech.strip() for tech in self.technologies.split(',') if tech.strip()]
 
+    def sync_technologies(self):
+        """Point tech_stack at the Technology rows named in `technologies`"""
+        stack = []
+        for name in self.get_technologies_list():
+            technology, _ = Technology.objects.get_or_create(
+                slug=technology_slug(name), defaults={'name': name}
+            )
+            stack.append(technology)
+        self.tech_stack.set(stack)
+
 class Skill(models.Model):
     name = models.CharField(max_length=100)
     proficiency = models.IntegerField(help_text="Proficiency level from 1-100")
     category = models.CharField(max_length=100, help_text="e.g., Programming, Framework, Tool")
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.name} ({self.proficiency}%)"
@@ -34,6 +85,7 @@ class Experience(models.Model):
     start_date = models.DateField()
     end_date = models.DateField(blank=True, null=True, help_text="Leave blank if current position")
     location = models.CharField(max_length=200, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-start_date']
@@ -48,6 +100,7 @@ class Education(models.Model):
     start_date = models.DateField()
     end_date = models.DateField(blank=True, null=True)
     gpa = models.DecimalField(max_digits=3, decimal_places=2, blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-start_date']
@@ -55,6 +108,22 @@ class Education(models.Model):
     def __str__(self):
         return f"{self.degree} from {self.institution}"
 
+class ContentVersion(models.Model):
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Content version {self.version}"
+
+class PageSnapshot(models.Model):
+    page = models.CharField(max_length=50, primary_key=True)
+    schema = models.CharField(max_length=40)
+    data = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Snapshot of {self.page}"
+
 class Contact(models.Model):
     name = models.CharField(max_length=100)
     email = models.EmailField()
@@ -64,6 +133,33 @@ class Contact(models.Model):
 
     class Meta:
         ordering = ['-created_date']
+        indexes = [
+            # Keyset paging of the admin changelist (main/changelist.py)
+            models.Index(fields=['-created_date', 'id'], name='contact_created_id_idx'),
+        ]
 
     def __str__(self):
         return f"Message from {self.name} - {self.subject}"
+
+class OutboxMessage(models.Model):
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipients = models.TextField(help_text="One address per line")
+    created_date = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True, default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['created_date']
+        indexes = [
+            models.Index(fields=['sent_at', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return self.subject
+
+    def get_recipient_list(self):
+        return [address for address in self.recipients.splitlines() if address.strip()]
@@ -0,0 +1,88 @@
+"""
+Durable outbox for outgoing email.
+
+Requests only INSERT an OutboxMessage, inside the same transaction as the
+data that triggered it; `manage.py run_outbox` delivers due messages in
+batches over a single SMTP connection, retrying failures with exponential
+backoff.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from .models import OutboxMessage
+
+OUTBOX_MAX_ATTEMPTS = getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 8)
+OUTBOX_BACKOFF_SECONDS = getattr(settings, 'OUTBOX_BACKOFF_SECONDS', 30)
+
+
+def queue_mail(subject, message, from_email, recipient_list):
+    """Queue an email for delivery by the outbox worker"""
+    return OutboxMessage.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email,
+        recipients='\n'.join(recipient_list),
+    )
+
+
+def backoff_delay(attempts):
+    """Delay before the next try: 30s, 1m, 2m, ... capped at six hours"""
+    return timedelta(seconds=min(OUTBOX_BACKOFF_SECONDS * 2 ** (attempts - 1), 6 * 60 * 60))
+
+
+def deliver_due(batch_size=100, max_attempts=OUTBOX_MAX_ATTEMPTS):
+    """Send up to `batch_size` due messages; return (sent, failed) counts"""
+    now = timezone.now()
+    batch = list(
+        OutboxMessage.objects.filter(sent_at__isnull=True, next_attempt_at__lte=now)
+        .order_by('next_attempt_at')[:batch_size]
+    )
+    if not batch:
+        return 0, 0
+
+    sent = failed = 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        # Server unreachable: every message in the batch counts as a failed try
+        for message in batch:
+            _record_failure(message, e, max_attempts)
+        return 0, len(batch)
+
+    try:
+        for message in batch:
+            email = EmailMessage(
+                subject=message.subject,
+                body=message.body,
+                from_email=message.from_email,
+                to=message.get_recipient_list(),
+                connection=connection,
+            )
+            try:
+                email.send(fail_silently=False)
+            except Exception as e:
+                _record_failure(message, e, max_attempts)
+                failed += 1
+            else:
+                message.sent_at = timezone.now()
+                message.attempts += 1
+                message.save(update_fields=['sent_at', 'attempts'])
+                sent += 1
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def _record_failure(message, error, max_attempts):
+    message.attempts += 1
+    message.last_error = str(error)
+    if message.attempts >= max_attempts:
+        # Give up; the message stays in the table for inspection in the admin
+        message.next_attempt_at = None
+    else:
+        message.next_attempt_at = timezone.now() + backoff_delay(message.attempts)
+    message.save(update_fields=['attempts', 'last_error', 'next_attempt_at'])
@@ -0,0 +1,221 @@
+"""
+Placeholder images drawn on demand for projects without an upload.
+
+/placeholder/<signature>/<w>x<h>/<text>.<fmt> renders the same kind of
+image create_placeholder_images.py used to pre-generate. The image is a
+pure function of its URL, so it is served with immutable cache headers.
+URLs are signed with SECRET_KEY by placeholder_url(), and only the sizes
+and formats the templates ask for are drawn, so a client can't make the
+server render or store images of its choosing. Each rendering is
+kept in a size-bounded directory that is evicted least recently used
+first: a hit refreshes the file's mtime. The directory's total size is
+kept in a counter file shared by every worker, and only a miss that
+pushes it over budget scans the directory and deletes the oldest files.
+
+draw_placeholder() doesn't touch Django settings, so the offline script
+imports it as well.
+"""
+import fcntl
+import hashlib
+import io
+import os
+import struct
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+from django.http import Http404, HttpResponse
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare
+from PIL import Image, ImageDraw, ImageFont
+
+FONT_PATHS = [
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf',
+    '/System/Library/Fonts/Arial.ttf',
+]
+
+# Background colours, picked by a hash of the text; the same as the
+# pre-generated project images
+PALETTE = ['#e74c3c', '#3498db', '#2ecc71', '#f39c12', '#9b59b6', '#1abc9c']
+
+# fmt in the URL -> (Pillow format, content type, save options)
+FORMATS = {
+    'jpg': ('JPEG', 'image/jpeg', {'quality': 85, 'optimize': True, 'progressive': True}),
+    'png': ('PNG', 'image/png', {'optimize': True}),
+    'webp': ('WEBP', 'image/webp', {'quality': 80}),
+}
+
+MAX_TEXT_LENGTH = 60
+
+# Evicting down to this share of the budget leaves room for the next misses
+EVICT_TO = 0.9
+SIZE_FILE = '.size'
+_SIZE = struct.Struct('<Q')
+
+
+def _font(size):
+    for path in FONT_PATHS:
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
+def draw_placeholder(width, height, text, bg_color='lightblue', text_color='darkblue', font_size=24):
+    """Image of the given size with `text` centred on a plain background"""
+    img = Image.new('RGB', (width, height), bg_color)
+    draw = ImageDraw.Draw(img)
+    font = _font(font_size)
+
+    bbox = draw.textbbox((0, 0), text, font=font)
+    text_width = bbox[2] - bbox[0]
+    text_height = bbox[3] - bbox[1]
+    x = (width - text_width) // 2
+    y = (height - text_height) // 2
+
+    draw.text((x, y), text, fill=text_color, font=font, align='center')
+    return img
+
+
+class ImageFormatConverter:
+    regex = '|'.join(FORMATS)
+
+    def to_python(self, value):
+        return value
+
+    def to_url(self, value):
+        return value
+
+
+def placeholder_text(text):
+    """Text usable as the <text> URL segment"""
+    return ' '.join(str(text).replace('/', ' ').split())[:MAX_TEXT_LENGTH] or 'Image'
+
+
+def _signature(width, height, text):
+    return signing.Signer(salt='main.placeholders').signature(f'{width}x{height}/{text}')
+
+
+def placeholder_url(text, width, height, fmt):
+    """Signed URL of the placeholder for `text`"""
+    text = placeholder_text(text)
+    return reverse('placeholder', kwargs={
+        'signature': _signature(width, height, text), 'width': width, 'height': height, 'text': text, 'fmt': fmt,
+    })
+
+
+def _cache_dir():
+    return Path(getattr(settings, 'PLACEHOLDER_CACHE_DIR', settings.BASE_DIR / 'placeholders'))
+
+
+def _cache_budget():
+    return getattr(settings, 'PLACEHOLDER_CACHE_MAX_BYTES', 64 * 1024 * 1024)
+
+
+def _allowed(width, height, fmt):
+    sizes = getattr(settings, 'PLACEHOLDER_SIZES', [(600, 400)])
+    return (width, height) in {tuple(size) for size in sizes} and fmt in getattr(
+        settings, 'PLACEHOLDER_FORMATS', ['webp', 'jpg'])
+
+
+def render_placeholder(width, height, text, fmt):
+    """Encoded image bytes for one placeholder URL"""
+    pil_format, _, options = FORMATS[fmt]
+    digest = hashlib.sha1(text.encode()).digest()
+    image = draw_placeholder(
+        width, height, text,
+        bg_color=PALETTE[digest[0] % len(PALETTE)],
+        text_color='white',
+        font_size=max(10, min(width, height) // 10),
+    )
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def cached_placeholder(width, height, text, fmt):
+    """Placeholder bytes from the disk LRU, rendering them on a miss"""
+    key = hashlib.sha1(f'{width}x{height}/{text}'.encode()).hexdigest()
+    path = _cache_dir() / f'{key}.{fmt}'
+    try:
+        content = path.read_bytes()
+        # mtime doubles as the last-used time for eviction
+        os.utime(path)
+        return content
+    except OSError:
+        pass
+
+    content = render_placeholder(width, height, text, fmt)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+        tmp.write_bytes(content)
+        os.replace(tmp, path)
+        with _SizeCounter() as counter:
+            if counter.add(len(content)) > _cache_budget():
+                counter.set(evict(int(_cache_budget() * EVICT_TO)))
+    except OSError:
+        # A full or read-only disk only costs us the cache
+        pass
+    return content
+
+
+class _SizeCounter:
+    """Total bytes in the cache directory, locked against other workers while open"""
+
+    def __enter__(self):
+        self.fd = os.open(_cache_dir() / SIZE_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        fcntl.flock(self.fd, fcntl.LOCK_UN)
+        os.close(self.fd)
+
+    def add(self, size):
+        """Count a file just written; return the new total"""
+        data = os.pread(self.fd, _SIZE.size, 0)
+        # A new counter starts from what is on disk, that file included
+        total = _SIZE.unpack(data)[0] + size if len(data) == _SIZE.size else evict(None)
+        self.set(total)
+        return total
+
+    def set(self, total):
+        os.pwrite(self.fd, _SIZE.pack(total), 0)
+
+
+def evict(max_bytes):
+    """
+    Delete least recently used renderings until the cache fits `max_bytes`
+    (None to only measure it); return the bytes left
+    """
+    entries = []
+    for path in _cache_dir().iterdir():
+        if path.name == SIZE_FILE or path.suffix == '.tmp':
+            continue
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    if max_bytes is None:
+        return total
+    for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+        if total <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+    return total
+
+
+def placeholder_view(request, signature, width, height, text, fmt):
+    """Placeholder image, cached for good by browsers and proxies"""
+    if not constant_time_compare(signature, _signature(width, height, text)):
+        raise Http404('No such placeholder')
+    if not _allowed(width, height, fmt) or text != placeholder_text(text):
+        raise Http404('No such placeholder')
+    response = HttpResponse(cached_placeholder(width, height, text, fmt), content_type=FORMATS[fmt][1])
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
@@ -0,0 +1,145 @@
+"""
+Preload hints built from the assets a page's templates actually use.
+
+The asset tags in main/templatetags record each stylesheet, script and
+above-the-fold image they render into the current request's list, already
+resolved through the staticfiles manifest. PreloadMiddleware remembers the
+list per view and sends it as a `Link: rel=preload` header, so the browser
+starts fetching them while it is still parsing the HTML. Page cache
+entries keep the links of the render that produced them (main/cache.py).
+
+Servers that can send 103 Early Hints over ASGI (the
+`http.response.early_hint` extension, e.g. Hypercorn) get the same links
+before the view even runs: see early_hints(), which wraps the ASGI
+application in portfolio/asgi.py. WSGI has no way to send a 1xx response;
+there the Link header is what a CDN or proxy turns into 103s.
+"""
+import asyncio
+import threading
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.urls import Resolver404, resolve
+from django.utils.decorators import sync_and_async_middleware
+
+from .streaming import observe_stream
+
+PRELOAD_HEADERS = getattr(settings, 'PRELOAD_HEADERS', True)
+# Preloads compete with the HTML for bandwidth, so keep only the first few
+PRELOAD_MAX_LINKS = getattr(settings, 'PRELOAD_MAX_LINKS', 8)
+
+EARLY_HINT_EXTENSION = 'http.response.early_hint'
+
+_recorded = ContextVar('preload_links', default=None)
+
+# view name -> links, filled in as each view renders
+_links_by_view = {}
+_lock = threading.Lock()
+
+
+def record_preload(url, as_type, **attributes):
+    """Add an asset the page being rendered needs early; a no-op outside a request"""
+    links = _recorded.get()
+    if links is None:
+        return
+    link = f'<{url}>; rel=preload; as={as_type}'
+    for name, value in attributes.items():
+        link += f'; {name}="{value}"'
+    # Templates are rendered in a copy of the context under sync_to_async,
+    # so append to the shared list rather than setting the variable
+    if link not in links:
+        links.append(link)
+
+
+def recorded_links():
+    """
+    This request's list of links, e.g. to store with a cached page. It is
+    the live list, which grows as a streamed page renders.
+    """
+    links = _recorded.get()
+    return links if links is not None else []
+
+
+def replay_links(links):
+    """Record links stored earlier, for a response served without rendering"""
+    current = _recorded.get()
+    if current is not None:
+        current.extend(link for link in links if link not in current)
+
+
+def view_links(view_name):
+    return _links_by_view.get(view_name, [])
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else None
+
+
+def _remember(view_name, recorded):
+    if recorded:
+        recorded = recorded[:PRELOAD_MAX_LINKS]
+        if _links_by_view.get(view_name) != recorded:
+            with _lock:
+                _links_by_view[view_name] = recorded
+    return recorded
+
+
+def _finish(request, response, recorded):
+    view_name = _view_name(request)
+    if view_name is None:
+        return
+    if response.streaming:
+        # The body renders after this returns, so only pages that rendered
+        # before can have their links in the headers
+        observe_stream(response, lambda body: _remember(view_name, list(recorded)))
+        links = view_links(view_name)
+    else:
+        links = _remember(view_name, recorded) or view_links(view_name)
+    if links and response.status_code == 200 and response.get('Content-Type', '').startswith('text/html'):
+        response['Link'] = ', '.join(links)
+
+
+@sync_and_async_middleware
+def PreloadMiddleware(get_response):
+    """Send the view's assets as Link: rel=preload headers"""
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            if not PRELOAD_HEADERS:
+                return await get_response(request)
+            recorded = []
+            token = _recorded.set(recorded)
+            try:
+                response = await get_response(request)
+            finally:
+                _recorded.reset(token)
+            _finish(request, response, recorded)
+            return response
+    else:
+        def middleware(request):
+            if not PRELOAD_HEADERS:
+                return get_response(request)
+            recorded = []
+            token = _recorded.set(recorded)
+            try:
+                response = get_response(request)
+            finally:
+                _recorded.reset(token)
+            _finish(request, response, recorded)
+            return response
+    return middleware
+
+
+def early_hints(application):
+    """Wrap an ASGI application to send 103 Early Hints where the server can"""
+    async def app(scope, receive, send):
+        if (PRELOAD_HEADERS and scope['type'] == 'http' and scope['method'] in ('GET', 'HEAD')
+                and EARLY_HINT_EXTENSION in scope.get('extensions', {})):
+            try:
+                links = view_links(resolve(scope['path']).view_name)
+            except Resolver404:
+                links = []
+            if links:
+                await send({'type': EARLY_HINT_EXTENSION, 'links': [link.encode() for link in links]})
+        return await application(scope, receive, send)
+    return app
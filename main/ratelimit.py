@@ -0,0 +1,139 @@
+"""
+Token-bucket admission control shared by every gunicorn worker.
+
+Buckets live in a small dedicated SQLite file (not the main database, so
+throttling never competes with content writes). Each check is a single
+UPSERT ... RETURNING statement that refills the bucket for the elapsed
+time and takes a token only if one is available, so concurrent workers
+cannot race each other without any explicit locking.
+"""
+import asyncio
+import random
+import sqlite3
+import threading
+import time
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+
+# Idle per-IP buckets older than this are pruned
+BUCKET_TTL = 24 * 60 * 60
+
+_local = threading.local()
+
+TAKE_TOKEN = """
+INSERT INTO buckets (key, tokens, updated) VALUES (:key, :capacity - 1, :now)
+ON CONFLICT (key) DO UPDATE SET
+    tokens = min(:capacity, tokens + (:now - updated) * :rate) - 1,
+    updated = :now
+WHERE min(:capacity, tokens + (:now - updated) * :rate) >= 1
+RETURNING tokens
+"""
+
+
+def _database():
+    # Read on use, so override_settings() can point tests at their own file
+    return str(getattr(settings, 'RATE_LIMIT_DB', settings.BASE_DIR / 'ratelimit.sqlite3'))
+
+
+def _connection():
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _local.database != _database():
+        conn.close()
+        conn = None
+    if conn is None:
+        _local.database = _database()
+        conn = sqlite3.connect(_local.database, timeout=1, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL, updated REAL)')
+        conn.execute('CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+        _local.conn = conn
+    return conn
+
+
+def take_token(key, capacity, per_minute):
+    """Take one token from a bucket; return False if it is empty"""
+    conn = _connection()
+    row = conn.execute(TAKE_TOKEN, {
+        'key': key, 'capacity': capacity, 'rate': per_minute / 60.0, 'now': time.time(),
+    }).fetchone()
+    return row is not None
+
+
+def increment(name):
+    _connection().execute(
+        'INSERT INTO counters (name, value) VALUES (?, 1) '
+        'ON CONFLICT (name) DO UPDATE SET value = value + 1',
+        [name],
+    )
+
+
+def counters():
+    """Admission counters, e.g. {'contact.allowed': 10, 'contact.rejected.ip': 3}"""
+    return dict(_connection().execute('SELECT name, value FROM counters ORDER BY name'))
+
+
+def prune():
+    _connection().execute('DELETE FROM buckets WHERE updated < ?', [time.time() - BUCKET_TTL])
+
+
+def client_ip(request):
+    header = getattr(settings, 'RATE_LIMIT_IP_HEADER', 'REMOTE_ADDR')
+    return request.META.get(header) or request.META.get('REMOTE_ADDR', '')
+
+
+def admit(request, scope, per_ip, global_):
+    """Return a 429 response if the request is over budget, else None"""
+    if not getattr(settings, 'RATE_LIMIT_ENABLED', True):
+        return None
+    try:
+        if not take_token(f'{scope}:ip:{client_ip(request)}', *per_ip):
+            increment(f'{scope}.rejected.ip')
+            return _too_many_requests(per_ip)
+        if not take_token(f'{scope}:global', *global_):
+            increment(f'{scope}.rejected.global')
+            return _too_many_requests(global_)
+        increment(f'{scope}.allowed')
+        if random.random() < 0.01:
+            prune()
+    except sqlite3.Error:
+        # Throttling must never take the site down; fail open
+        pass
+    return None
+
+
+def rate_limit_posts(scope, per_ip, global_):
+    """
+    Reject POSTs beyond per-IP and global (capacity, refill_per_minute)
+    budgets with 429 before the view runs.
+    """
+    def decorator(view_func):
+        if asyncio.iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method == 'POST':
+                    rejected = await sync_to_async(admit)(request, scope, per_ip, global_)
+                    if rejected is not None:
+                        return rejected
+                return await view_func(request, *args, **kwargs)
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method == 'POST':
+                rejected = admit(request, scope, per_ip, global_)
+                if rejected is not None:
+                    return rejected
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _too_many_requests(limit):
+    response = HttpResponse('Too many requests. Please try again later.', status=429,
+                            content_type='text/plain')
+    response['Retry-After'] = str(max(1, round(60 / limit[1])))
+    return response
@@ -0,0 +1,157 @@
+"""
+Full-text search over projects, experience and education.
+
+Content is copied into an SQLite FTS5 virtual table (created in migration
+0005) and kept in sync by the signal handlers in main/signals.py. The
+public /search/ view and the admin changelists both query this index
+instead of running LIKE '%term%' scans.
+"""
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.urls import reverse
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+SEARCH_TABLE = 'main_searchindex'
+
+# Each document's rowid encodes its kind and primary key, so updates and
+# deletes are rowid lookups rather than scans of the index
+KIND_CODES = {'project': 1, 'experience': 2, 'education': 3}
+
+# Sentinels placed around matches by FTS5, swapped for <mark> after escaping
+_MATCH_START = '\x02'
+_MATCH_END = '\x03'
+
+
+def search_document(instance):
+    """Return (kind, title, body) for an indexable model instance"""
+    from .models import Project, Experience, Education
+
+    if isinstance(instance, Project):
+        return 'project', instance.title, f'{instance.description}\n{instance.technologies}'
+    if isinstance(instance, Experience):
+        return 'experience', f'{instance.position} at {instance.company}', \
+            f'{instance.description}\n{instance.location}'
+    if isinstance(instance, Education):
+        return 'education', f'{instance.degree} from {instance.institution}', instance.field_of_study
+    return None
+
+
+def _rowid(kind, pk):
+    return pk * len(KIND_CODES) + KIND_CODES[kind]
+
+
+def index_object(instance):
+    document = search_document(instance)
+    if document is None:
+        return
+    kind, title, body = document
+    rowid = _rowid(kind, instance.pk)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [rowid])
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, kind, object_id, title, body) VALUES (%s, %s, %s, %s, %s)',
+            [rowid, kind, instance.pk, title, body],
+        )
+
+
+def index_new_objects(instances):
+    """Index freshly bulk-created rows (which fire no signals) in one statement"""
+    rows = []
+    for instance in instances:
+        document = search_document(instance)
+        if document is not None:
+            kind, title, body = document
+            rows.append([_rowid(kind, instance.pk), kind, instance.pk, title, body])
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, kind, object_id, title, body) VALUES (%s, %s, %s, %s, %s)',
+            rows,
+        )
+
+
+def reindex_objects(instances):
+    """Replace the index entries of bulk-upserted rows"""
+    instances = list(instances)
+    rowids = []
+    for instance in instances:
+        document = search_document(instance)
+        if document is not None:
+            rowids.append([_rowid(document[0], instance.pk)])
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', rowids)
+    index_new_objects(instances)
+
+
+def remove_object(instance):
+    document = search_document(instance)
+    if document is None:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [_rowid(document[0], instance.pk)])
+
+
+def rebuild_index():
+    """Re-index every searchable row from scratch"""
+    from .models import Project, Experience, Education
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+    for model in (Project, Experience, Education):
+        for instance in model.objects.iterator():
+            index_object(instance)
+
+
+def build_match_query(query):
+    """Turn free text into a safe FTS5 query: every word, prefix-matched"""
+    terms = re.findall(r'\w+', query)
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def _highlight(text):
+    return mark_safe(escape(text).replace(_MATCH_START, '<mark>').replace(_MATCH_END, '</mark>'))
+
+
+def matching_ids(query, kind):
+    """
+    Subquery of the primary keys of one kind of object matching a query,
+    for filter(pk__in=...), or None if the query has no words
+    """
+    match = build_match_query(query)
+    if not match:
+        return None
+    return RawSQL(
+        f'SELECT object_id FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s AND kind = %s', [match, kind],
+    )
+
+
+def search(query, limit=50):
+    """Ranked, highlighted results for a free-text query"""
+    match = build_match_query(query)
+    if not match:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT kind, object_id, "
+            f"highlight({SEARCH_TABLE}, 2, %s, %s), "
+            f"snippet({SEARCH_TABLE}, 3, %s, %s, '…', 24) "
+            f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s ORDER BY rank LIMIT %s",
+            [_MATCH_START, _MATCH_END, _MATCH_START, _MATCH_END, match, limit],
+        )
+        rows = cursor.fetchall()
+
+    results = []
+    for kind, object_id, title, snippet in rows:
+        if kind == 'project':
+            url = reverse('project_detail', kwargs={'pk': object_id})
+        else:
+            url = reverse('about') + f'#{kind}-{object_id}'
+        results.append({
+            'kind': kind,
+            'url': url,
+            'title': _highlight(title),
+            'snippet': _highlight(snippet),
+        })
+    return results
@@ -0,0 +1,149 @@
+"""
+Keep derived page data in step with content edits made through the admin.
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.urls import reverse
+
+from .cache import invalidate_pages
+from .local_cache import invalidate_projects
+from .search import index_object, remove_object
+from .snapshots import pages_built_from, rebuild_snapshots
+from .versioning import bump_content_version
+from .models import Project, Skill, Experience, Education, Technology
+
+
+@receiver(pre_save, sender=Project)
+def remember_featured_state(sender, instance, **kwargs):
+    """Record whether a project was featured before this save"""
+    instance._was_featured = bool(
+        instance.pk and Project.objects.filter(pk=instance.pk, featured=True).exists()
+    )
+
+
+@receiver(post_save, sender=Project)
+def sync_project_technologies(sender, instance, raw=False, **kwargs):
+    """Keep the indexed tech_stack in step with the technologies string"""
+    if not raw:
+        instance.sync_technologies()
+
+
+@receiver(pre_delete, sender=Project)
+def remember_technologies(sender, instance, **kwargs):
+    instance._technology_slugs = list(instance.tech_stack.values_list('slug', flat=True))
+
+
+def technology_paths(slugs):
+    return [reverse('technology_projects', kwargs={'slug': slug}) for slug in slugs]
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def invalidate_project_pages(sender, instance, **kwargs):
+    paths = [
+        reverse('projects'),
+        reverse('projects_json'),
+        reverse('project_detail', kwargs={'pk': instance.pk}),
+    ]
+    if instance.featured or getattr(instance, '_was_featured', False):
+        paths.append(reverse('home'))
+    slugs = getattr(instance, '_technology_slugs', None)
+    if slugs is None:
+        slugs = instance.tech_stack.values_list('slug', flat=True)
+    paths.extend(technology_paths(slugs))
+    invalidate_pages(*paths)
+    invalidate_projects(instance.pk)
+
+
+@receiver(m2m_changed, sender=Project.tech_stack.through)
+def invalidate_technology_pages(sender, instance, action, pk_set, **kwargs):
+    """Technologies added to or removed from a project list it differently"""
+    if action in ('post_add', 'post_remove') and pk_set:
+        slugs = Technology.objects.filter(pk__in=pk_set).values_list('slug', flat=True)
+        invalidate_pages(*technology_paths(slugs))
+
+
+@receiver(pre_delete, sender=Technology)
+def remember_technology_projects(sender, instance, **kwargs):
+    # The tech_stack rows are gone by post_delete
+    instance._project_pks = list(instance.projects.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Technology)
+@receiver(post_delete, sender=Technology)
+def invalidate_renamed_technology_pages(sender, instance, **kwargs):
+    """A technology's name appears on every page listing its projects"""
+    project_pks = getattr(instance, '_project_pks', None)
+    if project_pks is None:
+        project_pks = list(instance.projects.values_list('pk', flat=True))
+    invalidate_projects(*project_pks)
+    invalidate_pages(
+        reverse('home'),
+        reverse('projects'),
+        reverse('projects_json'),
+        *technology_paths([instance.slug]),
+        *[reverse('project_detail', kwargs={'pk': pk}) for pk in project_pks],
+    )
+
+
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+@receiver(post_save, sender=Experience)
+@receiver(post_delete, sender=Experience)
+def invalidate_profile_pages(sender, instance, **kwargs):
+    invalidate_pages(reverse('home'), reverse('about'))
+
+
+@receiver(post_save, sender=Education)
+@receiver(post_delete, sender=Education)
+def invalidate_education_pages(sender, instance, **kwargs):
+    invalidate_pages(reverse('about'))
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Experience)
+@receiver(post_save, sender=Education)
+def update_search_index(sender, instance, **kwargs):
+    index_object(instance)
+
+
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=Experience)
+@receiver(post_delete, sender=Education)
+def remove_from_search_index(sender, instance, **kwargs):
+    remove_object(instance)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+@receiver(post_save, sender=Technology)
+@receiver(post_delete, sender=Technology)
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+@receiver(post_save, sender=Experience)
+@receiver(post_delete, sender=Experience)
+@receiver(post_save, sender=Education)
+@receiver(post_delete, sender=Education)
+def update_content_version(sender, instance, **kwargs):
+    """Invalidate every conditional-GET validator handed out so far"""
+    bump_content_version()
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+@receiver(post_save, sender=Technology)
+@receiver(post_delete, sender=Technology)
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+@receiver(post_save, sender=Experience)
+@receiver(post_delete, sender=Experience)
+@receiver(post_save, sender=Education)
+@receiver(post_delete, sender=Education)
+def update_page_snapshots(sender, instance, raw=False, **kwargs):
+    """Rebuild the snapshots built from this model in the saving transaction"""
+    if raw:
+        return
+    # Only featured projects appear in a snapshot
+    if sender is Project and not (instance.featured or getattr(instance, '_was_featured', False)):
+        return
+    rebuild_snapshots(*pages_built_from(sender))
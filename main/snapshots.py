@@ -0,0 +1,117 @@
+"""
+Read-model snapshots of the home and about page context.
+
+Each page's context is built once, already grouped the way the template
+shows it, and stored compressed in one PageSnapshot row. Snapshots hold
+plain values() rows (dicts of strings, numbers and dates), never model
+instances, so a stored snapshot doesn't depend on how the models pickle.
+The signal handlers in main/signals.py rebuild the affected snapshots
+inside the same transaction as the content save, and the gunicorn warm-up
+fills any that are missing, so a public view costs a single primary-key
+lookup however many rows the content tables hold.
+
+A snapshot is only trusted if it was written with the current field lists
+(SNAPSHOT_SCHEMA). Reads never write: a missing or outdated snapshot is
+built for that request only and left for the next rebuild to replace.
+"""
+import hashlib
+import pickle
+import zlib
+
+from django.db import transaction
+
+from .models import Education, Experience, PageSnapshot, Project, Skill, Technology
+
+# The values() columns each snapshot keeps; part of SNAPSHOT_SCHEMA
+PROJECT_FIELDS = ('pk', 'title', 'description', 'image', 'github_url', 'live_url')
+TECHNOLOGY_FIELDS = ('name', 'slug')
+SKILL_FIELDS = ('name', 'category', 'proficiency')
+EXPERIENCE_FIELDS = ('pk', 'company', 'position', 'description', 'start_date', 'end_date', 'location')
+EDUCATION_FIELDS = ('pk', 'institution', 'degree', 'field_of_study', 'start_date', 'end_date', 'gpa')
+
+
+def build_home():
+    projects = list(Project.objects.filter(featured=True).values(*PROJECT_FIELDS)[:3])
+    tech_stacks = {}
+    for row in Technology.objects.filter(projects__in=[project['pk'] for project in projects]).values(
+            'projects', *TECHNOLOGY_FIELDS):
+        tech_stacks.setdefault(row.pop('projects'), []).append(row)
+    for project in projects:
+        project['tech_stack'] = tech_stacks.get(project['pk'], [])
+    return {
+        'featured_projects': projects,
+        'skills': list(Skill.objects.values(*SKILL_FIELDS)),
+        'recent_experience': Experience.objects.values(*EXPERIENCE_FIELDS).first(),
+    }
+
+
+def build_about():
+    skill_groups = {}
+    for skill in Skill.objects.order_by('pk').values(*SKILL_FIELDS):
+        skill_groups.setdefault(skill['category'], []).append(skill)
+    return {
+        'experiences': list(Experience.objects.values(*EXPERIENCE_FIELDS)),
+        'education': list(Education.objects.values(*EDUCATION_FIELDS)),
+        # (category, skills) in order of each category's first skill
+        'skill_groups': list(skill_groups.items()),
+    }
+
+
+SNAPSHOT_BUILDERS = {
+    'home': build_home,
+    'about': build_about,
+}
+
+# Models each snapshot is built from
+SNAPSHOT_SOURCES = {
+    'home': (Project, Technology, Skill, Experience),
+    'about': (Skill, Experience, Education),
+}
+
+SNAPSHOT_SCHEMA = hashlib.sha1(repr((
+    PROJECT_FIELDS, TECHNOLOGY_FIELDS, SKILL_FIELDS, EXPERIENCE_FIELDS, EDUCATION_FIELDS,
+)).encode()).hexdigest()
+
+
+def pages_built_from(model):
+    return [page for page, models in SNAPSHOT_SOURCES.items() if model in models]
+
+
+def rebuild_snapshot(page):
+    """Build and store one page's context; return it"""
+    with transaction.atomic():
+        context = SNAPSHOT_BUILDERS[page]()
+        data = zlib.compress(pickle.dumps(context, protocol=pickle.HIGHEST_PROTOCOL))
+        PageSnapshot.objects.update_or_create(page=page, defaults={'schema': SNAPSHOT_SCHEMA, 'data': data})
+    return context
+
+
+def rebuild_snapshots(*pages):
+    """Rebuild the given pages, or all of them"""
+    for page in pages or SNAPSHOT_BUILDERS:
+        rebuild_snapshot(page)
+
+
+def fill_missing_snapshots():
+    """Rebuild the snapshots that are missing or outdated; return their pages"""
+    current = set(PageSnapshot.objects.filter(schema=SNAPSHOT_SCHEMA).values_list('page', flat=True))
+    missing = [page for page in SNAPSHOT_BUILDERS if page not in current]
+    for page in missing:
+        rebuild_snapshot(page)
+    return missing
+
+
+def _load(row):
+    if row is None or row[0] != SNAPSHOT_SCHEMA:
+        return None
+    try:
+        return pickle.loads(zlib.decompress(row[1]))
+    except Exception:
+        return None
+
+
+def page_context(page):
+    """A page's context from its snapshot, or built afresh if it has none"""
+    row = PageSnapshot.objects.filter(pk=page).values_list('schema', 'data').first()
+    context = _load(row)
+    return context if context is not None else SNAPSHOT_BUILDERS[page]()
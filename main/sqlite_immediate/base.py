@@ -0,0 +1,17 @@
+"""
+The stock SQLite backend, except that transactions start with BEGIN
+IMMEDIATE.
+
+A plain BEGIN takes no lock until the first statement. A transaction that
+reads before it writes, like saving a contact message, then has to upgrade
+its read lock, and SQLite fails that upgrade at once with "database is
+locked" instead of waiting whenever another connection is writing.
+Taking the write lock up front makes concurrent writers wait their turn
+on the busy timeout instead.
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
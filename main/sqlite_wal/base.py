@@ -0,0 +1,35 @@
+"""
+SQLite backend tuned for several gunicorn workers sharing one file.
+
+Every new connection switches the database to WAL (readers never block
+the writer and vice versa), relaxes fsync to once per checkpoint, maps the
+file into memory and waits on a busy lock instead of failing with
+"database is locked". Transactions start with BEGIN IMMEDIATE, as in
+main/sqlite_immediate.
+
+Enable it with SQLITE_WAL=true (see DATABASES in portfolio/settings.py).
+Individual pragmas can be overridden with OPTIONS['pragmas'].
+"""
+from main.sqlite_immediate import base
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,  # Milliseconds
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -20000,  # Negative means KiB, so about 20 MB per connection
+    'temp_store': 'MEMORY',
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        self.pragmas = {**DEFAULT_PRAGMAS, **kwargs.pop('pragmas', {})}
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
@@ -0,0 +1,74 @@
+"""
+Static files storage used by collectstatic (STATICFILES_STORAGE).
+"""
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.core.files.base import ContentFile
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+from .assets import (
+    STATIC_BUNDLES, above_the_fold, build_bundle, critical_css, critical_css_name, markup_tokens, page_templates,
+)
+from .images import STATIC_IMAGE_EXTENSIONS, optimize_static_image
+
+
+class PortfolioStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    WhiteNoise's hashed and compressed storage, plus the minified bundles
+    and per-template critical CSS from main/assets.py, and recompressed
+    images with WebP/AVIF siblings from main/images.py.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            # Built files join the collected ones, so they are hashed and
+            # compressed like the rest
+            paths = {**paths, **self.build_assets(), **self.optimize_images(paths)}
+        yield from super().post_process(paths, dry_run, **options)
+
+    def build_assets(self):
+        built = {}
+        stylesheets = []
+        for name, sources in STATIC_BUNDLES.items():
+            content = build_bundle(name, [self._read(source) for source in sources])
+            if name.endswith('.css'):
+                stylesheets.append(content)
+            built[name] = self._write(name, content)
+
+        css = '\n'.join(stylesheets)
+        for template_name in page_templates():
+            name = critical_css_name(template_name)
+            built[name] = self._write(name, critical_css(css, markup_tokens(above_the_fold(template_name))))
+        return built
+
+    def optimize_images(self, paths):
+        """
+        Replace collected JPEG/PNG files with their recompressed versions and
+        add the WebP/AVIF siblings, named e.g. images/white.jpg.webp
+        """
+        names = [name for name in paths if name.lower().endswith(STATIC_IMAGE_EXTENSIONS)]
+        # Hash the source file, not the collected copy, which may already
+        # be the optimized output of an earlier run
+        sources = [paths[name][0].path(paths[name][1]) for name in names]
+        with ProcessPoolExecutor() as pool:
+            results = list(pool.map(optimize_static_image, sources))
+
+        built = {}
+        for name, outputs in zip(names, results):
+            for suffix, cached in outputs.items():
+                target = f'{name}.{suffix}' if suffix else name
+                built[target] = self._write(target, Path(cached).read_bytes())
+        return built
+
+    def _read(self, name):
+        with self.open(name) as source:
+            return source.read().decode()
+
+    def _write(self, name, content):
+        if isinstance(content, str):
+            content = content.encode()
+        if self.exists(name):
+            self.delete(name)
+        self._save(name, ContentFile(content))
+        return self, name
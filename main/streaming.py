@@ -0,0 +1,242 @@
+"""
+Streaming page rendering.
+
+stream_render() returns a StreamingHttpResponse whose body is rendered as
+it is sent. Everything in the outermost template before its content block
+(the <head> and the navigation) goes out first. Only then does the view's
+`deferred` callable run its queries, and the content block follows one
+top-level tag at a time, so lazy querysets are evaluated as their part of
+the page is reached. The browser meanwhile fetches the stylesheets,
+scripts and fonts named in the head.
+
+Headers are sent before any of the body is rendered, so anything that
+changes them has to happen up front:
+- flash messages are read eagerly if the page shows them, which marks
+  them used and lets MessageMiddleware clear them from the cookie or
+  session
+- the CSRF token is requested eagerly if the page has a {% csrf_token %},
+  so CsrfViewMiddleware still sets its cookie
+- the status is fixed at 200: look up anything that may 404 in the view
+  itself, before calling stream_render()
+
+Each chunk renders inside a copy of the request's contextvars, so
+per-request state such as the preload links (main/preload.py) is still
+recorded while the body streams.
+"""
+import contextvars
+import re
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.shortcuts import render
+from django.template.base import Node, TextNode
+from django.template.context import make_context
+from django.template.defaulttags import CsrfTokenNode
+from django.template.loader import get_template
+from django.template.loader_tags import BLOCK_CONTEXT_KEY, BlockContext, BlockNode, ExtendsNode, IncludeNode
+
+STREAMING_PAGES = getattr(settings, 'STREAMING_PAGES', False)
+STREAMED_BLOCK = 'content'
+
+_MESSAGES = re.compile(r'\bmessages\b')
+
+
+@lru_cache(maxsize=None)
+def _request_state(template):
+    """
+    Which of 'csrf_token' and 'messages' a template, its parents and its
+    constant includes use. Public pages use neither, so streaming them
+    touches no cookies and no session.
+    """
+    used = set()
+    for node in template.nodelist.get_nodes_by_type(Node):
+        token = getattr(node, 'token', None)
+        if isinstance(node, CsrfTokenNode):
+            used.add('csrf_token')
+        elif token is not None and not isinstance(node, TextNode) and _MESSAGES.search(token.contents):
+            used.add('messages')
+        if isinstance(node, (ExtendsNode, IncludeNode)):
+            name = node.parent_name if isinstance(node, ExtendsNode) else node.template
+            if name.is_var or not isinstance(name.var, str):
+                # Chosen at render time; assume the worst
+                return frozenset({'csrf_token', 'messages'})
+            used |= _request_state(template.engine.get_template(name.var))
+    return frozenset(used)
+
+
+class _PageRenderer:
+    """Renders a compiled template in pieces, the way Template.render() would in one go"""
+
+    def __init__(self, template, context, deferred):
+        self.template = template
+        self.context = context
+        self.deferred = deferred
+
+    def __iter__(self):
+        context = self.context
+        with context.render_context.push_state(self.template):
+            with context.bind_template(self.template):
+                context.template_name = self.template.name
+                yield from self._template(self.template)
+
+    def _template(self, template):
+        extends = next((node for node in template.nodelist if isinstance(node, ExtendsNode)), None)
+        if extends is None:
+            if not any(isinstance(node, BlockNode) and node.name == STREAMED_BLOCK for node in template.nodelist):
+                # Nothing to send ahead of the queries
+                self._load_deferred()
+            yield from self._nodes(template.nodelist, flush_blocks=True)
+            return
+
+        # ExtendsNode.render(), up to rendering the parent
+        context = self.context
+        parent = extends.get_parent(context)
+        if BLOCK_CONTEXT_KEY not in context.render_context:
+            context.render_context[BLOCK_CONTEXT_KEY] = BlockContext()
+        block_context = context.render_context[BLOCK_CONTEXT_KEY]
+        block_context.add_blocks(extends.blocks)
+        for node in parent.nodelist:
+            if not isinstance(node, TextNode):
+                if not isinstance(node, ExtendsNode):
+                    block_context.add_blocks({n.name: n for n in parent.nodelist.get_nodes_by_type(BlockNode)})
+                break
+        with context.render_context.push_state(parent, isolated_context=False):
+            yield from self._template(parent)
+
+    def _nodes(self, nodelist, flush_blocks=False):
+        """Output of each node, buffered up to the next one that may query"""
+        buffered = []
+        for node in nodelist:
+            if isinstance(node, TextNode):
+                buffered.append(node.s)
+            elif flush_blocks and isinstance(node, BlockNode) and node.name == STREAMED_BLOCK:
+                yield ''.join(buffered)
+                buffered = []
+                self._load_deferred()
+                yield from self._block(node)
+            else:
+                if buffered:
+                    yield ''.join(buffered)
+                    buffered = []
+                buffered.append(node.render_annotated(self.context))
+        if buffered:
+            yield ''.join(buffered)
+
+    def _load_deferred(self):
+        if self.deferred is not None:
+            self.context.update(self.deferred())
+            self.deferred = None
+
+    def _block(self, node):
+        # BlockNode.render(), one top-level node at a time
+        context = self.context
+        block_context = context.render_context.get(BLOCK_CONTEXT_KEY)
+        with context.push():
+            if block_context is None:
+                context['block'] = node
+                yield from self._nodes(node.nodelist)
+                return
+            push = block = block_context.pop(node.name)
+            if block is None:
+                block = node
+            block = type(node)(block.name, block.nodelist)
+            block.context = context
+            context['block'] = block
+            yield from self._nodes(block.nodelist)
+            if push is not None:
+                block_context.push(node.name, push)
+
+
+def _sync_chunks(request_context, chunks):
+    sentinel = object()
+    try:
+        while (chunk := request_context.run(next, chunks, sentinel)) is not sentinel:
+            if chunk:
+                yield chunk
+    finally:
+        request_context.run(chunks.close)
+
+
+async def _async_chunks(request_context, chunks):
+    sentinel = object()
+    # Templates may query, so every chunk renders on the request's sync thread
+    step = sync_to_async(request_context.run)
+    try:
+        while (chunk := await step(next, chunks, sentinel)) is not sentinel:
+            if chunk:
+                yield chunk
+    finally:
+        await step(chunks.close)
+
+
+def stream_render(request, template_name, context=None, deferred=None):
+    """
+    Like render(), but streamed. `deferred` returns more context and is
+    only called once the page's head has been sent.
+    """
+    if not STREAMING_PAGES:
+        return render(request, template_name, {**(context or {}), **(deferred() if deferred else {})})
+
+    template = get_template(template_name)
+    # TimedTemplate and the stock backend both wrap the compiled template
+    compiled = template.template
+    context = dict(context or {})
+    used = _request_state(compiled)
+    if 'messages' in used:
+        context.setdefault('messages', list(get_messages(request)))
+    if 'csrf_token' in used:
+        get_token(request)
+
+    chunks = iter(_PageRenderer(compiled, make_context(context, request, autoescape=compiled.engine.autoescape),
+                                deferred))
+    request_context = contextvars.copy_context()
+    if isinstance(request, ASGIRequest):
+        content = _async_chunks(request_context, chunks)
+    else:
+        content = _sync_chunks(request_context, chunks)
+    return StreamingHttpResponse(content, content_type='text/html; charset=utf-8')
+
+
+# Reading the messages may touch the session, which is sync-only
+astream_render = sync_to_async(stream_render)
+
+
+def observe_stream(response, on_complete, on_close=None, keep_body=False):
+    """
+    Call on_complete(body) once all of a streaming response has been sent
+    (body is None unless keep_body), and on_close() however it ends.
+    Both are sync and run on a sync thread for async responses.
+    """
+    content = response.streaming_content
+
+    if response.is_async:
+        async def observed():
+            chunks = [] if keep_body else None
+            try:
+                async for chunk in content:
+                    if keep_body:
+                        chunks.append(chunk)
+                    yield chunk
+                await sync_to_async(on_complete)(b''.join(chunks) if keep_body else None)
+            finally:
+                if on_close is not None:
+                    await sync_to_async(on_close)()
+    else:
+        def observed():
+            chunks = [] if keep_body else None
+            try:
+                for chunk in content:
+                    if keep_body:
+                        chunks.append(chunk)
+                    yield chunk
+                on_complete(b''.join(chunks) if keep_body else None)
+            finally:
+                if on_close is not None:
+                    on_close()
+
+    response.streaming_content = observed()
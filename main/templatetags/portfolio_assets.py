@@ -0,0 +1,82 @@
+from functools import lru_cache
+
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+
+from main.assets import STATIC_BUNDLES, critical_css_name
+from main.preload import record_preload
+
+register = template.Library()
+
+
+@lru_cache(maxsize=None)
+def _critical_css(template_name):
+    # Written by collectstatic, so it only changes with a deploy
+    try:
+        with staticfiles_storage.open(critical_css_name(template_name)) as css:
+            return css.read().decode()
+    except OSError:
+        return None
+
+
+def _bundle_urls(name):
+    """The built bundle, or its unminified sources while developing"""
+    if settings.DEBUG:
+        return [static(source) for source in STATIC_BUNDLES[name]]
+    return [static(name)]
+
+
+@register.simple_tag
+def async_stylesheet(url):
+    """Load a stylesheet without blocking the first paint"""
+    return format_html(
+        '<link rel="preload" href="{}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">'
+        '<noscript><link rel="stylesheet" href="{}"></noscript>',
+        url, url,
+    )
+
+
+@register.simple_tag(takes_context=True)
+def css_bundle(context, name):
+    """Inline the page's critical CSS and load the full bundle asynchronously"""
+    urls = _bundle_urls(name)
+    for url in urls:
+        record_preload(url, 'style')
+    template_name = getattr(context.template, 'name', None)
+    critical = _critical_css(template_name) if template_name and not settings.DEBUG else None
+    if critical is None:
+        return format_html_join('\n', '<link rel="stylesheet" href="{}">', ((url,) for url in urls))
+    return format_html('<style>{}</style>\n{}', mark_safe(critical), async_stylesheet(urls[0]))
+
+
+@register.simple_tag
+def js_bundle(name):
+    urls = _bundle_urls(name)
+    for url in urls:
+        record_preload(url, 'script')
+    return format_html_join('\n', '<script src="{}" defer></script>', ((url,) for url in urls))
+
+
+@register.simple_tag
+def stylesheet(url):
+    """A render-blocking stylesheet, preloaded from the response headers"""
+    record_preload(url, 'style')
+    return format_html('<link href="{}" rel="stylesheet">', url)
+
+
+@register.simple_tag
+def deferred_script(url):
+    record_preload(url, 'script')
+    return format_html('<script src="{}" defer></script>', url)
+
+
+@register.simple_tag
+def preloaded_static(path, as_type):
+    """static(), for assets only CSS would reveal late, e.g. a hero background"""
+    url = static(path)
+    record_preload(url, as_type)
+    return url
@@ -0,0 +1,72 @@
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.files.storage import default_storage
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from main.images import DERIVATIVE_FORMATS, load_manifest
+from main.placeholders import placeholder_url
+from main.preload import record_preload
+
+register = template.Library()
+
+
+def _srcset(variants):
+    return ', '.join(f'{settings.MEDIA_URL}{name} {width}w' for width, name in variants)
+
+
+@register.simple_tag
+def responsive_image(image, alt='', sizes='100vw', css_class='', style=''):
+    """Render an uploaded image as a <picture> backed by its resized derivatives"""
+    # A file field, or just its name in a page snapshot (main/snapshots.py)
+    name = getattr(image, 'name', image)
+    manifest = load_manifest(name)
+    if not manifest:
+        return format_html('<img src="{}" class="{}" alt="{}" style="{}" loading="lazy">',
+                           default_storage.url(name), css_class, alt, style)
+
+    fallback = manifest.pop('image/jpeg', None) or manifest.popitem()[1]
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        ((mime_type, _srcset(variants), sizes) for mime_type, variants in manifest.items()),
+    )
+    return format_html(
+        '<picture>{}<img src="{}{}" srcset="{}" sizes="{}" class="{}" alt="{}" style="{}" '
+        'loading="lazy" decoding="async"></picture>',
+        sources, settings.MEDIA_URL, fallback[-1][1], _srcset(fallback), sizes, css_class, alt, style,
+    )
+
+
+@register.simple_tag
+def static_picture(name, alt='', css_class='', style=''):
+    """Render a static image as a <picture> offering its WebP/AVIF siblings"""
+    # Siblings only exist once collectstatic has recorded them in the manifest
+    collected = {} if settings.DEBUG else getattr(staticfiles_storage, 'hashed_files', {})
+    siblings = [
+        (mime_type, static(f'{name}.{extension}'))
+        for extension, mime_type, _ in DERIVATIVE_FORMATS.values()
+        if f'{name}.{extension}' in collected
+    ]
+    # Preload the format the browser will pick first; browsers that can't
+    # decode it skip the hint rather than fetching an unused file
+    if siblings:
+        record_preload(siblings[0][1], 'image', type=siblings[0][0], fetchpriority='high')
+    else:
+        record_preload(static(name), 'image', fetchpriority='high')
+    sources = format_html_join('', '<source type="{}" srcset="{}">', siblings)
+    return format_html(
+        '<picture>{}<img src="{}" class="{}" alt="{}" style="{}" decoding="async"></picture>',
+        sources, static(name), css_class, alt, style,
+    )
+
+
+@register.simple_tag
+def placeholder_image(text, width, height, alt='', css_class='', style=''):
+    """Render a generated placeholder (see main/placeholders.py), WebP first"""
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}"><img src="{}" width="{}" height="{}" '
+        'class="{}" alt="{}" style="{}" loading="lazy" decoding="async"></picture>',
+        placeholder_url(text, width, height, 'webp'), placeholder_url(text, width, height, 'jpg'),
+        width, height, css_class, alt, style,
+    )
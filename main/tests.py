@@ -1,3 +1,1218 @@
-from django.test import TestCase
+import asyncio
+import os
+import re
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import closing
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.http import Http404, HttpResponse
+from django.template import Context, Template
+from django.test import (AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from . import assets, async_views, metrics, preload, ratelimit, streaming
+from .admin import ContactAdmin
+from .cache import _entry_key, page_version
+from .dummy_smtp import DummySMTPServer
+from .images import (ORIENTATION_TAG, available_formats, build_derivatives, derivative_dir, load_manifest,
+                     optimize_static_image)
+from .loadtest import Target, run_load
+from .local_cache import GenerationFile, LocalLRU, project_cache
+from .models import (Contact, Education, Experience, OutboxMessage, PageSnapshot, Project, Skill, Technology,
+                     technology_slug)
+from .outbox import deliver_due, queue_mail
+from .pagination import PROJECTS_PAGE_SIZE, decode_cursor, keyset_page
+from .placeholders import placeholder_url
+from .snapshots import fill_missing_snapshots, page_context
+from .versioning import conditional_page
+from .warmup import prepare_for_fork
+from .sqlite_immediate.base import DatabaseWrapper as ImmediateDatabaseWrapper
+from .sqlite_wal.base import DatabaseWrapper as WalDatabaseWrapper
+from .writer import run_write
+
+PAGE_SETTINGS = {
+    # Page cache and version counters kept in memory, apart from the dev server's
+    'CACHES': {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-pages'},
+        'page_versions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                          'LOCATION': 'test-versions', 'TIMEOUT': None},
+    },
+    # Pages render without running collectstatic first
+    'STATICFILES_STORAGE': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    # Tests that post opt back in to rate limiting with a throwaway bucket file
+    'RATE_LIMIT_ENABLED': False,
+    # Invalidations delete pre-rendered pages; never those of the real site/
+    'STATIC_SITE_ROOT': Path(tempfile.gettempdir(), 'portfolio-tests-site'),
+}
+
+CONTACT_POST = {
+    'name': 'Ada',
+    'email': 'ada@example.com',
+    'subject': 'Hello',
+    'message': 'A message long enough to pass validation.',
+}
+
+
+def create_project(title='Project', technologies='Python', **fields):
+    return Project.objects.create(title=title, description=f'About {title}', technologies=technologies, **fields)
+
+
+def clear_test_caches():
+    caches['default'].clear()
+    caches['page_versions'].clear()
+
+
+@override_settings(**PAGE_SETTINGS)
+class ContactRateLimitTests(TestCase):
+    def setUp(self):
+        clear_test_caches()
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        limited = override_settings(RATE_LIMIT_ENABLED=True, RATE_LIMIT_DB=Path(workdir.name, 'rl.sqlite3'))
+        limited.enable()
+        self.addCleanup(limited.disable)
+        self.addCleanup(self.close_connection)
+
+    def close_connection(self):
+        if getattr(ratelimit._local, 'conn', None) is not None:
+            ratelimit._local.conn.close()
+            ratelimit._local.conn = None
+
+    def test_posts_over_the_per_ip_budget_get_429(self):
+        capacity = ratelimit.settings.CONTACT_RATE_LIMIT_PER_IP[0]
+        for _ in range(capacity):
+            self.assertEqual(self.client.post(reverse('contact'), CONTACT_POST).status_code, 302)
+
+        response = self.client.post(reverse('contact'), CONTACT_POST)
+
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(OutboxMessage.objects.count(), capacity)
+        self.assertEqual(ratelimit.counters()['contact.rejected.ip'], 1)
+
+    @override_settings(RATE_LIMIT_IP_HEADER='HTTP_X_REAL_IP')
+    def test_buckets_are_per_client_ip(self):
+        capacity = ratelimit.settings.CONTACT_RATE_LIMIT_PER_IP[0]
+        for _ in range(capacity):
+            self.client.post(reverse('contact'), CONTACT_POST, HTTP_X_REAL_IP='192.0.2.1')
+
+        response = self.client.post(reverse('contact'), CONTACT_POST, HTTP_X_REAL_IP='192.0.2.2')
+
+        self.assertEqual(response.status_code, 302)
+
+    def test_gets_are_not_limited(self):
+        capacity = ratelimit.settings.CONTACT_RATE_LIMIT_PER_IP[0]
+        for _ in range(capacity + 1):
+            self.assertEqual(self.client.get(reverse('contact_form')).status_code, 200)
+
+    def test_disabled_by_setting(self):
+        capacity = ratelimit.settings.CONTACT_RATE_LIMIT_PER_IP[0]
+        with override_settings(RATE_LIMIT_ENABLED=False):
+            for _ in range(capacity + 1):
+                self.assertEqual(self.client.post(reverse('contact'), CONTACT_POST).status_code, 302)
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+    EMAIL_HOST='127.0.0.1',
+    **PAGE_SETTINGS,
+)
+class OutboxTests(TestCase):
+    def setUp(self):
+        clear_test_caches()
+        self.server = DummySMTPServer(('127.0.0.1', 0))
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def closed_port(self):
+        with socket.socket() as unused:
+            unused.bind(('127.0.0.1', 0))
+            return unused.getsockname()[1]
+
+    def test_contact_post_queues_mail_without_sending(self):
+        response = self.client.post(reverse('contact'), CONTACT_POST)
+
+        self.assertRedirects(response, reverse('contact'), fetch_redirect_response=False)
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.subject, 'Portfolio Contact: Hello')
+        self.assertIsNone(message.sent_at)
+        self.assertEqual(self.server.messages, [])
+
+    def test_run_outbox_delivers_due_messages(self):
+        queue_mail('Subject', 'Body', 'site@example.com', ['one@example.com', 'two@example.com'])
+
+        with override_settings(EMAIL_PORT=self.server.server_address[1]):
+            call_command('run_outbox', '--once', stdout=StringIO())
+
+        message = OutboxMessage.objects.get()
+        self.assertIsNotNone(message.sent_at)
+        self.assertEqual(message.attempts, 1)
+        [(mail_from, rcpt_to, data)] = self.server.messages
+        self.assertEqual(mail_from, 'site@example.com')
+        self.assertEqual(rcpt_to, ['one@example.com', 'two@example.com'])
+        self.assertIn(b'Subject: Subject', data)
+
+    def test_failed_delivery_is_retried_after_a_backoff(self):
+        queue_mail('Subject', 'Body', 'site@example.com', ['one@example.com'])
+
+        with override_settings(EMAIL_PORT=self.closed_port()):
+            self.assertEqual(deliver_due(), (0, 1))
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.attempts, 1)
+        self.assertTrue(message.last_error)
+        self.assertGreater(message.next_attempt_at, timezone.now())
+
+        # Not due yet, so nothing is tried
+        with override_settings(EMAIL_PORT=self.server.server_address[1]):
+            self.assertEqual(deliver_due(), (0, 0))
+            OutboxMessage.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+            self.assertEqual(deliver_due(), (1, 0))
+        self.assertEqual(OutboxMessage.objects.get().attempts, 2)
+        self.assertEqual(len(self.server.messages), 1)
+
+    def test_gives_up_after_max_attempts(self):
+        queue_mail('Subject', 'Body', 'site@example.com', ['one@example.com'])
+
+        with override_settings(EMAIL_PORT=self.closed_port()):
+            deliver_due(max_attempts=1)
+
+        message = OutboxMessage.objects.get()
+        self.assertIsNone(message.next_attempt_at)
+        self.assertIsNone(message.sent_at)
+
+
+class ConcurrentWriteTests(SimpleTestCase):
+    """Read-then-write transactions on separate connections to one file"""
+
+    def setUp(self):
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        self.settings_dict = {**connection.settings_dict, 'NAME': str(Path(workdir.name, 'concurrent.sqlite3'))}
+        self.run_in_transaction('CREATE TABLE messages (id INTEGER PRIMARY KEY)')
+
+    def run_in_transaction(self, *statements, pause=0):
+        # Connections are per thread, so each thread registers its own
+        connections['concurrent'] = ImmediateDatabaseWrapper(self.settings_dict, alias='concurrent')
+        try:
+            with transaction.atomic(using='concurrent'), connections['concurrent'].cursor() as cursor:
+                cursor.execute('SELECT count(*) FROM sqlite_master')
+                # Give the other thread time to start its own transaction
+                time.sleep(pause)
+                for statement in statements:
+                    cursor.execute(statement)
+        finally:
+            connections['concurrent'].close()
+            del connections['concurrent']
+
+    def test_concurrent_writers_wait_instead_of_failing(self):
+        errors = []
+
+        def write():
+            try:
+                self.run_in_transaction('INSERT INTO messages DEFAULT VALUES', pause=0.1)
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=write) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        with closing(sqlite3.connect(self.settings_dict['NAME'])) as db:
+            self.assertEqual(db.execute('SELECT count(*) FROM messages').fetchone(), (4,))
+
+
+@override_settings(**PAGE_SETTINGS)
+class StreamingPageTests(TestCase):
+    def setUp(self):
+        clear_test_caches()
+        # Start as if no view had rendered yet in this process
+        patcher = mock.patch.dict(preload._links_by_view, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_pages_render_whole_by_default(self):
+        response = self.client.get(reverse('home'))
+
+        self.assertFalse(response.streaming)
+        self.assertIn('Server-Timing', response)
+        self.assertIn('rel=preload', response['Link'])
+
+    @mock.patch.object(streaming, 'STREAMING_PAGES', True)
+    def test_streamed_page(self):
+        create_project('Streamed')
+
+        response = self.client.get(reverse('projects'))
+
+        self.assertTrue(response.streaming)
+        body = response.getvalue().decode()
+        self.assertIn('Streamed', body)
+        self.assertTrue(body.rstrip().endswith('</html>'))
+        self.assertNotIn('Server-Timing', response)
+
+    @mock.patch.object(streaming, 'STREAMING_PAGES', True)
+    def test_streamed_pages_set_no_cookies(self):
+        for name in ('home', 'contact'):
+            response = self.client.get(reverse(name))
+            response.getvalue()
+            self.assertEqual(response.cookies, {}, name)
+            self.assertTrue(response['Cache-Control'].startswith('public'), name)
+
+
+@override_settings(**PAGE_SETTINGS)
+class PageInvalidationTests(TestCase):
+    def setUp(self):
+        clear_test_caches()
+        self.project = create_project('Invalidated', 'Python')
+        self.python = Technology.objects.get(slug='python')
+
+    def assertBumps(self, change, *paths, unchanged=()):
+        before = {path: page_version(path) for path in (*paths, *unchanged)}
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        for path in paths:
+            self.assertGreater(page_version(path), before[path], path)
+        for path in unchanged:
+            self.assertEqual(page_version(path), before[path], path)
+
+    def detail(self):
+        return reverse('project_detail', kwargs={'pk': self.project.pk})
+
+    def technology(self, slug):
+        return reverse('technology_projects', kwargs={'slug': slug})
+
+    def test_project_save(self):
+        self.assertBumps(self.project.save, reverse('projects'), reverse('projects_json'), self.detail(),
+                         self.technology('python'), unchanged=[reverse('home')])
+
+    def test_featured_project_save(self):
+        self.project.featured = True
+        self.assertBumps(self.project.save, reverse('home'))
+
+    def test_project_delete(self):
+        detail = self.detail()
+        self.assertBumps(self.project.delete, reverse('projects'), detail, self.technology('python'))
+
+    def test_technologies_added_to_a_project(self):
+        rust = Technology.objects.create(name='Rust', slug='rust')
+        self.assertBumps(lambda: self.project.tech_stack.add(rust), self.technology('rust'))
+
+    def test_technology_rename(self):
+        self.python.name = 'Python 3'
+        self.assertBumps(self.python.save, self.detail(), self.technology('python'))
+
+    def test_technology_delete(self):
+        self.assertBumps(self.python.delete, self.detail(), self.technology('python'))
+
+    def test_skill(self):
+        self.assertBumps(lambda: Skill.objects.create(name='SQL', proficiency=80, category='Data'),
+                         reverse('home'), reverse('about'))
+
+    def test_experience(self):
+        self.assertBumps(lambda: Experience.objects.create(
+            company='Acme', position='Engineer', description='Built things', start_date='2020-01-01',
+        ), reverse('home'), reverse('about'))
+
+    def test_education(self):
+        self.assertBumps(lambda: Education.objects.create(
+            institution='University', degree='BSc', field_of_study='Physics', start_date='2015-09-01',
+        ), reverse('about'), unchanged=[reverse('home')])
+
+    def test_cached_page_is_rendered_again_after_a_save(self):
+        url = reverse('projects')
+        first = self.client.get(url)
+        first.getvalue()
+        self.assertEqual(first['X-Page-Cache'], 'MISS')
+        self.assertEqual(self.client.get(url)['X-Page-Cache'], 'HIT')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.save()
+        self.assertEqual(self.client.get(url)['X-Page-Cache'], 'MISS')
+
+    def render_elsewhere(self, url):
+        """Take the render lock for url, as a concurrent request would"""
+        caches['default'].add(_entry_key(RequestFactory().get(url)) + ':lock', 1)
+
+    def test_cold_miss_renders_without_waiting_for_the_lock(self):
+        url = reverse('projects')
+        self.render_elsewhere(url)
+
+        response = self.client.get(url)
+
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        self.assertContains(response, 'Invalidated')
+
+    def test_stale_copy_served_while_another_request_renders(self):
+        url = reverse('projects')
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.save()
+        self.render_elsewhere(url)
+
+        response = self.client.get(url)
+
+        self.assertEqual(response['X-Page-Cache'], 'STALE')
+        self.assertIn('no-cache', response['Cache-Control'])
+
+
+@override_settings(**PAGE_SETTINGS)
+class PlaceholderTests(TestCase):
+    def setUp(self):
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        cache_dir = override_settings(PLACEHOLDER_CACHE_DIR=Path(workdir.name))
+        cache_dir.enable()
+        self.addCleanup(cache_dir.disable)
+
+    def test_signed_url_renders_and_is_cached(self):
+        url = placeholder_url('My project', 600, 400, 'webp')
+
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(self.client.get(url).content, response.content)
+
+    def test_project_cards_link_signed_urls(self):
+        create_project('Carded')
+
+        response = self.client.get(reverse('projects'))
+
+        self.assertContains(response, placeholder_url('Carded', 600, 400, 'webp'))
+
+    def test_unsigned_or_tampered_urls_are_not_found(self):
+        url = placeholder_url('My project', 600, 400, 'jpg')
+        signature = url.split('/')[2]
+
+        self.assertEqual(self.client.get(url.replace('My%20project', 'Other')).status_code, 404)
+        self.assertEqual(self.client.get(url.replace(signature, 'x' * len(signature))).status_code, 404)
+
+    def test_only_allowed_sizes_formats_and_text(self):
+        for url in (placeholder_url('My project', 601, 400, 'jpg'),
+                    placeholder_url('My project', 600, 400, 'png')):
+            self.assertEqual(self.client.get(url).status_code, 404, url)
+
+        with mock.patch('main.placeholders.placeholder_text', side_effect=lambda text: text):
+            url = placeholder_url('x' * 100, 600, 400, 'jpg')
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class LoadTestTests(SimpleTestCase):
+    async def serve(self, reader, writer):
+        # Every other request fails, as an overloaded server's might
+        failing = False
+        try:
+            while await reader.readuntil(b'\r\n\r\n'):
+                status = b'500 Internal Server Error' if failing else b'200 OK'
+                writer.write(b'HTTP/1.1 ' + status + b'\r\nContent-Length: 2\r\n\r\nok')
+                await writer.drain()
+                failing = not failing
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+
+    async def load(self):
+        server = await asyncio.start_server(self.serve, '127.0.0.1', 0)
+        async with server:
+            port = server.sockets[0].getsockname()[1]
+            return await run_load('127.0.0.1', port, Target('home', '/'), concurrency=2, duration=0.2)
+
+    def test_server_errors_are_counted(self):
+        summary = asyncio.run(self.load()).summary()
+
+        self.assertGreater(summary['requests'], 2)
+        self.assertEqual(summary['errors'], 0)
+        self.assertEqual(summary['server_errors'], summary['statuses']['500'])
+        self.assertGreater(summary['server_errors'], 0)
+
+
+@override_settings(**PAGE_SETTINGS)
+class PageSnapshotTests(TestCase):
+    def setUp(self):
+        clear_test_caches()
+
+    def stored_context(self, page):
+        return page_context(page) if PageSnapshot.objects.filter(pk=page).exists() else None
+
+    def test_content_saves_rebuild_the_snapshot(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            create_project('Snapshotted', 'Python, Rust', featured=True)
+
+        [project] = self.stored_context('home')['featured_projects']
+        self.assertEqual(project['title'], 'Snapshotted')
+        self.assertEqual([tech['slug'] for tech in project['tech_stack']], ['python', 'rust'])
+
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, 'Snapshotted')
+        self.assertContains(response, reverse('technology_projects', kwargs={'slug': 'rust'}))
+
+    def test_snapshots_hold_plain_values(self):
+        Experience.objects.create(company='Acme', position='Engineer', description='Built things',
+                                  start_date='2020-01-01')
+
+        context = page_context('about')
+
+        self.assertEqual(type(context['experiences'][0]), dict)
+        self.assertContains(self.client.get(reverse('about')), 'Jan 2020')
+
+    def test_reads_never_write(self):
+        Skill.objects.create(name='SQL', proficiency=80, category='Data')
+        PageSnapshot.objects.all().delete()
+
+        with CaptureQueriesContext(connection) as queries:
+            context = page_context('about')
+
+        self.assertTrue(all(query['sql'].startswith('SELECT') for query in queries), queries.captured_queries)
+
+        self.assertEqual(context['skill_groups'][0][0], 'Data')
+        self.assertFalse(PageSnapshot.objects.exists())
+
+    def test_warm_up_fills_missing_and_outdated_snapshots(self):
+        PageSnapshot.objects.all().delete()
+        PageSnapshot.objects.create(page='about', schema='outdated', data=b'')
+
+        self.assertEqual(fill_missing_snapshots(), ['home', 'about'])
+        self.assertEqual(fill_missing_snapshots(), [])
+
+
+@override_settings(**PAGE_SETTINGS)
+class BuildStaticTests(TestCase):
+    def setUp(self):
+        clear_test_caches()
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        self.root = Path(workdir.name)
+        site = override_settings(STATIC_SITE_ROOT=self.root)
+        site.enable()
+        self.addCleanup(site.disable)
+        self.project = create_project('Prerendered', 'Python')
+
+    def build(self):
+        output = StringIO()
+        call_command('build_static', '--output', str(self.root), '--jobs', '1', stdout=output, stderr=StringIO())
+        return output.getvalue()
+
+    def page(self, url):
+        return self.root / url.strip('/') / 'index.html'
+
+    def test_renders_every_public_page(self):
+        self.build()
+
+        for url in (reverse('home'), reverse('projects'), reverse('project_detail', kwargs={'pk': self.project.pk}),
+                    reverse('technology_projects', kwargs={'slug': 'python'})):
+            self.assertTrue(self.page(url).exists(), url)
+        self.assertIn('Prerendered', self.page(reverse('projects')).read_text())
+        self.assertFalse(self.page(reverse('search')).exists())
+
+    def test_repeat_build_renders_only_changed_pages(self):
+        self.build()
+
+        self.assertIn('Rendered 0 of', self.build())
+
+    def test_edits_delete_the_affected_pages_until_the_next_build(self):
+        self.build()
+        detail = reverse('project_detail', kwargs={'pk': self.project.pk})
+
+        self.project.title = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.save()
+
+        self.assertFalse(self.page(detail).exists())
+        self.assertFalse(self.page(reverse('projects')).exists())
+        self.assertTrue(self.page(reverse('about')).exists())
+        self.build()
+        self.assertIn('Renamed', self.page(detail).read_text())
+
+
+class ImageDerivativeTests(SimpleTestCase):
+    def setUp(self):
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        self.media = Path(workdir.name)
+        media = override_settings(MEDIA_ROOT=self.media)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def upload(self, name, size):
+        path = self.media / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        Image.new('RGB', size, 'red').save(path)
+        relative_dir = derivative_dir(name)
+        build_derivatives(path, self.media / relative_dir, relative_dir)
+
+    def test_derivatives_at_each_smaller_width_in_every_format(self):
+        self.upload('projects/large.png', (2000, 1000))
+
+        manifest = load_manifest('projects/large.png')
+
+        self.assertEqual(len(manifest), len(available_formats()))
+        self.assertEqual([width for width, _ in manifest['image/jpeg']], [320, 640, 960, 1280])
+        for width, name in manifest['image/jpeg']:
+            with Image.open(self.media / name) as derivative:
+                self.assertEqual(derivative.size, (width, width // 2))
+
+    def test_image_below_the_largest_width_keeps_its_own(self):
+        self.upload('projects/small.png', (400, 200))
+
+        self.assertEqual([width for width, _ in load_manifest('projects/small.png')['image/jpeg']], [320, 400])
+
+    def test_responsive_image_tag(self):
+        template = Template('{% load portfolio_images %}{% responsive_image name alt="Shot" %}')
+        self.assertIn('<img src="/media/projects/none.png"', template.render(Context({'name': 'projects/none.png'})))
+
+        self.upload('projects/large.png', (1000, 500))
+        html = template.render(Context({'name': 'projects/large.png'}))
+        self.assertIn('<picture>', html)
+        self.assertIn('/media/projects/derived/large/960w.jpg 960w', html)
+
+
+@override_settings(**PAGE_SETTINGS)
+class TechnologyTests(TestCase):
+    def setUp(self):
+        clear_test_caches()
+
+    def test_slugs(self):
+        self.assertEqual(technology_slug('Python'), 'python')
+        self.assertEqual(technology_slug('C++'), 'c-plus-plus')
+        self.assertEqual(technology_slug('C#'), 'c-sharp')
+        self.assertTrue(technology_slug('🐍').startswith('tech-'))
+
+    def test_saving_a_project_links_its_technologies(self):
+        project = create_project('Linked', 'Python, C++, python')
+
+        self.assertEqual(sorted(project.tech_stack.values_list('slug', flat=True)), ['c-plus-plus', 'python'])
+
+        project.technologies = 'Rust'
+        project.save()
+        self.assertEqual(list(project.tech_stack.values_list('slug', flat=True)), ['rust'])
+
+    def test_technology_page_lists_only_its_projects(self):
+        create_project('Snake', 'Python')
+        create_project('Crab', 'Rust')
+
+        response = self.client.get(reverse('technology_projects', kwargs={'slug': 'python'}))
+
+        self.assertContains(response, 'Snake')
+        self.assertNotContains(response, 'Crab')
+        self.assertEqual(self.client.get(reverse('technology_projects', kwargs={'slug': 'cobol'})).status_code, 404)
+
+    def test_technology_names_are_validated(self):
+        for technologies in ('Python, ' + 'x' * 101, 'Python, ++'):
+            with self.assertRaises(ValidationError):
+                Project(title='Invalid', description='About', technologies=technologies).full_clean()
+
+
+@override_settings(**PAGE_SETTINGS)
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        newest = timezone.now()
+        cls.projects = [create_project(f'Project {number}') for number in range(5)]
+        for age, project in enumerate(cls.projects):
+            project.created_date = newest - timedelta(minutes=age)
+        # A tie, broken by id
+        cls.projects[4].created_date = cls.projects[3].created_date
+        Project.objects.bulk_update(cls.projects, ['created_date'])
+
+    def setUp(self):
+        clear_test_caches()
+
+    def test_first_page(self):
+        page, cursor = keyset_page(Project.objects.all(), None, page_size=2)
+
+        self.assertEqual(page, self.projects[:2])
+        self.assertIsNotNone(cursor)
+
+    def test_pages_cover_every_row_once_and_the_last_has_no_cursor(self):
+        seen, cursor = [], None
+        for expected_size in (2, 2, 1):
+            page, cursor = keyset_page(Project.objects.all(), cursor, page_size=2)
+            self.assertEqual(len(page), expected_size)
+            seen += page
+        self.assertIsNone(cursor)
+        self.assertEqual(seen, self.projects)
+
+    def test_full_last_page_has_no_cursor(self):
+        page, cursor = keyset_page(Project.objects.all(), None, page_size=5)
+
+        self.assertEqual(len(page), 5)
+        self.assertIsNone(cursor)
+
+    def test_invalid_cursor_starts_from_the_first_page(self):
+        for cursor in ('not-a-cursor', '!!!', 'MjAyMHxhYmM'):
+            self.assertIsNone(decode_cursor(cursor))
+            page, _ = keyset_page(Project.objects.all(), cursor, page_size=2)
+            self.assertEqual(page, self.projects[:2])
+
+        response = self.client.get(reverse('projects'), {'after': 'not-a-cursor'})
+        self.assertContains(response, 'Project 0')
+
+    def test_json_listing_follows_next_links(self):
+        for number in range(PROJECTS_PAGE_SIZE):
+            create_project(f'Extra {number}')
+
+        titles, pages, url = [], 0, reverse('projects_json')
+        while url:
+            body = self.client.get(url).json()
+            titles += [result['title'] for result in body['results']]
+            pages += 1
+            url = body['next']
+
+        self.assertEqual(pages, 2)
+        self.assertEqual(titles, list(Project.objects.values_list('title', flat=True)))
+
+
+@override_settings(**PAGE_SETTINGS)
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.match = create_project('Quasar engine', 'Rust')
+        create_project('Unrelated', 'Python')
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+
+    def setUp(self):
+        clear_test_caches()
+
+    def test_search_view_highlights_matches(self):
+        response = self.client.get(reverse('search'), {'q': 'quas'})
+
+        self.assertContains(response, '<mark>Quasar</mark>')
+        self.assertNotContains(response, 'Unrelated')
+
+    def test_index_follows_edits_and_deletes(self):
+        self.match.title = self.match.description = 'Pulsar engine'
+        self.match.save()
+        self.assertNotContains(self.client.get(reverse('search'), {'q': 'quasar'}), 'engine')
+        self.assertContains(self.client.get(reverse('search'), {'q': 'pulsar'}), '<mark>Pulsar</mark>')
+
+        self.match.delete()
+        self.assertNotContains(self.client.get(reverse('search'), {'q': 'pulsar'}), 'engine')
+
+    def test_experience_and_education_are_searched(self):
+        Experience.objects.create(company='Acme', position='Engineer', description='Built telescopes',
+                                  start_date='2020-01-01')
+        Education.objects.create(institution='University', degree='BSc', field_of_study='Astronomy',
+                                 start_date='2015-09-01')
+
+        self.assertContains(self.client.get(reverse('search'), {'q': 'telescopes'}), 'Acme')
+        self.assertContains(self.client.get(reverse('search'), {'q': 'astronomy'}), 'University')
+
+    def test_search_view_without_words(self):
+        response = self.client.get(reverse('search'), {'q': '!!!'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'Quasar')
+
+    def test_admin_changelist_search(self):
+        self.client.force_login(self.admin)
+
+        response = self.client.get(reverse('admin:main_project_changelist'), {'q': 'quasar'})
+
+        self.assertEqual(list(response.context['cl'].result_list), [self.match])
+
+
+@override_settings(**PAGE_SETTINGS)
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        clear_test_caches()
+        self.project = create_project('Versioned')
+
+    def test_matching_etag_gets_304_without_running_the_view(self):
+        etag = self.client.get(reverse('projects'))['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('projects'), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_content_saves_change_the_validators(self):
+        first = self.client.get(reverse('home'))
+
+        self.project.save()
+
+        response = self.client.get(reverse('home'), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get(reverse('about'))['Last-Modified']
+
+        response = self.client.get(reverse('about'), HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_async_views(self):
+        @conditional_page
+        async def view(request):
+            return HttpResponse('Page')
+
+        etag = async_to_sync(view)(RequestFactory().get('/'))['ETag']
+        response = async_to_sync(view)(RequestFactory().get('/', HTTP_IF_NONE_MATCH=etag))
+
+        self.assertEqual(response.status_code, 304)
+
+
+@override_settings(**PAGE_SETTINGS)
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        clear_test_caches()
+        self.project = create_project('Awaited', 'Python', featured=True)
+
+    def get(self, view, path, *args, **kwargs):
+        request = AsyncRequestFactory().get(path)
+        response = async_to_sync(view)(request, *args, **kwargs)
+        return response.getvalue().decode() if response.streaming else response.content.decode()
+
+    def test_pages(self):
+        self.assertIn('Awaited', self.get(async_views.home, reverse('home')))
+        self.assertIn('Awaited', self.get(async_views.projects, reverse('projects')))
+        self.assertIn('Awaited', self.get(async_views.project_detail, '/', pk=self.project.pk))
+        self.assertIn('Awaited', self.get(async_views.technology_projects, '/', slug='python'))
+        self.assertIn('csrfmiddlewaretoken', self.get(async_views.contact_form, reverse('contact_form')))
+
+    def test_missing_rows_raise_404(self):
+        with self.assertRaises(Http404):
+            self.get(async_views.project_detail, '/', pk=self.project.pk + 1)
+        with self.assertRaises(Http404):
+            self.get(async_views.technology_projects, '/', slug='cobol')
+
+    def test_json_listing_matches_the_sync_view(self):
+        self.assertEqual(self.get(async_views.projects_json, reverse('projects_json')),
+                         self.client.get(reverse('projects_json')).content.decode())
+
+
+@override_settings(**PAGE_SETTINGS)
+class MetricsTests(TestCase):
+    def setUp(self):
+        clear_test_caches()
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        patcher = mock.patch.object(metrics, 'METRICS_DIR', Path(workdir.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_server_timing(self):
+        create_project('Timed')
+
+        response = self.client.get(reverse('projects'))
+
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn('tpl;dur=', timing)
+        self.assertIn('total;dur=', timing)
+
+    def test_metrics_endpoint_sums_requests_by_view(self):
+        self.client.get(reverse('about'))
+        self.client.get(reverse('about'))
+
+        response = self.client.get(reverse('metrics'))
+
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        # The registry lives as long as the process, so earlier tests count too
+        total = re.search(r'^portfolio_requests_total\{view="about",method="GET",status="200"\} (\d+)$',
+                          response.content.decode(), re.MULTILINE)
+        self.assertGreaterEqual(int(total[1]), 2)
+        self.assertContains(response, '# TYPE portfolio_request_duration_seconds histogram')
+
+    def test_metrics_endpoint_is_restricted(self):
+        response = self.client.get(reverse('metrics'), HTTP_X_REAL_IP='203.0.113.7')
+
+        self.assertEqual(response.status_code, 403)
+
+
+@override_settings(**PAGE_SETTINGS)
+@mock.patch('main.writer.DATABASE_WRITE_QUEUE', True)
+class WriteQueueTests(TransactionTestCase):
+    def test_writes_run_on_the_writer_thread(self):
+        def write():
+            Skill.objects.create(name='SQL', proficiency=80, category='Data')
+            return threading.current_thread().name
+
+        self.assertEqual(run_write(write), 'db-writer')
+        self.assertTrue(Skill.objects.filter(name='SQL').exists())
+
+    def test_a_failed_write_leaves_the_rest_of_its_batch(self):
+        def write(name):
+            Skill.objects.create(name=name, proficiency=80, category='Data')
+            if name == 'Failing':
+                raise ValueError(name)
+
+        errors = []
+
+        def submit(name):
+            try:
+                run_write(write, name)
+            except ValueError as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=submit, args=(name,)) for name in ('One', 'Failing', 'Two')]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([str(error) for error in errors], ['Failing'])
+        self.assertEqual(sorted(Skill.objects.values_list('name', flat=True)), ['One', 'Two'])
+
+
+class WalBackendTests(SimpleTestCase):
+    def test_connections_use_wal_and_the_tuned_pragmas(self):
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        settings_dict = {**connection.settings_dict, 'NAME': str(Path(workdir.name, 'wal.sqlite3')),
+                         'OPTIONS': {'pragmas': {'cache_size': -1000}}}
+        wrapper = WalDatabaseWrapper(settings_dict, alias='wal')
+        self.addCleanup(wrapper.close)
+
+        with wrapper.cursor() as cursor:
+            pragmas = {name: cursor.execute(f'PRAGMA {name}').fetchone()[0]
+                       for name in ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size')}
+
+        self.assertEqual(pragmas, {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 5000, 'cache_size': -1000})
+
+
+class AssetPipelineTests(SimpleTestCase):
+    def test_minify_css_keeps_strings(self):
+        source = 'a , b  {\n  color: red ;  /* note */\n  content: "a  /* b */";\n}\n'
+
+        self.assertEqual(assets.minify_css(source), 'a,b{color:red;content:"a  /* b */"}')
+
+    def test_minify_js_only_strips_comments_and_indentation(self):
+        source = '  // setup\n  /* note */ run();\n  var url = "http://x";  \n\n  /*\n   * block\n   */\n  done();\n'
+
+        self.assertEqual(assets.minify_js(source), 'run();\nvar url = "http://x";\ndone();')
+
+    def test_bundles_guard_against_missing_semicolons(self):
+        self.assertEqual(assets.build_bundle('site.js', ['a()', 'b()']), 'a()\n;b()')
+        self.assertEqual(assets.build_bundle('site.css', ['a { }', 'b { }']), 'a{}\nb{}')
+
+    def test_critical_css_keeps_rules_for_markup_above_the_fold(self):
+        css = ('.hero{color:red}.footer{color:blue}.hero:hover{color:green}'
+               '@media (min-width:1px){.hero h1{margin:0}.footer{margin:0}}'
+               '.hero{animation:fade 1s}@keyframes fade{from{opacity:0}}@keyframes unused{to{opacity:1}}')
+        tokens = assets.markup_tokens('<section class="hero {{ extra }}"><h1>Title</h1></section>')
+
+        self.assertEqual(assets.critical_css(css, tokens),
+                         '.hero{color:red}@media (min-width:1px){.hero h1{margin:0}}.hero{animation:fade 1s}'
+                         '@keyframes fade{from{opacity:0}}')
+
+    def test_every_page_template_gets_critical_css(self):
+        pages = list(assets.page_templates())
+
+        self.assertIn('main/home.html', pages)
+        self.assertNotIn('main/_project_cards.html', pages)
+        self.assertEqual(assets.critical_css_name('main/home.html'), 'css/critical/main-home.css')
+        self.assertIn('navbar', assets.above_the_fold('main/home.html'))
+
+
+class StaticImageTests(SimpleTestCase):
+    def setUp(self):
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        self.workdir = Path(workdir.name)
+
+    def source(self, name, **save_options):
+        # A gradient with little detail, saved wastefully
+        image = Image.linear_gradient('L').convert('RGB').resize((320, 240))
+        path = self.workdir / name
+        image.save(path, **save_options)
+        return path
+
+    def test_smaller_encodings_are_cached(self):
+        source = self.source('photo.jpg', quality=100)
+
+        outputs = optimize_static_image(source, self.workdir / 'cache')
+
+        self.assertIn('webp', outputs)
+        for path in outputs.values():
+            self.assertLess(Path(path).stat().st_size, source.stat().st_size)
+        with mock.patch('main.images.Image.open', side_effect=AssertionError('re-encoded')):
+            self.assertEqual(optimize_static_image(source, self.workdir / 'cache'), outputs)
+
+    def test_recompressed_jpeg_keeps_its_orientation(self):
+        exif = Image.Exif()
+        exif[ORIENTATION_TAG] = 6
+        source = self.source('rotated.jpg', quality=100, exif=exif)
+
+        outputs = optimize_static_image(source, self.workdir / 'cache')
+
+        with Image.open(outputs['']) as recompressed:
+            self.assertEqual(recompressed.getexif()[ORIENTATION_TAG], 6)
+        with Image.open(outputs['webp']) as sibling:
+            # Siblings are turned upright instead
+            self.assertEqual(sibling.size, (240, 320))
+
+
+@override_settings(**PAGE_SETTINGS)
+class WarmUpTests(TestCase):
+    @mock.patch('main.warmup.gc')
+    def test_prepare_for_fork(self, gc):
+        gc.get_freeze_count.return_value = 1000
+        PageSnapshot.objects.all().delete()
+
+        stats = prepare_for_fork()
+
+        self.assertGreater(stats['templates'], 5)
+        self.assertGreater(stats['url_names'], 5)
+        self.assertEqual(stats['snapshots'], 2)
+        self.assertEqual(stats['frozen_objects'], 1000)
+        # Collect first so the frozen generation holds no garbage
+        self.assertEqual([call[0] for call in gc.method_calls[:2]], ['collect', 'freeze'])
+
+
+@override_settings(**PAGE_SETTINGS)
+class GenerateDatasetTests(TestCase):
+    def generate(self, seed=1):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('generate_dataset', '--projects', '30', '--skills', '5', '--contacts', '10',
+                         '--batch-size', '7', '--image-ratio', '0', '--seed', str(seed), stdout=StringIO())
+
+    def test_bulk_load_does_the_signal_handlers_work(self):
+        clear_test_caches()
+        before = page_version(reverse('projects'))
+
+        self.generate()
+
+        self.assertEqual((Project.objects.count(), Skill.objects.count(), Contact.objects.count()), (30, 5, 10))
+        for project in Project.objects.all()[:5]:
+            self.assertEqual({technology_slug(name) for name in project.get_technologies_list()},
+                             set(project.tech_stack.values_list('slug', flat=True)))
+        title = Project.objects.first().title
+        self.assertContains(self.client.get(reverse('search'), {'q': title}), title)
+        self.assertGreater(page_version(reverse('projects')), before)
+        self.assertTrue(PageSnapshot.objects.filter(page='home').exists())
+
+    def test_same_seed_same_data(self):
+        self.generate()
+        first = list(Project.objects.order_by('pk').values_list('title', 'technologies', 'created_date'))
+        Project.objects.all().delete()
+
+        self.generate()
+
+        self.assertEqual(list(Project.objects.order_by('pk').values_list('title', 'technologies', 'created_date')),
+                         first)
+
+
+@override_settings(**PAGE_SETTINGS)
+class ContentBundleTests(TestCase):
+    def setUp(self):
+        clear_test_caches()
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        self.bundle = os.path.join(workdir.name, 'content.tar.gz')
+
+    def test_export_import_round_trip(self):
+        project = create_project('Bundled', 'Python, C++', featured=True)
+        skill = Skill.objects.create(name='SQL', proficiency=80, category='Data')
+        experience = Experience.objects.create(
+            company='Acme', position='Engineer', description='Built things', start_date='2020-01-01',
+        )
+        education = Education.objects.create(
+            institution='University', degree='BSc', field_of_study='Physics', start_date='2015-09-01',
+        )
+        contact = Contact.objects.create(**CONTACT_POST)
+
+        call_command('export_content', self.bundle, '--no-media', stderr=StringIO())
+        for model in (Project, Technology, Skill, Experience, Education, Contact):
+            model.objects.all().delete()
+        call_command('import_content', self.bundle, stdout=StringIO())
+
+        imported = Project.objects.get(pk=project.pk)
+        self.assertEqual((imported.title, imported.featured), ('Bundled', True))
+        self.assertEqual(set(imported.tech_stack.values_list('slug', flat=True)), {'python', 'c-plus-plus'})
+        self.assertEqual(Skill.objects.get(pk=skill.pk).name, 'SQL')
+        self.assertEqual(Experience.objects.get(pk=experience.pk).company, 'Acme')
+        self.assertEqual(Education.objects.get(pk=education.pk).institution, 'University')
+        self.assertEqual(Contact.objects.get(pk=contact.pk).email, 'ada@example.com')
+        self.assertContains(self.client.get(reverse('search'), {'q': 'bundled'}), '<mark>Bundled</mark>')
+
+    def test_import_updates_existing_rows(self):
+        project = create_project('Original')
+        call_command('export_content', self.bundle, '--no-media', stderr=StringIO())
+        Project.objects.filter(pk=project.pk).update(title='Edited since')
+
+        call_command('import_content', self.bundle, stdout=StringIO())
+
+        self.assertEqual(Project.objects.get().title, 'Original')
+
+
+@override_settings(**PAGE_SETTINGS)
+@mock.patch.object(ContactAdmin, 'list_per_page', 2)
+class ContactChangelistTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        dates = ['2023-03-01', '2023-03-15', '2023-07-04', '2024-01-10', '2024-01-20']
+        cls.contacts = []
+        for number, day in enumerate(dates):
+            contact = Contact.objects.create(**{**CONTACT_POST, 'name': f'Sender {number}'})
+            Contact.objects.filter(pk=contact.pk).update(created_date=f'{day}T12:00:00Z')
+            cls.contacts.append(contact)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def changelist(self, query=''):
+        return self.client.get(reverse('admin:main_contact_changelist') + query)
+
+    def test_keyset_pages_cover_every_row_newest_first(self):
+        names, query = [], ''
+        while query is not None:
+            changelist = self.changelist(query).context['cl']
+            names += [contact.name for contact in changelist.result_list]
+            query = changelist.older_url
+
+        self.assertEqual(names, [f'Sender {number}' for number in range(4, -1, -1)])
+        self.assertEqual(changelist.result_count, 5)
+
+    def test_newer_link_returns_to_the_previous_page(self):
+        first = self.changelist().context['cl']
+        second = self.changelist(first.older_url).context['cl']
+
+        back = self.changelist(second.newer_url).context['cl']
+
+        self.assertEqual(back.result_list, first.result_list)
+
+    def test_date_buckets(self):
+        changelist = self.changelist('?bucket=2023').context['cl']
+        self.assertEqual(changelist.result_count, 3)
+        [date_filter] = changelist.filter_specs
+        self.assertEqual([bucket for bucket, _ in date_filter.lookup_choices], ['2023-07', '2023-03'])
+
+        changelist = self.changelist('?bucket=2023-03').context['cl']
+        self.assertEqual(changelist.result_count, 2)
+        [date_filter] = changelist.filter_specs
+        self.assertEqual([bucket for bucket, _ in date_filter.lookup_choices], ['2023', '2023-03-15', '2023-03-01'])
+
+        self.assertEqual(self.changelist('?bucket=2023-03-15').context['cl'].result_count, 1)
+
+    def test_search_matches_word_prefixes(self):
+        Contact.objects.create(**{**CONTACT_POST, 'name': 'Grace Hopper'})
+
+        changelist = self.changelist('?q=hopp').context['cl']
+
+        self.assertEqual([contact.name for contact in changelist.result_list], ['Grace Hopper'])
+        self.assertEqual(changelist.result_count, 1)
+
+
+@override_settings(**PAGE_SETTINGS)
+class ProjectCacheTests(TestCase):
+    def setUp(self):
+        clear_test_caches()
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        self.path = str(Path(workdir.name, 'generations.bin'))
+        patcher = mock.patch.object(project_cache, 'generations', GenerationFile(self.path))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        project_cache.clear()
+        self.addCleanup(project_cache.clear)
+
+    def test_bumps_are_seen_by_every_mapping_of_the_file(self):
+        # As if in two worker processes
+        worker, admin = GenerationFile(self.path, slots=8), GenerationFile(self.path, slots=8)
+
+        admin.bump(3, 11)
+
+        self.assertEqual((worker.read(3), worker.read(11), worker.read(4)), (1, 1, 0))
+
+    def test_lru_keeps_the_most_recently_used(self):
+        lru = LocalLRU(GenerationFile(self.path), max_entries=2)
+        for key in (1, 2):
+            lru.set(key, lru.generation(key), f'value {key}')
+        lru.get(1)
+
+        lru.set(3, lru.generation(3), 'value 3')
+
+        self.assertEqual((lru.get(1), lru.get(2), lru.get(3)), ('value 1', None, 'value 3'))
+
+    def test_project_detail_is_served_from_the_cache_until_saved(self):
+        project = create_project('Cached')
+        url = reverse('project_detail', kwargs={'pk': project.pk})
+        self.client.get(url)
+        clear_test_caches()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertContains(self.client.get(url), 'Cached')
+        self.assertFalse(any('main_project' in query['sql'] for query in queries), queries.captured_queries)
+
+        project.title = 'Edited'
+        with self.captureOnCommitCallbacks(execute=True):
+            project.save()
+        self.assertContains(self.client.get(url), 'Edited')
+
+
+
+@override_settings(**PAGE_SETTINGS)
+class PreloadTests(TestCase):
+    def setUp(self):
+        clear_test_caches()
+        patcher = mock.patch.dict(preload._links_by_view, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_link_header_lists_the_page_assets(self):
+        response = self.client.get(reverse('home'))
+
+        links = response['Link'].split(', ')
+        self.assertTrue(any(link.endswith('as=style') for link in links), links)
+        self.assertTrue(any(link.endswith('as=script') for link in links), links)
+        self.assertEqual(preload.view_links('home'), links)
+
+    def test_cached_pages_keep_their_links(self):
+        first = self.client.get(reverse('home'))
+        preload._links_by_view.clear()
+
+        second = self.client.get(reverse('home'))
+
+        self.assertEqual(second['Link'], first['Link'])
+
+    def test_no_links_for_non_html_responses(self):
+        response = self.client.get(reverse('projects_json'))
+
+        self.assertNotIn('Link', response)
+
+    def test_record_preload_outside_a_request(self):
+        preload.record_preload('/static/site.css', 'style')
+
+        self.assertEqual(preload.recorded_links(), [])
+
+    def test_early_hints_sent_when_the_server_supports_them(self):
+        preload._links_by_view['home'] = ['</static/site.css>; rel=preload; as=style']
+        sent = []
+
+        async def application(scope, receive, send):
+            await send({'type': 'http.response.start', 'status': 200})
+
+        async def send(message):
+            sent.append(message)
+
+        app = preload.early_hints(application)
+        scope = {'type': 'http', 'method': 'GET', 'path': reverse('home')}
+        async_to_sync(app)(scope, None, send)
+        async_to_sync(app)(dict(scope, extensions={preload.EARLY_HINT_EXTENSION: {}}), None, send)
+
+        self.assertEqual([message['type'] for message in sent],
+                         ['http.response.start', preload.EARLY_HINT_EXTENSION, 'http.response.start'])
+        self.assertEqual(sent[1]['links'], [b'</static/site.css>; rel=preload; as=style'])
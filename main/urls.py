@@ -1,10 +1,27 @@
-from django.urls import path
-from . import views
+from django.conf import settings
+from django.urls import path, register_converter
+
+from .metrics import metrics_view
+from .placeholders import ImageFormatConverter, placeholder_view
+
+if settings.ASYNC_VIEWS:
+    from . import async_views as views
+else:
+    from . import views
+
+register_converter(ImageFormatConverter, 'imgfmt')
 
 urlpatterns = [
     path('', views.home, name='home'),
     path('about/', views.about, name='about'),
     path('projects/', views.projects, name='projects'),
+    path('projects.json', views.projects_json, name='projects_json'),
+    path('projects/tech/<slug:slug>/', views.technology_projects, name='technology_projects'),
     path('projects/<int:pk>/', views.project_detail, name='project_detail'),
+    path('search/', views.search, name='search'),
     path('contact/', views.contact, name='contact'),
+    path('_frag/contact-form', views.contact_form, name='contact_form'),
+    path('metrics', metrics_view, name='metrics'),
+    path('placeholder/<str:signature>/<int:width>x<int:height>/<str:text>.<imgfmt:fmt>', placeholder_view,
+         name='placeholder'),
 ]
@@ -0,0 +1,92 @@
+"""
+Site-wide content version used to answer conditional GETs.
+
+Every save or delete of public content bumps the single ContentVersion
+row (see main/signals.py). Public views derive their ETag and
+Last-Modified from that row plus a digest of the deployed templates and
+static manifest, so a revalidation costs one primary-key lookup and
+returns 304 without running the view or touching the template engine.
+"""
+import asyncio
+import calendar
+import hashlib
+from functools import lru_cache, wraps
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import condition
+
+from .models import ContentVersion
+
+
+def bump_content_version():
+    updated = ContentVersion.objects.filter(pk=1).update(version=F('version') + 1, updated_at=timezone.now())
+    if not updated:
+        ContentVersion.objects.get_or_create(pk=1, defaults={'version': 1})
+
+
+def templates_digest():
+    """Fingerprint of the templates and static manifest shared by every page"""
+    digest = hashlib.sha1()
+    sources = sorted(Path(settings.BASE_DIR, 'templates').rglob('*.html'))
+    sources.append(Path(settings.STATIC_ROOT, 'staticfiles.json'))
+    for source in sources:
+        if source.exists():
+            digest.update(str(source).encode())
+            digest.update(source.read_bytes())
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def deploy_digest():
+    # Templates only change on deploy, which restarts the workers
+    return templates_digest()[:12]
+
+
+def content_stamp(request):
+    """(version, updated_at) of the site content, looked up once per request"""
+    if not hasattr(request, '_content_stamp'):
+        stamp = ContentVersion.objects.filter(pk=1).values_list('version', 'updated_at').first()
+        request._content_stamp = stamp or (0, None)
+    return request._content_stamp
+
+
+def page_etag(request, *args, **kwargs):
+    version, _ = content_stamp(request)
+    return f'{version}-{deploy_digest()}'
+
+
+def page_last_modified(request, *args, **kwargs):
+    return content_stamp(request)[1]
+
+
+_sync_conditional_page = condition(etag_func=page_etag, last_modified_func=page_last_modified)
+
+
+def conditional_page(view_func):
+    """Answer If-None-Match / If-Modified-Since for a sync or async public view"""
+    if not asyncio.iscoroutinefunction(view_func):
+        return _sync_conditional_page(view_func)
+
+    # Django's condition() is sync-only, so mirror it for async views
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        version, updated_at = await sync_to_async(content_stamp)(request)
+        etag = quote_etag(f'{version}-{deploy_digest()}')
+        last_modified = calendar.timegm(updated_at.utctimetuple()) if updated_at else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = await view_func(request, *args, **kwargs)
+
+        if request.method in ('GET', 'HEAD'):
+            if last_modified and not response.has_header('Last-Modified'):
+                response.headers['Last-Modified'] = http_date(last_modified)
+            response.headers.setdefault('ETag', etag)
+        return response
+    return wrapper
@@ -1,80 +1,149 @@
 from django.shortcuts import render, get_object_or_404, redirect
+from django.http import JsonResponse
+from django.utils.cache import add_never_cache_headers
+from django.template.loader import render_to_string
+from django.urls import reverse
 from django.contrib import messages
-from django.core.mail import send_mail
 from django.conf import settings
-from .models import Project, Skill, Experience, Education, Contact
+from .models import Project, Technology
 from .forms import ContactForm
+from .local_cache import project_cache
+from .cache import cache_public_page
+from .versioning import conditional_page
+from .pagination import keyset_page
+from .outbox import queue_mail
+from .ratelimit import rate_limit_posts
+from .search import search as search_index
+from .snapshots import page_context
+from .streaming import stream_render
+from .writer import run_write
 
+@conditional_page
+@cache_public_page
 def home(request):
     """Home page view with featured projects and skills"""
-    featured_projects = Project.objects.filter(featured=True)[:3]
-    skills = Skill.objects.all()
-    recent_experience = Experience.objects.first()
-    
-    context = {
-        'featured_projects': featured_projects,
-        'skills': skills,
-        'recent_experience': recent_experience,
-    }
-    return render(request, 'main/home.html', context)
+    return stream_render(request, 'main/home.html', deferred=lambda: page_context('home'))
 
+@conditional_page
+@cache_public_page
 def about(request):
     """About page with experience and education"""
-    experiences = Experience.objects.all()
-    education = Education.objects.all()
-    skills = Skill.objects.all()
+    return stream_render(request, 'main/about.html', deferred=lambda: page_context('about'))
+
+def render_project_list(request, queryset, extra_context=None):
+    """Render one keyset page of projects, as a full page or a grid fragment"""
+    def project_page():
+        page, next_cursor = keyset_page(queryset.prefetch_related('tech_stack'), request.GET.get('after'))
+        return {
+            'projects': page,
+            'next_page_url': f'?after={next_cursor}' if next_cursor else None,
+        }
     
-    context = {
-        'experiences': experiences,
-        'education': education,
-        'skills': skills,
-    }
-    return render(request, 'main/about.html', context)
+    if request.GET.get('fragment'):
+        return render(request, 'main/_project_cards.html', {**project_page(), **(extra_context or {})})
+    return stream_render(request, 'main/projects.html', extra_context, deferred=project_page)
 
+@conditional_page
+@cache_public_page
 def projects(request):
-    """Projects page showing all projects"""
-    all_projects = Project.objects.all()
-    
-    context = {
-        'projects': all_projects,
+    """Projects page showing all projects, one keyset page at a time"""
+    return render_project_list(request, Project.objects.all())
+
+def project_listing_json(page, next_cursor):
+    """JSON body for one keyset page of projects"""
+    results = [{
+        'id': project.pk,
+        'title': project.title,
+        'url': reverse('project_detail', kwargs={'pk': project.pk}),
+        'image': project.image.url if project.image else None,
+        'technologies': [tech.name for tech in project.tech_stack.all()],
+        'featured': project.featured,
+        'created_date': project.created_date.isoformat(),
+    } for project in page]
+    return {
+        'results': results,
+        'next': f"{reverse('projects_json')}?after={next_cursor}" if next_cursor else None,
     }
-    return render(request, 'main/projects.html', context)
 
+@conditional_page
+@cache_public_page
+def projects_json(request):
+    """JSON listing of projects with a cursor for the next page"""
+    page, next_cursor = keyset_page(Project.objects.prefetch_related('tech_stack'), request.GET.get('after'))
+    
+    return JsonResponse(project_listing_json(page, next_cursor))
+
+@conditional_page
+@cache_public_page
+def technology_projects(request, slug):
+    """Projects built with a single technology"""
+    technology = get_object_or_404(Technology, slug=slug)
+    return render_project_list(request, technology.projects.all(), {'technology': technology})
+
+@conditional_page
+@cache_public_page
 def project_detail(request, pk):
     """Individual project detail page"""
-    project = get_object_or_404(Project, pk=pk)
+    entry = project_cache.get(pk)
+    if entry is None:
+        generation = project_cache.generation(pk)
+        project = get_object_or_404(Project.objects.prefetch_related('tech_stack'), pk=pk)
+        entry = project, render_to_string('main/_project_detail.html', {'project': project})
+        project_cache.set(pk, generation, entry)
+    project, body = entry
     
     context = {
         'project': project,
+        'project_body': body,
+    }
+    return stream_render(request, 'main/project_detail.html', context)
+
+@conditional_page
+def search(request):
+    """Full-text search across projects, experience and education"""
+    query = request.GET.get('q', '').strip()
+    
+    context = {
+        'query': query,
     }
-    return render(request, 'main/project_detail.html', context)
+    return stream_render(request, 'main/search.html', context,
+                         deferred=lambda: {'results': search_index(query) if query else []})
+
+def _save_contact_message(form):
+    contact_message = form.save()
+    queue_mail(
+        subject=f"Portfolio Contact: {contact_message.subject}",
+        message=f"From: {contact_message.name} ({contact_message.email})\n\n{contact_message.message}",
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient_list=settings.CONTACT_EMAIL_RECIPIENTS,
+    )
+    return contact_message
 
+def save_contact_message(form):
+    """Save the message and queue the notification email together"""
+    # `manage.py run_outbox` delivers the email outside the request
+    return run_write(_save_contact_message, form)
+
+@rate_limit_posts('contact', per_ip=settings.CONTACT_RATE_LIMIT_PER_IP,
+                  global_=settings.CONTACT_RATE_LIMIT_GLOBAL)
+@conditional_page
+@cache_public_page
 def contact(request):
-    """Contact page with contact form"""
+    """Contact page; the form is loaded from contact_form unless it has errors to show"""
     if request.method == 'POST':
         form = ContactForm(request.POST)
         if form.is_valid():
-            # Save the contact message
-            contact_message = form.save()
-            
-            # Send email notification (optional)
-            try:
-                send_mail(
-                    subject=f"Portfolio Contact: {contact_message.subject}",
-                    message=f"From: {contact_message.name} ({contact_message.email})\n\n{contact_message.message}",
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=['your-email@example.com'],  # Replace with your email
-                    fail_silently=False,
-                )
-            except Exception as e:
-                print(f"Email sending failed: {e}")
-            
+            save_contact_message(form)
             messages.success(request, 'Thank you for your message! I will get back to you soon.')
             return redirect('contact')
-    else:
-        form = ContactForm()
-    
-    context = {
-        'form': form,
-    }
-    return render(request, 'main/contact.html', context)
+        # Rendered here, so its CSRF token and messages are settled before
+        # the streamed page's headers go out
+        contact_form = render_to_string('main/_contact_form.html', {'form': form}, request)
+        return stream_render(request, 'main/contact.html', {'contact_form': contact_form})
+    return stream_render(request, 'main/contact.html')
+
+def contact_form(request):
+    """The contact form with its CSRF token and any flash messages"""
+    response = render(request, 'main/_contact_form.html', {'form': ContactForm()})
+    add_never_cache_headers(response)
+    return response
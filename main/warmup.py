@@ -0,0 +1,65 @@
+"""
+Warm-up run in the gunicorn master before it forks the workers.
+
+With preload_app the master imports Django once. prepare_for_fork() then
+does the work every worker would otherwise repeat lazily on its first
+requests:
+- compile every template into the cached loader
+- populate the URL resolver
+- load the static files manifest
+- fill any page snapshots a deploy left missing or outdated
+
+Finally it moves everything onto gc.freeze()'s permanent generation.
+The collector then never touches those objects, so their pages stay
+shared copy-on-write between the master and all workers instead of being
+copied into each worker by the first garbage collection.
+"""
+import gc
+import time
+from pathlib import Path
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.db import connections
+from django.template import engines
+from django.urls import get_resolver
+
+from .snapshots import fill_missing_snapshots
+from .versioning import deploy_digest
+
+
+def compile_templates():
+    """Load every template under the project template dirs; return how many"""
+    count = 0
+    for engine in engines.all():
+        for directory in engine.dirs:
+            for path in sorted(Path(directory).rglob('*.html')):
+                engine.get_template(path.relative_to(directory).as_posix())
+                count += 1
+    return count
+
+
+def resolve_urls():
+    """Build the resolver's reverse and namespace dicts; return the route count"""
+    resolver = get_resolver()
+    return len(resolver.reverse_dict) + len(resolver.namespace_dict)
+
+
+def prepare_for_fork():
+    started = time.perf_counter()
+    stats = {
+        'templates': compile_templates(),
+        'url_names': resolve_urls(),
+    }
+    # Manifest and deploy digest are read lazily and then cached per process
+    if hasattr(staticfiles_storage, 'hashed_files'):
+        stats['static_files'] = len(staticfiles_storage.hashed_files)
+    deploy_digest()
+    stats['snapshots'] = len(fill_missing_snapshots())
+
+    # A SQLite handle must never be shared across fork()
+    connections.close_all()
+    gc.collect()
+    gc.freeze()
+    stats['frozen_objects'] = gc.get_freeze_count()
+    stats['seconds'] = round(time.perf_counter() - started, 3)
+    return stats
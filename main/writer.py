@@ -0,0 +1,88 @@
+"""
+Single-writer path with group commit for writes made by requests.
+
+SQLite allows one writer at a time, and each commit costs a WAL append
+plus a lock round-trip. With DATABASE_WRITE_QUEUE enabled, run_write()
+hands the write to one writer thread per worker process instead of
+running it in the request thread. The writer takes whatever writes have
+queued up while the previous batch was committing and runs them all in a
+single transaction, each in its own savepoint so one failure doesn't
+undo the others. Request threads then only ever read, and never queue
+up on the write lock.
+"""
+import os
+import queue
+import threading
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+DATABASE_WRITE_QUEUE = getattr(settings, 'DATABASE_WRITE_QUEUE', False)
+WRITE_BATCH_SIZE = getattr(settings, 'WRITE_BATCH_SIZE', 64)
+
+
+class _Writer:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pid = None
+        self.queue = None
+
+    def submit(self, func, args, kwargs):
+        future = Future()
+        self._queue().put((future, func, args, kwargs))
+        return future.result()
+
+    def _queue(self):
+        with self.lock:
+            # The thread doesn't survive a fork, so start one per worker process
+            if self.pid != os.getpid():
+                self.pid = os.getpid()
+                self.queue = queue.SimpleQueue()
+                threading.Thread(target=self._run, args=(self.queue,), name='db-writer', daemon=True).start()
+            return self.queue
+
+    def _run(self, pending):
+        while True:
+            batch = [pending.get()]
+            while len(batch) < WRITE_BATCH_SIZE:
+                try:
+                    batch.append(pending.get_nowait())
+                except queue.Empty:
+                    break
+            self._commit(batch)
+
+    def _commit(self, batch):
+        outcomes = []
+        try:
+            with transaction.atomic():
+                for future, func, args, kwargs in batch:
+                    try:
+                        with transaction.atomic():
+                            outcomes.append((future, func(*args, **kwargs), None))
+                    except Exception as exc:
+                        outcomes.append((future, None, exc))
+        except Exception as exc:
+            # The commit itself failed, so none of the batch was written
+            outcomes = [(future, None, exc) for future, *_ in batch]
+        finally:
+            close_old_connections()
+
+        for future, result, exc in outcomes:
+            if exc is None:
+                future.set_result(result)
+            else:
+                future.set_exception(exc)
+
+
+_writer = _Writer()
+
+
+def run_write(func, *args, **kwargs):
+    """Run `func` in a transaction, through the writer thread when enabled"""
+    # A caller already inside a transaction holds the write lock (and its
+    # uncommitted rows), so the writer thread would only wait on it
+    if not DATABASE_WRITE_QUEUE or connection.in_atomic_block:
+        with transaction.atomic():
+            return func(*args, **kwargs)
+    return _writer.submit(func, args, kwargs)
@@ -28,6 +28,10 @@ DEBUG = os.environ.get('DEBUG', 'True').lower() == 'true'
 
 ALLOWED_HOSTS = ['*']  # Configure this properly for production
 
+# Serve the async views in main/async_views.py; enable when running under
+# ASGI workers (gunicorn_asgi.conf.py)
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', 'False').lower() == 'true'
+
 
 # Application definition
 
@@ -42,8 +46,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'main.metrics.MetricsMiddleware',  # Outermost, so it times everything below
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'main.preload.PreloadMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -56,7 +62,7 @@ ROOT_URLCONF = 'portfolio.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'main.metrics.InstrumentedDjangoTemplates',  # Records render time
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -76,13 +82,102 @@ WSGI_APPLICATION = 'portfolio.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# SQLITE_WAL=true switches to the production SQLite mode: WAL and tuned
+# pragmas (main/sqlite_wal), connections kept open across requests, and
+# request writes funnelled through one group-committing writer thread per
+# worker (main/writer.py). Either way transactions begin IMMEDIATE
+# (main/sqlite_immediate), so concurrent writers wait rather than fail
+SQLITE_WAL = os.environ.get('SQLITE_WAL', 'False').lower() == 'true'
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'ENGINE': 'main.sqlite_wal' if SQLITE_WAL else 'main.sqlite_immediate',
+        'NAME': os.environ.get('DATABASE_PATH', BASE_DIR / 'db.sqlite3'),
+        'CONN_MAX_AGE': None if SQLITE_WAL else 0,
     }
 }
 
+DATABASE_WRITE_QUEUE = SQLITE_WAL
+
+
+# Cache
+# File-based so every gunicorn worker shares the same page cache
+
+CACHE_LOCATION = Path(os.environ.get('CACHE_LOCATION', BASE_DIR / 'cache'))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_LOCATION,
+    },
+    # Page version counters (main/cache.py): never expired or culled, so
+    # however many page variants fill the default cache, no stale copy
+    # can match a version that was forgotten and started again from 0
+    'page_versions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_LOCATION / 'versions',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 10 ** 9},
+    },
+}
+
+# Seconds a cached public page is served fresh, and how long a stale copy
+# may still be served while one request re-renders it
+PAGE_CACHE_TIMEOUT = 600
+PAGE_CACHE_STALE_WHILE_REVALIDATE = 60
+# How long nginx and other shared caches may serve a public page before
+# asking again; content edits take up to this long to show through them
+PAGE_CACHE_SHARED_MAX_AGE = 60
+
+# Per-worker LRU of project detail pages (main/local_cache.py); saves bump
+# a counter in this memory-mapped file, which every worker checks on a hit
+PROJECT_CACHE_SIZE = 512
+PROJECT_CACHE_GENERATIONS = os.environ.get('PROJECT_CACHE_GENERATIONS', BASE_DIR / 'project-generations.bin')
+
+
+# Email
+# Contact form notifications are queued in the outbox and sent by
+# `manage.py run_outbox`; use `manage.py dummy_smtp` with EMAIL_PORT=1025 locally
+
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 25))
+CONTACT_EMAIL_RECIPIENTS = ['your-email@example.com']  # Replace with your email
+
+OUTBOX_MAX_ATTEMPTS = 8
+OUTBOX_BACKOFF_SECONDS = 30
+
+
+# Contact form admission control (see main/ratelimit.py)
+# Budgets are (burst capacity, tokens refilled per minute)
+
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+RATE_LIMIT_DB = os.environ.get('RATE_LIMIT_DB', BASE_DIR / 'ratelimit.sqlite3')
+RATE_LIMIT_IP_HEADER = 'HTTP_X_REAL_IP'  # Set by nginx in front of gunicorn
+CONTACT_RATE_LIMIT_PER_IP = (5, 1)
+CONTACT_RATE_LIMIT_GLOBAL = (60, 30)
+
+
+# Request instrumentation (see main/metrics.py)
+# Each worker writes its histograms to METRICS_DIR; /metrics sums them
+
+METRICS_DIR = os.environ.get('METRICS_DIR', BASE_DIR / 'metrics')
+METRICS_FLUSH_INTERVAL = 1.0
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']  # Prometheus scraper addresses
+SERVER_TIMING = os.environ.get('SERVER_TIMING', 'True').lower() == 'true'
+
+
+# Link: rel=preload headers for the assets each view's templates use, and
+# 103 Early Hints on ASGI servers that support them (see main/preload.py)
+
+PRELOAD_HEADERS = os.environ.get('PRELOAD_HEADERS', 'True').lower() == 'true'
+PRELOAD_MAX_LINKS = 8
+
+# Stream pages so the <head> is sent before the view's queries run
+# (see main/streaming.py). Off by default: a streamed page's headers go out
+# before it renders, so it carries no Server-Timing, and the first render of
+# each view has no Link: rel=preload header yet
+STREAMING_PAGES = os.environ.get('STREAMING_PAGES', 'False').lower() == 'true'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -119,7 +214,7 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/4.2/howto/static-files/
 
 STATIC_URL = '/static/'
-STATIC_ROOT = BASE_DIR / 'staticfiles'
+STATIC_ROOT = os.environ.get('STATIC_ROOT', BASE_DIR / 'staticfiles')
 
 STATICFILES_DIRS = [
     BASE_DIR / 'static',
@@ -129,10 +224,33 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
-# WhiteNoise configuration
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# WhiteNoise configuration, plus the bundles and critical CSS from main/assets.py
+STATICFILES_STORAGE = 'main.storage.PortfolioStaticFilesStorage'
+
+# Minified first-party bundles built by collectstatic; templates load them
+# with {% css_bundle %} / {% js_bundle %}, which use the sources when DEBUG is on
+STATIC_BUNDLES = {
+    'css/site.css': ['css/style.css'],
+    'js/site.js': ['js/main.js'],
+}
+
+# Optimized static images (main/images.py), keyed by content hash so
+# unchanged images aren't re-encoded on every deploy
+STATIC_IMAGE_CACHE = os.environ.get('STATIC_IMAGE_CACHE', BASE_DIR / '.image-cache')
+
+# Generated placeholder images for projects without one (main/placeholders.py),
+# kept on disk up to this many bytes, least recently used evicted first
+PLACEHOLDER_CACHE_DIR = os.environ.get('PLACEHOLDER_CACHE_DIR', BASE_DIR / 'placeholders')
+PLACEHOLDER_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# The only sizes and formats drawn; add a size here when a template's
+# {% placeholder_image %} asks for a new one
+PLACEHOLDER_SIZES = [(600, 400)]
+PLACEHOLDER_FORMATS = ['webp', 'jpg']
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Pre-rendered HTML written by `manage.py build_static`, served by nginx
+STATIC_SITE_ROOT = BASE_DIR / 'site'
@@ -13,6 +13,9 @@ document.addEventListener('DOMContentLoaded', function() {
     // Initialize contact form
     initContactForm();
     
+    // Load per-visitor fragments into the cached page
+    initFragments();
+    
     // Initialize tooltips
     initTooltips();
 });
@@ -75,8 +78,8 @@ function initSmoothScrolling() {
 }
 
 // Contact form enhancements
-function initContactForm() {
-    const contactForm = document.querySelector('form[method="post"]');
+function initContactForm(root = document) {
+    const contactForm = root.querySelector('form[method="post"]');
     if (contactForm) {
         const submitBtn = contactForm.querySelector('button[type="submit"]');
         const originalText = submitBtn.innerHTML;
@@ -96,6 +99,28 @@ function initContactForm() {
     }
 }
 
+// Pages are cached and shared, so anything that depends on the visitor
+// (the contact form's CSRF token, flash messages) is fetched separately
+function initFragments() {
+    document.querySelectorAll('[data-fragment]').forEach(container => {
+        fetch(container.dataset.fragment, { credentials: 'same-origin' })
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error('HTTP ' + response.status);
+                }
+                return response.text();
+            })
+            .then(html => {
+                container.innerHTML = html;
+                initContactForm(container);
+                enhanceFormValidation(container);
+            })
+            .catch(() => {
+                container.innerHTML = '<p class="text-danger mb-0">The form could not be loaded. Please reload the page.</p>';
+            });
+    });
+}
+
 // Initialize Bootstrap tooltips
 function initTooltips() {
     const tooltipTriggerList = [].slice.call(document.querySelectorAll('[data-bs-toggle="tooltip"]'));
@@ -170,8 +195,8 @@ function initLazyLoading() {
 initLazyLoading();
 
 // Form validation enhancements
-function enhanceFormValidation() {
-    const forms = document.querySelectorAll('form');
+function enhanceFormValidation(root = document) {
+    const forms = root.querySelectorAll('form');
     
     forms.forEach(form => {
         const inputs = form.querySelectorAll('input, textarea');
@@ -270,3 +295,62 @@ function initBackToTop() {
 
 // Initialize back to top button
 initBackToTop();
+
+// Infinite scroll for the projects grid
+function initInfiniteScroll() {
+    const grid = document.querySelector('[data-infinite-scroll]');
+    if (!grid || !('IntersectionObserver' in window)) {
+        return;
+    }
+    
+    let loading = false;
+    
+    function loadNextPage(link) {
+        if (loading) {
+            return;
+        }
+        loading = true;
+        
+        const url = new URL(link.href, window.location.href);
+        url.searchParams.set('fragment', '1');
+        
+        fetch(url)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error('HTTP ' + response.status);
+                }
+                return response.text();
+            })
+            .then(html => {
+                link.closest('[data-load-more]').outerHTML = html;
+                loading = false;
+                observeNextLink();
+            })
+            .catch(() => {
+                // Leave the plain link in place so it works as normal navigation
+                loading = false;
+                pageObserver.disconnect();
+            });
+    }
+    
+    const pageObserver = new IntersectionObserver(function(entries) {
+        entries.forEach(entry => {
+            if (entry.isIntersecting) {
+                pageObserver.unobserve(entry.target);
+                loadNextPage(entry.target);
+            }
+        });
+    }, { rootMargin: '400px' });
+    
+    function observeNextLink() {
+        const link = grid.querySelector('[data-next-page]');
+        if (link) {
+            pageObserver.observe(link);
+        }
+    }
+    
+    observeNextLink();
+}
+
+// Initialize infinite scroll
+initInfiniteScroll();